@@ -0,0 +1,284 @@
+"""
+Vlootanalyse voor het management: bezettingsgraad per fiets, per BikeType en
+per dag, omzet per week en defectpercentages.
+
+Reserveringen en reparaties worden één keer naar NumPy-kolommen geprojecteerd;
+de projectie wordt hergebruikt zolang de tabelversie (wijzigingsfeed van
+DataStore) niet verandert. Alle aggregaties zijn daarna gevectoriseerd.
+
+NumPy is optioneel: de rest van BIKER Light werkt zonder.
+
+Gebruik:
+    python analytics.py data_100k --van 2024-01-01 --tot 2025-01-01
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:     # pragma: no cover - afhankelijk van de omgeving
+    np = None
+
+from model import DataStore, BikeType, ReservationStatus
+
+
+# tijden als hele minuten sinds een maandag, zodat weken netjes op maandag beginnen
+EPOCH = datetime(2000, 1, 3)
+MINUTE = timedelta(minutes=1)
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+TYPE_CODES = {t: i for i, t in enumerate(BikeType)}
+
+
+def _minutes(moment: datetime) -> int:
+    return (moment - EPOCH) // MINUTE
+
+
+def _moment(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=int(minutes))
+
+
+class FleetAnalytics:
+    """
+    Gevectoriseerde rapportages over een DataStore.
+    Reserveringen met status GEANNULEERD tellen nergens mee.
+    """
+
+    def __init__(self, store: DataStore):
+        if np is None:
+            raise ImportError("NumPy is nodig voor analytics (pip install numpy).")
+        self.store = store
+        self._cache: dict[str, tuple[tuple, dict]] = {}
+
+    # --- projectie naar kolommen ---
+
+    def _version(self, table: str) -> tuple:
+        # len() vangt ook directe wijzigingen aan de dict die buiten de feed om gaan
+        return self.store.table_version(table), len(self.store._table(table))
+
+    def _columns(self, table: str, project) -> dict:
+        version = self._version(table)
+        cached = self._cache.get(table)
+        if cached is None or cached[0] != version:
+            cached = (version, project())
+            self._cache[table] = cached
+        return cached[1]
+
+    def _project_reservations(self) -> dict:
+        rows = [
+            r for r in self.store.reservations.values()
+            if r.status != ReservationStatus.GEANNULEERD
+        ]
+        n = len(rows)
+        return {
+            "bike_id": np.fromiter((r.bike_id for r in rows), dtype=np.int64, count=n),
+            "type": np.fromiter((TYPE_CODES[r.bike_type] for r in rows), dtype=np.int8, count=n),
+            "start": np.fromiter(((r.start - EPOCH) // MINUTE for r in rows), dtype=np.int64, count=n),
+            "end": np.fromiter(((r.end - EPOCH) // MINUTE for r in rows), dtype=np.int64, count=n),
+            "price": np.fromiter((r.total_price for r in rows), dtype=np.float64, count=n),
+        }
+
+    def _project_repairs(self) -> dict:
+        rows = list(self.store.repairs.values())
+        return {
+            "bike_id": np.fromiter((r.bike_id for r in rows), dtype=np.int64, count=len(rows)),
+        }
+
+    def _project_bikes(self) -> dict:
+        bikes = sorted(self.store.bikes.values(), key=lambda b: b.bike_id)
+        return {
+            "bike_id": np.fromiter((b.bike_id for b in bikes), dtype=np.int64, count=len(bikes)),
+            "type": np.fromiter((TYPE_CODES[b.bike_type] for b in bikes), dtype=np.int8, count=len(bikes)),
+        }
+
+    def reservation_columns(self) -> dict:
+        return self._columns("reservations", self._project_reservations)
+
+    def repair_columns(self) -> dict:
+        return self._columns("repairs", self._project_repairs)
+
+    def bike_columns(self) -> dict:
+        return self._columns("bikes", self._project_bikes)
+
+    def _bike_index(self, table: str):
+        """
+        Positie van de fiets van elke rij van `table` in bike_columns(); -1 voor
+        onbekende fietsen. Gecachet per versie van beide tabellen.
+        """
+        key = "bike_index:" + table
+        version = (self._version(table), self._version("bikes"))
+        cached = self._cache.get(key)
+        if cached is None or cached[0] != version:
+            columns = self.reservation_columns() if table == "reservations" else self.repair_columns()
+            bike_ids = columns["bike_id"]
+            known = self.bike_columns()["bike_id"]
+            if len(known) == 0:
+                index = np.full(len(bike_ids), -1, dtype=np.int64)
+            else:
+                # bike_ids zijn klein en (bijna) aaneengesloten: een opzoektabel is
+                # veel sneller dan searchsorted met willekeurige zoeksleutels
+                lookup = np.full(int(known[-1]) + 2, -1, dtype=np.int64)
+                lookup[known] = np.arange(len(known))
+                index = lookup[np.clip(bike_ids, -1, len(lookup) - 1)]
+            cached = (version, index)
+            self._cache[key] = cached
+        return cached[1]
+
+    # --- bezetting ---
+
+    def _booked_minutes(self, start: datetime, end: datetime):
+        """Per reservering de overlap (minuten) met [start, end)."""
+        res = self.reservation_columns()
+        lo, hi = _minutes(start), _minutes(end)
+        if hi <= lo:
+            raise ValueError("Einde van de periode moet na het begin liggen.")
+        overlap = np.minimum(res["end"], hi) - np.maximum(res["start"], lo)
+        return res, np.clip(overlap, 0, None), hi - lo
+
+    def utilization_per_bike(self, start: datetime, end: datetime) -> dict[int, float]:
+        """Fractie van de periode dat elke fiets verhuurd is."""
+        res, overlap, window = self._booked_minutes(start, end)
+        bikes = self.bike_columns()
+        idx = self._bike_index("reservations")
+        known = idx >= 0
+        booked = np.bincount(idx[known], weights=overlap[known], minlength=len(bikes["bike_id"]))
+        fraction = booked / window
+        return dict(zip(bikes["bike_id"].tolist(), fraction.tolist()))
+
+    def utilization_per_type(self, start: datetime, end: datetime) -> dict[BikeType, float]:
+        """Verhuurde fietsminuten gedeeld door beschikbare fietsminuten, per type."""
+        res, overlap, window = self._booked_minutes(start, end)
+        bikes = self.bike_columns()
+        n_types = len(TYPE_CODES)
+        booked = np.bincount(res["type"], weights=overlap, minlength=n_types)
+        fleet = np.bincount(bikes["type"], minlength=n_types)
+        return {
+            bike_type: (float(booked[code] / (fleet[code] * window)) if fleet[code] else 0.0)
+            for bike_type, code in TYPE_CODES.items()
+        }
+
+    def utilization_per_day(self, start: datetime, end: datetime,
+                            bike_type: BikeType | None = None) -> list[tuple[datetime, float]]:
+        """
+        Bezettingsgraad per kalenderdag in [start, end).
+        Verhuurde minuten tot tijdstip t zijn sum(t - s | s < t) - sum(t - e | e < t);
+        met gesorteerde begin- en eindtijden en cumulatieve sommen kost elke dag
+        dus maar twee binaire zoekacties.
+        """
+        res = self.reservation_columns()
+        bikes = self.bike_columns()
+        starts, ends = res["start"], res["end"]
+        fleet = len(bikes["bike_id"])
+        if bike_type is not None:
+            mask = res["type"] == TYPE_CODES[bike_type]
+            starts, ends = starts[mask], ends[mask]
+            fleet = int(np.count_nonzero(bikes["type"] == TYPE_CODES[bike_type]))
+
+        first = datetime(start.year, start.month, start.day)
+        days = (end - first + timedelta(days=1) - MINUTE).days
+        if days <= 0:
+            raise ValueError("Einde van de periode moet na het begin liggen.")
+        bounds = _minutes(first) + DAY_MINUTES * np.arange(days + 1, dtype=np.int64)
+
+        def booked_until(times, sorted_values):
+            cumsum = np.concatenate(([0], np.cumsum(sorted_values)))
+            count = np.searchsorted(sorted_values, times, side="left")
+            return times * count - cumsum[count]
+
+        booked = booked_until(bounds, np.sort(starts)) - booked_until(bounds, np.sort(ends))
+        per_day = np.diff(booked) / (fleet * DAY_MINUTES) if fleet else np.zeros(days)
+        return [(first + timedelta(days=i), float(v)) for i, v in enumerate(per_day)]
+
+    # --- omzet ---
+
+    def revenue_per_week(self, start: datetime | None = None,
+                         end: datetime | None = None) -> list[tuple[datetime, float]]:
+        """Som van total_price per week (maandag), op basis van de startdatum."""
+        res = self.reservation_columns()
+        mask = np.ones(len(res["start"]), dtype=bool)
+        if start is not None:
+            mask &= res["start"] >= _minutes(start)
+        if end is not None:
+            mask &= res["start"] < _minutes(end)
+        weeks = res["start"][mask] // WEEK_MINUTES
+        if len(weeks) == 0:
+            return []
+        # weken liggen dicht bij elkaar: bincount op de offset is veel sneller dan np.unique
+        first = int(weeks.min())
+        totals = np.bincount(weeks - first, weights=res["price"][mask])
+        counts = np.bincount(weeks - first)
+        return [
+            (_moment((first + offset) * WEEK_MINUTES), round(float(totals[offset]), 2))
+            for offset in np.flatnonzero(counts).tolist()
+        ]
+
+    # --- defecten ---
+
+    def defect_rate_per_bike(self) -> dict[int, float]:
+        """Reparaties per verhuur, per fiets (0.0 voor fietsen zonder verhuur)."""
+        bikes = self.bike_columns()
+        n = len(bikes["bike_id"])
+        rentals = self._counts_per_bike("reservations", n)
+        repairs = self._counts_per_bike("repairs", n)
+        rate = np.divide(repairs, rentals, out=np.zeros(n), where=rentals > 0)
+        return dict(zip(bikes["bike_id"].tolist(), rate.tolist()))
+
+    def defect_rate_per_type(self) -> dict[BikeType, float]:
+        """Reparaties per verhuur, per fietstype."""
+        bikes = self.bike_columns()
+        n = len(bikes["bike_id"])
+        n_types = len(TYPE_CODES)
+        rentals = self._counts_per_bike("reservations", n)
+        repairs = self._counts_per_bike("repairs", n)
+        rentals_t = np.bincount(bikes["type"], weights=rentals, minlength=n_types)
+        repairs_t = np.bincount(bikes["type"], weights=repairs, minlength=n_types)
+        return {
+            bike_type: (float(repairs_t[code] / rentals_t[code]) if rentals_t[code] else 0.0)
+            for bike_type, code in TYPE_CODES.items()
+        }
+
+    def _counts_per_bike(self, table: str, n: int):
+        idx = self._bike_index(table)
+        return np.bincount(idx[idx >= 0], minlength=n).astype(np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: vlootanalyse")
+    parser.add_argument("folder")
+    parser.add_argument("--van", required=True, help="begin van de periode (YYYY-MM-DD)")
+    parser.add_argument("--tot", required=True, help="einde van de periode (YYYY-MM-DD, exclusief)")
+    args = parser.parse_args()
+    start = datetime.strptime(args.van, "%Y-%m-%d")
+    end = datetime.strptime(args.tot, "%Y-%m-%d")
+
+    store = DataStore()
+    store.load_from_csv(args.folder)
+    analytics = FleetAnalytics(store)
+
+    t0 = time.perf_counter()
+    analytics.reservation_columns()
+    analytics.repair_columns()
+    analytics.bike_columns()
+    t1 = time.perf_counter()
+    per_type = analytics.utilization_per_type(start, end)
+    per_day = analytics.utilization_per_day(start, end)
+    per_bike = analytics.utilization_per_bike(start, end)
+    weeks = analytics.revenue_per_week(start, end)
+    defects = analytics.defect_rate_per_type()
+    t2 = time.perf_counter()
+
+    print(f"projectie {t1 - t0:.3f}s, aggregaties {t2 - t1:.3f}s")
+    for bike_type, value in per_type.items():
+        print(f"bezetting {bike_type.value:<12} {value:6.1%}   defecten/verhuur {defects[bike_type]:.3f}")
+    if per_day:
+        busiest = max(per_day, key=lambda item: item[1])
+        print(f"drukste dag: {busiest[0]:%Y-%m-%d} ({busiest[1]:.1%})")
+    if per_bike:
+        print(f"gemiddelde bezetting per fiets: {sum(per_bike.values()) / len(per_bike):.1%}")
+    print(f"omzet: {sum(total for _, total in weeks):.2f} over {len(weeks)} weken")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime
-
-from model import DataStore, BikeType, LocationType, Role, BikeStatus
+from itertools import islice
+from operator import attrgetter
+import os
+import threading
+import time
+
+from model import DataStore, BikeType, LocationType, Role, CsvConflictError
+from display import DisplayCache
+from dispatch import plan_day, format_plan
+from audit import AuditLog
+from pricing import DynamicPricing
+from ui_executor import UiExecutor
+from memory import ARCHIVE_FILE, MemoryBudget, format_report, memory_report
+from profiling import ActionProfiler
 
 
 class BikerApp(tk.Tk):
@@ -14,15 +26,104 @@ class BikerApp(tk.Tk):
     - Monteur: overzicht reparaties + fiets herstellen + uitloggen
     """
 
-    def __init__(self):
+    # aantal live zoekresultaten in de klant-comboboxen
+    CUSTOMER_COMBO_LIMIT = 20
+
+    # hoe vaak (ms) de datamap op externe wijzigingen wordt gecontroleerd
+    WATCH_INTERVAL_MS = 2000
+
+    # wijzigingsfeed voor facturatie/analyse, wordt bij elke save aangevuld
+    CHANGES_FILE = "changes.jsonl"
+    # wie heeft wat gewijzigd, doorlopend weggeschreven (zie audit.py)
+    AUDIT_FILE = "audit.jsonl"
+
+    # hoe vaak (ms) het geheugenbudget gecontroleerd wordt (alleen met BIKER_MEMORY_BUDGET_MB)
+    MEMORY_CHECK_MS = 60_000
+
+    # UI-acties die in de profileermodus elk een eigen profiel krijgen (zie profiling.py)
+    PROFILED_ACTIONS = (
+        "handle_login",
+        "logout",
+        "on_tab_changed",
+        "load_huurder_data",
+        "show_customer_reservations",
+        "create_reservation",
+        "send_defect",
+        "open_mijn_gegevens",
+        "load_admin_reservations",
+        "refresh_admin_reservations",
+        "new_customer_beheerder",
+        "create_reservation_beheerder",
+        "edit_selected_reservation",
+        "delete_selected_reservation",
+        "open_dispatch_plan",
+        "load_bikes",
+        "refresh_bikes",
+        "mark_bike_ok_from_bikes_tab",
+        "open_rebalancing_report",
+        "open_consistency_report",
+        "open_memory_report",
+        "load_monteur_data",
+        "refresh_repairs_tree",
+        "fix_bike_from_selected_repair",
+    )
+
+    def __init__(self, data_folder: str = ".", profile_folder: str | None = None):
         super().__init__()
 
         self.title("BIKER Light")
         self.geometry("900x650")
 
+        self.data_folder = data_folder
         self.store = DataStore()
-        self.store.load_from_csv(".")   # data laden uit CSV
+        # changes.jsonl is append-only: volgnummers lopen door na de vorige sessie
+        self._changes_exported = self.store.read_changes_checkpoint(data_folder)
+        if os.environ.get("BIKER_METRICS"):
+            self.store.enable_metrics()
+        self.audit = AuditLog(self.store, os.path.join(data_folder, self.AUDIT_FILE))
+        if os.environ.get("BIKER_DYNAMIC_PRICING"):
+            DynamicPricing(self.store)
+        # DataStore-aanroepen van de knoppen op een worker-thread (zie ui_executor.py);
+        # directe store-toegang vanuit de Tk-thread neemt executor.lock; dat is
+        # DataStore.write_lock, zodat ook snapshot() de schrijvers buitensluit
+        self.executor = UiExecutor(self, on_busy=self._on_busy, lock=self.store.write_lock)
+        # oude reserveringen archiveren boven het budget (zie memory.py)
+        self.memory_budget = None
+        if os.environ.get("BIKER_MEMORY_BUDGET_MB"):
+            self.memory_budget = MemoryBudget(
+                self.store, int(float(os.environ["BIKER_MEMORY_BUDGET_MB"]) * 1024 * 1024),
+                os.path.join(data_folder, ARCHIVE_FILE),
+            )
+        # profileermodus: vóór het opbouwen van de schermen, zodat de knoppen de
+        # ingepakte methoden binden; uit = niets ingepakt
+        self.profiler = None
+        profile_folder = profile_folder or os.environ.get("BIKER_PROFILE")
+        if profile_folder:
+            self.profiler = ActionProfiler(profile_folder, mode=os.environ.get("BIKER_PROFILE_MODE", "cprofile"))
+            self.profiler.attach(self, self.PROFILED_ACTIONS)
+
+        # opgemaakte tabelrijen, alleen opnieuw opgemaakt als de rij gewijzigd is
+        self.display = DisplayCache(self.store)
+        self.reservation_rows = self.display.view("reservations", self.reservation_values)
+        self.admin_reservation_rows = self.display.view(
+            "reservations", self.admin_reservation_values,
+            depends="customers", depends_key=attrgetter("customer_id"),
+        )
+        self.bike_rows = self.display.view(
+            "bikes", self.bike_values, depends="stations", depends_key=attrgetter("station_id"),
+        )
+        self.repair_rows = self.display.view("repairs", self.repair_values)
 
+        # tijdmetingen (seconden) van de laatste login, zie bench_startup.py
+        self.startup_timings: dict[str, float] = {}
+        self._login_started: float | None = None
+
+        # data-loaders die wachten tot het hoofdscherm getekend is
+        self._first_paint_done = False
+        self._after_paint = []
+
+        # tabbladen die pas bij eerste weergave worden opgebouwd
+        self._lazy_tabs: dict[str, tuple] = {}
 
         self.current_account = None
         self.current_role: Role | None = None
@@ -38,6 +139,178 @@ class BikerApp(tk.Tk):
 
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # verborgen metrics-paneel voor de beheerder (Ctrl+Shift+M)
+        self.metrics_window = None
+        self.bind_all("<Control-M>", self.open_metrics_panel)
+
+        # data op de achtergrond laden uit CSV; het login-scherm is meteen bruikbaar
+        self._load_progress = ("", 0, 0)
+        self._load_error: Exception | None = None
+        self._pending_login = False
+        self._load_thread = threading.Thread(target=self._load_data, daemon=True)
+        self._load_thread.start()
+        self.after(50, self._poll_loading)
+
+    # ---------- data laden (worker-thread) ----------
+
+    def _load_data(self):
+        """
+        Draait in een worker-thread: geen Tk-aanroepen hier. load_from_csv neemt
+        zelf write_lock (= executor.lock) voor het leegmaken en afronden; inloggen
+        via de executor kan dus al zodra de accounts geladen zijn.
+        """
+        try:
+            self.store.load_from_csv(self.data_folder, progress=self._on_load_progress)
+        except Exception as e:
+            self._load_error = e
+
+    def _on_load_progress(self, table: str, done: int, total: int):
+        self._load_progress = (table, done, total)
+
+    def _poll_loading(self):
+        """Voortgangsbalk bijwerken vanuit de Tk-thread tot het laden klaar is."""
+        table, done, total = self._load_progress
+        if total:
+            self.load_bar["value"] = 100.0 * done / total
+            self.load_label["text"] = f"Gegevens laden: {table} ({done}/{total} rijen)"
+
+        if self._load_thread.is_alive():
+            self.after(50, self._poll_loading)
+            return
+
+        if self._load_error is not None:
+            self.load_label["text"] = "Laden mislukt."
+            messagebox.showerror("Fout bij laden", str(self._load_error))
+        else:
+            self.load_bar["value"] = 100.0
+            self.load_label["text"] = "Gegevens geladen."
+        if self._pending_login:
+            self._pending_login = False
+            self.enter_main_ui()
+        if self._load_error is None:
+            self.after(self.WATCH_INTERVAL_MS, self.watch_data_folder)
+            if self.memory_budget is not None:
+                self.check_memory_budget()
+
+    # ---------- externe wijzigingen in de datamap ----------
+
+    def watch_data_folder(self):
+        """
+        Kijk periodiek of CSV-bestanden door andere tools gewijzigd zijn; alleen
+        gewijzigde tabellen worden opnieuw ingelezen en alleen de gewijzigde
+        rijen in de open tabellen ververst.
+        """
+        # inlezen en rijen opmaken op de worker; de Tk-thread werkt alleen de tabellen bij
+        customer_id = None
+        if self._live_tree("res_tree") is not None and self.current_role == Role.HUURDER:
+            customer_id = self.get_selected_customer_id()
+
+        def poll():
+            deltas = self.store.poll_changes(self.data_folder)
+            return deltas, self.delta_rows(deltas, customer_id)
+
+        def done(result):
+            if result[0]:
+                self.apply_deltas(*result)
+            self.after(self.WATCH_INTERVAL_MS, self.watch_data_folder)
+
+        def failed(error):
+            # half geschreven bestand e.d.: volgende keer opnieuw
+            print("Fout bij inlezen van externe wijzigingen:", error)
+            self.after(self.WATCH_INTERVAL_MS, self.watch_data_folder)
+
+        self.executor.submit("watch_data_folder", poll, on_done=done, on_error=failed)
+
+    def check_memory_budget(self):
+        """Periodiek op de worker: boven het budget oude reserveringen archiveren."""
+        def done(result):
+            if result.archived and self._live_tree("admin_tree") is not None:
+                self.refresh_admin_reservations()
+
+        self.executor.submit("memory_budget", self.memory_budget.check, on_done=done)
+        self.after(self.MEMORY_CHECK_MS, self.check_memory_budget)
+
+    def _on_busy(self, busy: bool):
+        """Bezig-indicator zolang er DataStore-opdrachten op de worker lopen."""
+        self.configure(cursor="watch" if busy else "")
+        label = getattr(self, "busy_label", None)
+        if label is not None and label.winfo_exists():
+            label["text"] = "Bezig…" if busy else ""
+
+    def _show_error(self, error: Exception):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Fout", str(error))
+        else:
+            self.report_callback_exception(type(error), error, error.__traceback__)
+
+    def _live_tree(self, name: str):
+        tree = getattr(self, name, None)
+        if tree is None or not tree.winfo_exists():
+            return None
+        return tree
+
+    @staticmethod
+    def _tree_upsert(tree, iid: str, values):
+        if tree.exists(iid):
+            tree.item(iid, values=values)
+        else:
+            tree.insert("", "end", iid=iid, values=values)
+
+    @staticmethod
+    def _rows_for_delta(delta, items: dict, values, keep=lambda obj: True) -> dict:
+        """{key: opgemaakte rij, of None = uit de tabel halen} voor één TableDelta."""
+        rows = {key: None for key in delta.removed}
+        for key in delta.added + delta.changed:
+            obj = items.get(key)
+            rows[key] = values(obj) if obj is not None and keep(obj) else None
+        return rows
+
+    def delta_rows(self, deltas: dict, customer_id: int | None) -> dict:
+        """Draait op de worker: rijen voor de open tabellen opmaken (zie apply_deltas)."""
+        rows = {}
+        res_delta = deltas.get("reservations")
+        if res_delta is not None:
+            now = datetime.now()
+            rows["res_tree"] = self._rows_for_delta(
+                res_delta, self.store.reservations, self.reservation_rows,
+                keep=lambda r: r.customer_id == customer_id and r.end >= now,
+            )
+            rows["admin_tree"] = self._rows_for_delta(res_delta, self.store.reservations, self.admin_reservation_rows)
+        if "bikes" in deltas:
+            rows["bikes_tree"] = self._rows_for_delta(deltas["bikes"], self.store.bikes, self.bike_rows)
+        if "repairs" in deltas:
+            rows["rep_tree"] = self._rows_for_delta(deltas["repairs"], self.store.repairs, self.repair_rows)
+        return rows
+
+    def _tree_apply(self, tree, rows: dict):
+        for key, values in rows.items():
+            if values is not None:
+                self._tree_upsert(tree, str(key), values)
+            elif tree.exists(str(key)):
+                tree.delete(str(key))
+
+    def apply_deltas(self, deltas: dict, rows: dict):
+        if "res_tree" in rows:
+            tree = self._live_tree("res_tree")
+            if tree is not None and self.current_role == Role.HUURDER:
+                self._tree_apply(tree, rows["res_tree"])
+            tree = self._live_tree("admin_tree")
+            if tree is not None and "customers" not in deltas:
+                self._tree_apply(tree, rows["admin_tree"])
+
+        if "customers" in deltas:
+            if self._live_tree("admin_tree") is not None:
+                # klantnamen staan in veel rijen: tabel opnieuw opbouwen
+                # (alleen rijen van gewijzigde klanten worden opnieuw opgemaakt)
+                self.refresh_admin_reservations()
+            if getattr(self, "admin_customer_combo", None) is not None and self.admin_customer_combo.winfo_exists():
+                self.refresh_admin_customer_combo()
+
+        for name in ("bikes_tree", "rep_tree"):
+            tree = self._live_tree(name)
+            if tree is not None and name in rows:
+                self._tree_apply(tree, rows[name])
+
 
     # ---------- login-UI ----------
 
@@ -73,6 +346,12 @@ class BikerApp(tk.Tk):
         btn_login = ttk.Button(form, text="Inloggen", command=self.handle_login)
         btn_login.grid(row=3, column=0, columnspan=2, pady=10)
 
+        # voortgang van het laden op de achtergrond
+        self.load_bar = ttk.Progressbar(frame, orient="horizontal", length=300, mode="determinate", maximum=100.0)
+        self.load_bar.pack(pady=(5, 0))
+        self.load_label = ttk.Label(frame, text="Gegevens laden...", foreground="gray")
+        self.load_label.pack()
+
         hint = ttk.Label(
             frame,
             text="Demo-accounts:\n"
@@ -95,22 +374,91 @@ class BikerApp(tk.Tk):
             messagebox.showwarning("Ontbrekende gegevens", "Vul gebruikersnaam en wachtwoord in.")
             return
 
+        if "accounts" not in self.store.loaded_tables:
+            messagebox.showinfo("Even geduld", "De accounts worden nog geladen, probeer het zo opnieuw.")
+            return
+
         role = Role(role_text)
-        acc = self.store.authenticate(username, password, role)
+
+        # op de worker: sleutelafleiding blokkeert de UI niet, en het omzetten van een
+        # leesbaar wachtwoord gebeurt onder hetzelfde slot als het afronden van het laden
+        def authenticate():
+            # een omgezet wachtwoord komt op naam van wie inlogt, niet van de vorige gebruiker
+            self.audit.actor = username
+            acc = self.store.authenticate(username, password, role)
+            if acc is None:
+                self.audit.actor = None
+            return acc
+
+        self.executor.submit(
+            "login", authenticate,
+            on_done=lambda acc: self._finish_login(acc, username, role), on_error=self._show_error,
+        )
+
+    def _finish_login(self, acc, username: str, role: Role):
         if acc is None:
+            wait = self.store.login_throttle.retry_after(username)
+            if wait > 0:
+                messagebox.showerror(
+                    "Inloggen geblokkeerd",
+                    f"Te veel mislukte pogingen. Probeer het over {int(wait) + 1} seconden opnieuw.",
+                )
+                return
             messagebox.showerror("Inloggen mislukt", "Onjuiste combinatie van rol / gebruikersnaam / wachtwoord.")
             return
 
         if role == Role.HUURDER and acc.customer_id is None:
+            self.audit.actor = None
             messagebox.showerror("Fout", "Deze huurder heeft geen gekoppelde klant.")
             return
 
         self.current_account = acc
         self.current_role = role
+        self.audit.actor = acc.username
+
+        self._login_started = time.perf_counter()
+        self.startup_timings = {}
+        self._first_paint_done = False
+        self._after_paint = []
 
+        if self._load_thread.is_alive():
+            # ingelogd, maar de overige tabellen laden nog: hoofdscherm volgt vanzelf
+            self._pending_login = True
+            self.load_label["text"] = "Ingelogd, even geduld: gegevens worden nog geladen..."
+            return
+        self.enter_main_ui()
+
+    def enter_main_ui(self):
+        if self.current_account is None:
+            return
         self.login_frame.pack_forget()
         self.build_main_ui()
 
+        self.startup_timings["build_main_ui"] = time.perf_counter() - self._login_started
+        self.after_idle(self._record_first_paint)
+
+    def _record_first_paint(self):
+        """Wordt aangeroepen nadat Tk het hoofdscherm voor het eerst heeft getekend."""
+        if self._login_started is None or self.main_frame is None:
+            return
+        self.update_idletasks()
+        self.startup_timings["login_to_first_paint"] = time.perf_counter() - self._login_started
+        self._first_paint_done = True
+        pending, self._after_paint = self._after_paint, []
+        for callback in pending:
+            self.after_idle(callback)
+
+    def after_first_paint(self, callback):
+        """Voer `callback` uit zodra het hoofdscherm getekend is (data laden na eerste paint)."""
+        if self._first_paint_done:
+            self.after_idle(callback)
+        else:
+            self._after_paint.append(callback)
+
+    def _record_data_loaded(self, name: str):
+        if self._login_started is not None:
+            self.startup_timings.setdefault(f"data_{name}", time.perf_counter() - self._login_started)
+
     # ---------- hoofd-UI ----------
 
     def build_main_ui(self):
@@ -127,6 +475,8 @@ class BikerApp(tk.Tk):
         ).pack(side="left")
 
         ttk.Button(top, text="Uitloggen", command=self.logout).pack(side="right")
+        self.busy_label = ttk.Label(top, text="")
+        self.busy_label.pack(side="right", padx=10)
 
         if self.current_role == Role.HUURDER:
             self.build_huurder_screen()
@@ -140,11 +490,33 @@ class BikerApp(tk.Tk):
             self.main_frame.destroy()
             self.main_frame = None
             self.notebook = None
+            self._lazy_tabs = {}
+            self._after_paint = []
+
+    def add_lazy_tab(self, text: str, builder):
+        """
+        Voeg een leeg tabblad toe; `builder(tab)` bouwt de inhoud (en laadt de data)
+        pas wanneer het tabblad voor het eerst getoond wordt.
+        """
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text=text)
+        self._lazy_tabs[str(tab)] = (builder, tab)
+        return tab
+
+    def on_tab_changed(self, event=None):
+        if self.notebook is None:
+            return
+        entry = self._lazy_tabs.pop(self.notebook.select(), None)
+        if entry is not None:
+            builder, tab = entry
+            builder(tab)
 
     def logout(self):
         """Terug naar het login-scherm."""
+        self._pending_login = False
         self.current_account = None
         self.current_role = None
+        self.audit.actor = None
         self.clear_main_content()
         self.login_frame.pack(fill="both", expand=True)
 
@@ -225,8 +597,23 @@ class BikerApp(tk.Tk):
         self.address_entry = ttk.Entry(form, width=30)
         self.address_entry.grid(row=2, column=3, padx=5, pady=2)
 
+        ttk.Label(form, text="Station:").grid(row=3, column=0, padx=5, pady=2, sticky="w")
+        self.station_var = tk.StringVar()
+        self.station_combo = ttk.Combobox(
+            form, textvariable=self.station_var, values=self.station_combo_values(), state="readonly", width=25,
+        )
+        self.station_combo.grid(row=3, column=1, padx=5, pady=2)
+        self.station_combo.current(0)
+
+        self.price_label = ttk.Label(form, text="Prijs: -")
+        self.price_label.grid(row=3, column=2, columnspan=2, padx=5, pady=2, sticky="w")
+        self.bind_price_quote(
+            self.price_label, self.bike_type_var.get, self.start_entry.get, self.end_entry.get,
+            self.bike_type_combo, self.start_entry, self.end_entry,
+        )
+
         ttk.Button(form, text="Nieuwe reservering", command=self.create_reservation)\
-            .grid(row=3, column=0, columnspan=4, pady=5)
+            .grid(row=4, column=0, columnspan=4, pady=5)
 
         # defect melden
         defect = ttk.LabelFrame(frame, text="Defect melden")
@@ -247,15 +634,94 @@ class BikerApp(tk.Tk):
         ttk.Button(defect, text="Melding versturen", command=self.send_defect)\
             .grid(row=3, column=0, columnspan=4, pady=5)
 
-        self.after(100, self.show_customer_reservations)
+        # reserveringen pas laden nadat het scherm getekend is
+        self.after_first_paint(self.load_huurder_data)
+
+    def load_huurder_data(self):
+        if self.main_frame is None or self.current_role != Role.HUURDER:
+            return
+        self.show_customer_reservations()
+        self._record_data_loaded("huurder")
 
     # --- helpers huurder / algemeen ---
 
+    def customer_combo_values(self, text: str = ""):
+        """
+        Top-k klanten voor een klant-combobox.
+        Zonder zoekterm (of met een al gekozen 'id – naam') de eerste klanten,
+        anders de live treffers uit de zoekindex. Draait op de worker (zie fill_customer_combo).
+        """
+        text = text.strip()
+        if text and "–" not in text:
+            customers = self.store.search_customers(text, limit=self.CUSTOMER_COMBO_LIMIT)
+        else:
+            customers = islice(self.store.customers.values(), self.CUSTOMER_COMBO_LIMIT)
+        return [f"{c.customer_id} – {c.name}" for c in customers]
+
+    def fill_customer_combo(self, key: str, combo, var, select_first: bool = True):
+        """
+        Treffers voor de huidige tekst op de worker zoeken; bij snel typen wordt
+        alleen het resultaat van de laatste toetsaanslag getoond.
+        """
+        def done(values):
+            if not combo.winfo_exists():
+                return
+            combo["values"] = values
+            if select_first and values and not var.get():
+                combo.current(0)
+
+        self.executor.submit(key, self.customer_combo_values, var.get(), on_done=done, on_error=self._show_error)
+
+    def price_quote_text(self, bike_text: str, start_text: str, end_text: str,
+                         reservation_id: int | None = None) -> str:
+        """'Prijs: € ..' voor de ingevulde velden, met de drukste dag als de prijs vraaggestuurd is."""
+        try:
+            bike_type = BikeType(bike_text)
+            start = datetime.strptime(start_text.strip(), "%Y-%m-%d %H:%M")
+            end = datetime.strptime(end_text.strip(), "%Y-%m-%d %H:%M")
+        except ValueError:
+            return "Prijs: -"
+        if end <= start:
+            return "Prijs: -"
+        if self.store.pricing is None:
+            return f"Prijs: € {self.store.quote_price(bike_type, start, end, reservation_id):.2f}"
+        quote = self.store.pricing.quote(bike_type, start, end, reservation_id)
+        return f"Prijs: € {quote.total:.2f} (drukste dag {quote.peak_occupancy:.0%} bezet)"
+
+    def bind_price_quote(self, label, bike_text, start_text, end_text, *widgets, reservation_id=None):
+        """Prijs in `label` bijwerken zodra een van de velden verandert (berekend op de worker)."""
+        def show(text):
+            if label.winfo_exists():
+                label["text"] = text
+
+        def update(event=None):
+            self.executor.submit(
+                f"price_quote{label}", self.price_quote_text, bike_text(), start_text(), end_text(), reservation_id,
+                on_done=show, on_error=self._show_error,
+            )
+
+        for widget in widgets:
+            widget.bind("<KeyRelease>", update, add="+")
+            widget.bind("<<ComboboxSelected>>", update, add="+")
+        update()
+
+    ALL_STATIONS = "Alle stations"
+
+    def station_combo_values(self):
+        return [self.ALL_STATIONS] + [f"{s.station_id} – {s.name}" for s in self.store.stations.values()]
+
+    @staticmethod
+    def parse_station_choice(value: str):
+        """'id – naam' -> station_id; 'Alle stations' of leeg -> None."""
+        if not value or "–" not in value:
+            return None
+        return int(value.split("–")[0].strip())
+
     def refresh_customer_combo(self):
-        values = [f"{c.customer_id} – {c.name}" for c in self.store.customers.values()]
-        self.customer_combo["values"] = values
-        if values and not self.customer_var.get():
-            self.customer_combo.current(0)
+        # huurder-scherm heeft (nog) geen klant-combobox
+        if getattr(self, "customer_combo", None) is None:
+            return
+        self.fill_customer_combo("customer_combo", self.customer_combo, self.customer_var)
 
     def get_selected_customer_id(self):
         if self.current_role == Role.HUURDER and self.current_account.customer_id is not None:
@@ -274,24 +740,28 @@ class BikerApp(tk.Tk):
         if customer_id is None:
             messagebox.showwarning("Geen klant", "Selecteer eerst een klant.")
             return
-        reservations = self.store.get_reservations_for_customer(customer_id)
-
-        for row in self.res_tree.get_children():
-            self.res_tree.delete(row)
-
-        for r in reservations:
-            self.res_tree.insert(
-                "",
-                "end",
-                values=(
-                    r.reservation_id,
-                    r.bike_type.value,
-                    r.start.strftime("%Y-%m-%d %H:%M"),
-                    r.end.strftime("%Y-%m-%d %H:%M"),
-                    r.location_type.value,
-                    f"{r.total_price:.2f}",
-                ),
-            )
+
+        def query():
+            # rijen op de worker opmaken; de Tk-thread hoeft alleen nog in te voegen
+            return [
+                (str(r.reservation_id), self.reservation_rows(r))
+                for r in self.store.get_reservations_for_customer(customer_id)
+            ]
+
+        self.executor.submit("customer_reservations", query, on_done=self._fill_res_tree, on_error=self._show_error)
+
+    def _fill_res_tree(self, rows):
+        self._fill_tree("res_tree", rows)
+
+    def reservation_values(self, r):
+        return (
+            r.reservation_id,
+            r.bike_type.value,
+            r.start.strftime("%Y-%m-%d %H:%M"),
+            r.end.strftime("%Y-%m-%d %H:%M"),
+            r.location_type.value,
+            f"{r.total_price:.2f}",
+        )
 
     def create_reservation(self):
         customer_id = self.get_selected_customer_id()
@@ -320,24 +790,24 @@ class BikerApp(tk.Tk):
         location = LocationType(loc_text)
         address = self.address_entry.get().strip() if location == LocationType.BEZORGEN else ""
 
-        try:
-            res = self.store.create_reservation(
-                customer_id=customer_id,
-                bike_type=bike_type,
-                start=start_dt,
-                end=end_dt,
-                location_type=location,
-                address=address,
+        def done(res):
+            messagebox.showinfo(
+                "Reservering gemaakt",
+                f"Reservering #{res.reservation_id} aangemaakt.\nTotaalprijs: € {res.total_price:.2f}",
             )
-        except ValueError as e:
-            messagebox.showerror("Fout", str(e))
-            return
-
-        messagebox.showinfo(
-            "Reservering gemaakt",
-            f"Reservering #{res.reservation_id} aangemaakt.\nTotaalprijs: € {res.total_price:.2f}",
+            self.show_customer_reservations()
+
+        self.executor.submit(
+            None, self.store.create_reservation,
+            customer_id=customer_id,
+            bike_type=bike_type,
+            start=start_dt,
+            end=end_dt,
+            location_type=location,
+            address=address,
+            station_id=self.parse_station_choice(self.station_var.get()),
+            on_done=done, on_error=self._show_error,
         )
-        self.show_customer_reservations()
 
     def send_defect(self):
         res_id_text = self.def_res_entry.get().strip()
@@ -353,19 +823,20 @@ class BikerApp(tk.Tk):
             messagebox.showwarning("Ontbrekende gegevens", "Vul defecttype en omschrijving in.")
             return
 
-        try:
-            repair = self.store.report_defect(reservation_id=res_id, defect_type=defect_type, description=description)
-        except ValueError as e:
-            messagebox.showerror("Fout", str(e))
-            return
-
-        messagebox.showinfo(
-            "Defect gemeld",
-            f"Reparatie #{repair.repair_id} aangemaakt voor fiets {repair.bike_id}.",
+        def done(repair):
+            messagebox.showinfo(
+                "Defect gemeld",
+                f"Reparatie #{repair.repair_id} aangemaakt voor fiets {repair.bike_id}.",
+            )
+            for entry in (self.def_res_entry, self.def_type_entry, self.def_desc_entry):
+                if entry.winfo_exists():
+                    entry.delete(0, "end")
+
+        self.executor.submit(
+            None, self.store.report_defect,
+            reservation_id=res_id, defect_type=defect_type, description=description,
+            on_done=done, on_error=self._show_error,
         )
-        self.def_res_entry.delete(0, "end")
-        self.def_type_entry.delete(0, "end")
-        self.def_desc_entry.delete(0, "end")
 
     def open_mijn_gegevens(self):
         """Open een apart venster waarin de huurder zijn gegevens kan bijwerken."""
@@ -400,17 +871,25 @@ class BikerApp(tk.Tk):
         addr_entry.grid(row=3, column=1, padx=5, pady=5)
 
         def opslaan():
-            cust.name = name_var.get().strip()
-            cust.email = email_var.get().strip()
-            cust.iban = iban_var.get().strip()
-            cust.delivery_address = addr_var.get().strip()
+            self.executor.submit(
+                None, self.store.update_customer, customer_id,
+                name=name_var.get().strip(),
+                email=email_var.get().strip(),
+                iban=iban_var.get().strip(),
+                delivery_address=addr_var.get().strip(),
+                on_done=opgeslagen, on_error=self._show_error,
+            )
+
+        def opgeslagen(_):
             self.refresh_customer_combo()
 
             # meteen naar csv schrijven (dezelfde map)
-            self.store.save_to_csv(".")
+            if not self.save_data():
+                return
 
             messagebox.showinfo("Opgeslagen", "Je gegevens zijn bijgewerkt.")
-            win.destroy()
+            if win.winfo_exists():
+                win.destroy()
 
         ttk.Button(win, text="Opslaan", command=opslaan).grid(row=4, column=0, columnspan=2, pady=10)
 
@@ -420,13 +899,13 @@ class BikerApp(tk.Tk):
         self.notebook = ttk.Notebook(self.main_frame)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.build_beheerder_bestellingen_tab()
-        self.build_beheerder_fietsen_tab()
-
-    def build_beheerder_bestellingen_tab(self):
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text="Reserveringen")
+        # tabbladen worden pas opgebouwd als ze voor het eerst zichtbaar worden
+        self.add_lazy_tab("Reserveringen", self.build_beheerder_bestellingen_tab)
+        self.add_lazy_tab("Fietsen", self.build_beheerder_fietsen_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.on_tab_changed()
 
+    def build_beheerder_bestellingen_tab(self, tab):
         # tabel met alle reserveringen
         frame = ttk.LabelFrame(tab, text="Alle reserveringen")
         frame.pack(fill="both", expand=True, padx=5, pady=5)
@@ -458,13 +937,18 @@ class BikerApp(tk.Tk):
         ttk.Button(button_frame, text="Verwijder geselecteerde reservering",
                    command=self.delete_selected_reservation).pack(side="left", padx=5)
 
+        # bezorg- en ophaalritten van een dag bundelen tot routes
+        ttk.Button(button_frame, text="Bezorgplanning",
+                   command=self.open_dispatch_plan).pack(side="left", padx=5)
+
         # formulier voor nieuwe reservering
         form = ttk.LabelFrame(tab, text="Nieuwe reservering")
         form.pack(fill="x", padx=5, pady=5)
 
         ttk.Label(form, text="Klant:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
         self.admin_customer_var = tk.StringVar()
-        self.admin_customer_combo = ttk.Combobox(form, textvariable=self.admin_customer_var, state="readonly", width=25)
+        self.admin_customer_combo = ttk.Combobox(form, textvariable=self.admin_customer_var, width=25)
+        self.admin_customer_combo.bind("<KeyRelease>", self.on_admin_customer_typed)
         self.refresh_admin_customer_combo()
         self.admin_customer_combo.grid(row=0, column=1, padx=5, pady=2)
 
@@ -502,82 +986,74 @@ class BikerApp(tk.Tk):
         self.admin_address_entry = ttk.Entry(form, width=30)
         self.admin_address_entry.grid(row=3, column=3, padx=5, pady=2)
 
-        ttk.Button(form, text="Nieuwe reservering", command=self.create_reservation_beheerder) \
-            .grid(row=4, column=0, columnspan=4, pady=5)
-
-        self.refresh_admin_reservations()
-
-
-        ttk.Label(form, text="Klant:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
-        self.admin_customer_var = tk.StringVar()
-        self.admin_customer_combo = ttk.Combobox(form, textvariable=self.admin_customer_var, state="readonly", width=25)
-        self.refresh_admin_customer_combo()
-        self.admin_customer_combo.grid(row=0, column=1, padx=5, pady=2)
-
-        ttk.Button(form, text="Nieuwe klant", command=self.new_customer_beheerder)\
-            .grid(row=0, column=2, padx=5, pady=2)
-
-        ttk.Label(form, text="Type fiets:").grid(row=1, column=0, padx=5, pady=2, sticky="w")
-        self.admin_bike_type_var = tk.StringVar()
-        self.admin_bike_type_combo = ttk.Combobox(
-            form,
-            textvariable=self.admin_bike_type_var,
-            values=[b.value for b in BikeType],
-            state="readonly",
-            width=15,
+        ttk.Label(form, text="Station:").grid(row=4, column=0, padx=5, pady=2, sticky="w")
+        self.admin_station_var = tk.StringVar()
+        self.admin_station_combo = ttk.Combobox(
+            form, textvariable=self.admin_station_var, values=self.station_combo_values(),
+            state="readonly", width=25,
+        )
+        self.admin_station_combo.grid(row=4, column=1, padx=5, pady=2)
+        self.admin_station_combo.current(0)
+
+        self.admin_price_label = ttk.Label(form, text="Prijs: -")
+        self.admin_price_label.grid(row=4, column=2, columnspan=2, padx=5, pady=2, sticky="w")
+        self.bind_price_quote(
+            self.admin_price_label, self.admin_bike_type_var.get, self.admin_start_entry.get,
+            self.admin_end_entry.get, self.admin_bike_type_combo, self.admin_start_entry, self.admin_end_entry,
         )
-        self.admin_bike_type_combo.grid(row=1, column=1, padx=5, pady=2)
-        self.admin_bike_type_combo.current(0)
 
-        ttk.Label(form, text="Start (YYYY-MM-DD HH:MM):").grid(row=2, column=0, padx=5, pady=2, sticky="w")
-        self.admin_start_entry = ttk.Entry(form, width=20)
-        self.admin_start_entry.grid(row=2, column=1, padx=5, pady=2)
+        ttk.Button(form, text="Nieuwe reservering", command=self.create_reservation_beheerder) \
+            .grid(row=5, column=0, columnspan=4, pady=5)
 
-        ttk.Label(form, text="Einde (YYYY-MM-DD HH:MM):").grid(row=3, column=0, padx=5, pady=2, sticky="w")
-        self.admin_end_entry = ttk.Entry(form, width=20)
-        self.admin_end_entry.grid(row=3, column=1, padx=5, pady=2)
+        self.after_first_paint(self.load_admin_reservations)
 
-        ttk.Label(form, text="Locatie:").grid(row=1, column=2, padx=5, pady=2, sticky="w")
-        self.admin_location_var = tk.StringVar(value=LocationType.OPHALEN.value)
-        ttk.Radiobutton(form, text="Ophalen", variable=self.admin_location_var,
-                        value=LocationType.OPHALEN.value).grid(row=1, column=3, sticky="w")
-        ttk.Radiobutton(form, text="Bezorgen", variable=self.admin_location_var,
-                        value=LocationType.BEZORGEN.value).grid(row=2, column=3, sticky="w")
+    def load_admin_reservations(self):
+        if self.notebook is None:
+            return
+        self.refresh_admin_reservations(on_done=lambda: self._record_data_loaded("reserveringen"))
 
-        ttk.Label(form, text="Afleveradres (bij bezorgen):").grid(row=3, column=2, padx=5, pady=2, sticky="w")
-        self.admin_address_entry = ttk.Entry(form, width=30)
-        self.admin_address_entry.grid(row=3, column=3, padx=5, pady=2)
+    def refresh_admin_reservations(self, on_done=None):
+        def query():
+            return [(str(r.reservation_id), self.admin_reservation_rows(r)) for r in self.store.iter_reservations()]
 
-        ttk.Button(form, text="Nieuwe reservering", command=self.create_reservation_beheerder)\
-            .grid(row=4, column=0, columnspan=4, pady=5)
+        def fill(rows):
+            self._fill_tree("admin_tree", rows)
+            if on_done is not None:
+                on_done()
 
-        self.refresh_admin_reservations()
-
-    def refresh_admin_reservations(self):
-        reservations = self.store.get_all_reservations()
-        for row in self.admin_tree.get_children():
-            self.admin_tree.delete(row)
-        for r in reservations:
-            customer_name = self.store.customers[r.customer_id].name
-            self.admin_tree.insert(
-                "",
-                "end",
-                values=(
-                    r.reservation_id,
-                    customer_name,
-                    r.bike_type.value,
-                    r.start.strftime("%Y-%m-%d %H:%M"),
-                    r.end.strftime("%Y-%m-%d %H:%M"),
-                    r.location_type.value,
-                    f"{r.total_price:.2f}",
-                ),
-            )
+        self.executor.submit("admin_reservations", query, on_done=fill, on_error=self._show_error)
+
+    def _fill_tree(self, name: str, rows):
+        """Tabel vervangen door de (iid, waarden)-rijen die de worker heeft opgemaakt."""
+        tree = self._live_tree(name)
+        if tree is None:
+            return
+        tree.delete(*tree.get_children())
+        for iid, values in rows:
+            tree.insert("", "end", iid=iid, values=values)
+
+    def admin_reservation_values(self, r):
+        customer = self.store.customers.get(r.customer_id)
+        return (
+            r.reservation_id,
+            customer.name if customer is not None else f"? ({r.customer_id})",
+            r.bike_type.value,
+            r.start.strftime("%Y-%m-%d %H:%M"),
+            r.end.strftime("%Y-%m-%d %H:%M"),
+            r.location_type.value,
+            f"{r.total_price:.2f}",
+        )
 
     def refresh_admin_customer_combo(self):
-        values = [f"{c.customer_id} – {c.name}" for c in self.store.customers.values()]
-        self.admin_customer_combo["values"] = values
-        if values and not self.admin_customer_var.get():
-            self.admin_customer_combo.current(0)
+        self.fill_customer_combo("admin_customer_combo", self.admin_customer_combo, self.admin_customer_var)
+
+    def on_admin_customer_typed(self, event):
+        """Live zoeken: toon de beste treffers terwijl de beheerder typt."""
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        self.fill_customer_combo(
+            "admin_customer_combo", self.admin_customer_combo, self.admin_customer_var, select_first=False,
+        )
 
     def new_customer_beheerder(self):
         """Nieuwe huurder registreren met wachtwoord (account wordt aangemaakt)."""
@@ -598,12 +1074,18 @@ class BikerApp(tk.Tk):
             messagebox.showwarning("Geen wachtwoord", "Wachtwoord is verplicht.")
             return
 
-        customer = self.store.add_customer(name)
-        self.store.add_account(username=username, password=password, role=Role.HUURDER, customer_id=customer.customer_id)
+        def add():
+            customer = self.store.add_customer(name)
+            self.store.add_account(
+                username=username, password=password, role=Role.HUURDER, customer_id=customer.customer_id,
+            )
+
+        def done(_):
+            self.refresh_admin_customer_combo()
+            self.refresh_customer_combo()
+            messagebox.showinfo("Klant aangemaakt", f"Klant '{name}' met account '{username}' is toegevoegd.")
 
-        self.refresh_admin_customer_combo()
-        self.refresh_customer_combo()
-        messagebox.showinfo("Klant aangemaakt", f"Klant '{name}' met account '{username}' is toegevoegd.")
+        self.executor.submit(None, add, on_done=done, on_error=self._show_error)
 
     def get_admin_selected_customer_id(self):
         value = self.admin_customer_var.get()
@@ -641,24 +1123,24 @@ class BikerApp(tk.Tk):
         location = LocationType(loc_text)
         address = self.admin_address_entry.get().strip() if location == LocationType.BEZORGEN else ""
 
-        try:
-            res = self.store.create_reservation(
-                customer_id=customer_id,
-                bike_type=bike_type,
-                start=start_dt,
-                end=end_dt,
-                location_type=location,
-                address=address,
+        def done(res):
+            messagebox.showinfo(
+                "Reservering gemaakt",
+                f"Reservering #{res.reservation_id} aangemaakt.\nTotaalprijs: € {res.total_price:.2f}",
             )
-        except ValueError as e:
-            messagebox.showerror("Fout", str(e))
-            return
+            self.refresh_admin_reservations()
 
-        messagebox.showinfo(
-            "Reservering gemaakt",
-            f"Reservering #{res.reservation_id} aangemaakt.\nTotaalprijs: € {res.total_price:.2f}",
+        self.executor.submit(
+            None, self.store.create_reservation,
+            customer_id=customer_id,
+            bike_type=bike_type,
+            start=start_dt,
+            end=end_dt,
+            location_type=location,
+            address=address,
+            station_id=self.parse_station_choice(self.admin_station_var.get()),
+            on_done=done, on_error=self._show_error,
         )
-        self.refresh_admin_reservations()
 
     def edit_selected_reservation(self):
         """Open een venster om de geselecteerde reservering te bewerken (datum/locatie/adres)."""
@@ -677,7 +1159,7 @@ class BikerApp(tk.Tk):
 
         win = tk.Toplevel(self)
         win.title(f"Reservering #{res_id} bewerken")
-        win.geometry("420x220")
+        win.geometry("420x250")
 
         ttk.Label(win, text="Start (YYYY-MM-DD HH:MM):").grid(row=0, column=0, padx=5, pady=5, sticky="e")
         start_var = tk.StringVar(value=r.start.strftime("%Y-%m-%d %H:%M"))
@@ -701,6 +1183,13 @@ class BikerApp(tk.Tk):
         addr_entry = ttk.Entry(win, textvariable=addr_var, width=30)
         addr_entry.grid(row=4, column=1, padx=5, pady=5)
 
+        price_label = ttk.Label(win, text="Prijs: -")
+        price_label.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
+        self.bind_price_quote(
+            price_label, lambda: r.bike_type.value, start_var.get, end_var.get,
+            start_entry, end_entry, reservation_id=res_id,
+        )
+
         def opslaan():
             try:
                 new_start = datetime.strptime(start_var.get().strip(), "%Y-%m-%d %H:%M")
@@ -712,19 +1201,23 @@ class BikerApp(tk.Tk):
             new_loc = LocationType(loc_var.get())
             new_addr = addr_var.get().strip()
 
-            r.start = new_start
-            r.end = new_end
-            r.location_type = new_loc
-            r.address = new_addr
-
-            # prijs opnieuw berekenen
-            r.total_price = self.store._calculate_price(r.bike_type, r.start, r.end)
+            # controleert beschikbaarheid, wisselt zo nodig van fiets en berekent de prijs opnieuw
+            self.executor.submit(
+                None, self.store.update_reservation, res_id,
+                start=new_start,
+                end=new_end,
+                location_type=new_loc,
+                address=new_addr,
+                on_done=opgeslagen, on_error=self._show_error,
+            )
 
+        def opgeslagen(_):
             self.refresh_admin_reservations()
             messagebox.showinfo("Opgeslagen", "Reservering is bijgewerkt.")
-            win.destroy()
+            if win.winfo_exists():
+                win.destroy()
 
-        ttk.Button(win, text="Opslaan", command=opslaan).grid(row=5, column=0, columnspan=2, pady=10)
+        ttk.Button(win, text="Opslaan", command=opslaan).grid(row=6, column=0, columnspan=2, pady=10)
 
     def delete_selected_reservation(self):
         """Verwijder de geselecteerde reservering (voor beheerder)"""
@@ -743,32 +1236,25 @@ class BikerApp(tk.Tk):
         if not bevestigen:
             return
 
-        try:
-            self.store.delete_reservation(res_id)
-        except ValueError as e:
-            messagebox.showerror("Fout", str(e))
-            return
-
-        self.refresh_admin_reservations()
+        def done(_):
+            self.refresh_admin_reservations()
+            messagebox.showinfo("Verwijdererd", f"Reservering #{res_id} is verwijderd.")
 
-        messagebox.showinfo("Verwijdererd", f"Reservering #{res_id} is verwijderd.")
+        self.executor.submit(None, self.store.delete_reservation, res_id, on_done=done, on_error=self._show_error)
 
     # --- Fietsen-tab ---
 
-    def build_beheerder_fietsen_tab(self):
-        tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text="Fietsen")
-
+    def build_beheerder_fietsen_tab(self, tab):
         frame = ttk.LabelFrame(tab, text="Overzicht fietsen")
         frame.pack(fill="both", expand=True, padx=5, pady=5)
 
         self.bikes_tree = ttk.Treeview(
             frame,
-            columns=("id", "type", "status", "beschikbaar"),
+            columns=("id", "type", "status", "beschikbaar", "station"),
             show="headings",
         )
-        headers = ["ID", "Type", "Status", "Beschikbaar"]
-        for col, text in zip(("id", "type", "status", "beschikbaar"), headers):
+        headers = ["ID", "Type", "Status", "Beschikbaar", "Station"]
+        for col, text in zip(("id", "type", "status", "beschikbaar", "station"), headers):
             self.bikes_tree.heading(col, text=text)
             self.bikes_tree.column(col, width=120)
         self.bikes_tree.pack(side="left", fill="both", expand=True)
@@ -783,23 +1269,125 @@ class BikerApp(tk.Tk):
         ttk.Button(btn_frame, text="Ververs", command=self.refresh_bikes).pack(side="left")
         ttk.Button(btn_frame, text="Markeer geselecteerde fiets als OK", command=self.mark_bike_ok_from_bikes_tab)\
             .pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Herverdeling (7 dagen)", command=self.open_rebalancing_report)\
+            .pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Consistentiecontrole", command=self.open_consistency_report)\
+            .pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Geheugengebruik", command=self.open_memory_report)\
+            .pack(side="left", padx=5)
+
+        self.after_first_paint(self.load_bikes)
+
+    def load_bikes(self):
+        if self.notebook is None:
+            return
+        self.refresh_bikes(on_done=lambda: self._record_data_loaded("fietsen"))
+
+    def refresh_bikes(self, on_done=None):
+        def query():
+            return [(str(b.bike_id), self.bike_rows(b)) for b in self.store.bikes.values()]
+
+        def fill(rows):
+            self._fill_tree("bikes_tree", rows)
+            if on_done is not None:
+                on_done()
+
+        self.executor.submit("bikes", query, on_done=fill, on_error=self._show_error)
+
+    def bike_values(self, b):
+        station = self.store.stations.get(b.station_id)
+        return (
+            b.bike_id,
+            b.bike_type.value,
+            b.status.value,
+            "Ja" if b.available else "Nee",
+            station.name if station is not None else "-",
+        )
+
+    def _show_text(self, title: str, geometry: str, text: str):
+        win = tk.Toplevel(self)
+        win.title(title)
+        win.geometry(geometry)
+        box = tk.Text(win, wrap="none")
+        box.insert("1.0", text)
+        box.configure(state="disabled")
+        box.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def open_rebalancing_report(self):
+        """Stations die de komende week fietsen tekortkomen, met een voorstel voor een donorstation."""
+        def query():
+            lines = []
+            for s in self.store.rebalancing_report(days=7):
+                station = self.store.stations[s.station_id]
+                line = (
+                    f"{s.day:%Y-%m-%d}  {station.name:<25} {s.bike_type.value:<11} "
+                    f"{s.booked}/{s.fleet} verhuurd, {s.free} vrij"
+                )
+                if s.donor_station_id is not None:
+                    line += f"  -> haal bij {self.store.stations[s.donor_station_id].name}"
+                lines.append(line)
+            return "\n".join(lines) if lines else "Geen tekorten verwacht in de komende 7 dagen."
+
+        self.executor.submit(
+            "rebalancing_report", query,
+            on_done=lambda text: self._show_text("Herverdeling stations", "760x420", text),
+            on_error=self._show_error,
+        )
 
-        self.refresh_bikes()
-
-    def refresh_bikes(self):
-        for row in self.bikes_tree.get_children():
-            self.bikes_tree.delete(row)
-        for b in self.store.bikes.values():
-            self.bikes_tree.insert(
-                "",
-                "end",
-                values=(
-                    b.bike_id,
-                    b.bike_type.value,
-                    b.status.value,
-                    "Ja" if b.available else "Nee",
-                ),
+    def open_consistency_report(self):
+        """Tegenstrijdigheden in de gegevens; afwijkende beschikbaarheid wordt direct hersteld."""
+        def query():
+            issues = self.store.check_consistency()
+            fixed_at_load = sum(1 for i in self.store.consistency_issues if i.fixed)
+            return issues, fixed_at_load
+
+        def show(result):
+            issues, fixed_at_load = result
+            lines = [f"Bij het laden hersteld: beschikbaarheid van {fixed_at_load} fiets(en)."] if fixed_at_load else []
+            lines += [
+                f"{i.kind:<22} {i.table:<13} #{i.key:<7} {i.detail}" + ("  (hersteld)" if i.fixed else "")
+                for i in issues
+            ]
+            if not issues:
+                lines.append("Geen tegenstrijdigheden gevonden.")
+            if any(i.fixed for i in issues):
+                self.refresh_bikes()
+            self._show_text("Consistentiecontrole", "860x420", "\n".join(lines))
+
+        self.executor.submit("consistency_report", query, on_done=show, on_error=self._show_error)
+
+    def open_memory_report(self):
+        """Geschat geheugengebruik per tabel en index; met budget ook handmatig archiveren."""
+        budget = self.memory_budget
+
+        def show(report):
+            win = tk.Toplevel(self)
+            win.title("Geheugengebruik")
+            win.geometry("560x420")
+            box = tk.Text(win, wrap="none")
+            lines = [format_report(report, budget.max_bytes if budget is not None else None)]
+            if budget is not None:
+                lines.append(f"\nGearchiveerd naar {budget.archive_file}: {budget.archived} reserveringen")
+            box.insert("1.0", "\n".join(lines))
+            box.configure(state="disabled")
+            box.pack(fill="both", expand=True, padx=5, pady=5)
+            if budget is not None:
+                ttk.Button(win, text="Nu controleren en archiveren",
+                           command=lambda: (win.destroy(), self._archive_now())).pack(pady=5)
+
+        self.executor.submit("memory_report", memory_report, self.store, on_done=show, on_error=self._show_error)
+
+    def _archive_now(self):
+        def done(result):
+            messagebox.showinfo(
+                "Geheugenbudget",
+                f"{result.archived} reserveringen gearchiveerd "
+                f"({result.before / 2**20:.1f} -> {result.after / 2**20:.1f} MB).",
             )
+            if self._live_tree("admin_tree") is not None:
+                self.refresh_admin_reservations()
+
+        self.executor.submit("memory_budget", self.memory_budget.check, on_done=done, on_error=self._show_error)
 
     def mark_bike_ok_from_bikes_tab(self):
         selected = self.bikes_tree.selection()
@@ -808,13 +1396,105 @@ class BikerApp(tk.Tk):
             return
         values = self.bikes_tree.item(selected[0], "values")
         bike_id = int(values[0])
-        bike = self.store.bikes.get(bike_id)
-        if not bike:
-            messagebox.showerror("Fout", "Onbekende fiets.")
+        self.executor.submit(
+            None, self.store.mark_bike_ok, bike_id,
+            on_done=lambda _: self.refresh_bikes(), on_error=self._show_error,
+        )
+
+    # --- verborgen metrics-paneel ---
+
+    def open_metrics_panel(self, event=None):
+        """Live DataStore-metrics; alleen voor de beheerder, zet instrumentatie zo nodig aan."""
+        if self.current_role != Role.BEHEERDER:
+            return
+        if self.metrics_window is not None and self.metrics_window.winfo_exists():
+            self.metrics_window.lift()
+            return
+        self.store.enable_metrics()
+
+        win = tk.Toplevel(self)
+        win.title("DataStore metrics")
+        win.geometry("640x420")
+        self.metrics_window = win
+
+        tree = ttk.Treeview(
+            win,
+            columns=("method", "calls", "errors", "p50", "p99", "max"),
+            show="headings",
+        )
+        headers = ["Methode", "Aanroepen", "Fouten", "p50 (ms)", "p99 (ms)", "Max (ms)"]
+        for col, text in zip(("method", "calls", "errors", "p50", "p99", "max"), headers):
+            tree.heading(col, text=text)
+            tree.column(col, width=90 if col != "method" else 200)
+        tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+        rows_label = ttk.Label(win, text="")
+        rows_label.pack(fill="x", padx=5)
+
+        btn_frame = ttk.Frame(win)
+        btn_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Button(btn_frame, text="Exporteer JSON",
+                   command=lambda: self.export_metrics("json")).pack(side="left")
+        ttk.Button(btn_frame, text="Exporteer Prometheus",
+                   command=lambda: self.export_metrics("prometheus")).pack(side="left", padx=5)
+
+        def refresh():
+            if not win.winfo_exists() or self.store.metrics is None:
+                return
+            self.executor.submit(
+                "metrics_panel", lambda: self.store.metrics.snapshot(self.store.row_counts()),
+                on_done=show, on_error=self._show_error,
+            )
+
+        def show(snapshot):
+            if not win.winfo_exists():
+                return
+            # responsiviteit van de UI: eventloop-vertraging en wachttijd per opdracht
+            ui_methods = self.executor.metrics.snapshot()["methods"]
+            tree.delete(*tree.get_children())
+            for name, m in list(snapshot["methods"].items()) + list(ui_methods.items()):
+                lat = m["latency"]
+                tree.insert("", "end", values=(
+                    name,
+                    m["calls"],
+                    m["errors"],
+                    f"{lat['p50'] * 1000:.3f}",
+                    f"{lat['p99'] * 1000:.3f}",
+                    f"{lat['max'] * 1000:.3f}",
+                ))
+            rows_label["text"] = (
+                "Rijen: " + ", ".join(f"{t}={n}" for t, n in snapshot["rows"].items())
+                + f"  |  verouderde UI-resultaten weggegooid: {self.executor.stale}"
+            )
+            win.after(1000, refresh)
+
+        refresh()
+
+    def open_dispatch_plan(self):
+        """Routes voor de bezorg- en ophaalritten van een gekozen dag tonen."""
+        text = simpledialog.askstring(
+            "Bezorgplanning", "Datum (YYYY-MM-DD):", initialvalue=datetime.now().strftime("%Y-%m-%d"),
+        )
+        if not text:
+            return
+        try:
+            day = datetime.strptime(text.strip(), "%Y-%m-%d").date()
+        except ValueError:
+            messagebox.showerror("Fout", "Ongeldige datum, gebruik YYYY-MM-DD.")
+            return
+        self.executor.submit(
+            "dispatch_plan", lambda: format_plan(plan_day(self.store, day)),
+            on_done=lambda plan: self._show_text(f"Bezorgplanning {day:%Y-%m-%d}", "700x500", plan),
+            on_error=self._show_error,
+        )
+
+    def export_metrics(self, fmt: str):
+        ext = ".json" if fmt == "json" else ".prom"
+        filename = filedialog.asksaveasfilename(defaultextension=ext, initialfile=f"biker_metrics{ext}")
+        if not filename:
             return
-        bike.status = BikeStatus.OK
-        bike.available = True
-        self.refresh_bikes()
+        self.store.export_metrics(filename, fmt=fmt)
+        messagebox.showinfo("Geëxporteerd", f"Metrics opgeslagen in {filename}.")
 
     # ========== Monteur-scherm ==========
 
@@ -847,22 +1527,31 @@ class BikerApp(tk.Tk):
         ttk.Button(btn_frame, text="Fiets gerepareerd (OK maken)", command=self.fix_bike_from_selected_repair)\
             .pack(side="left", padx=5)
 
-        self.refresh_repairs_tree()
-
-    def refresh_repairs_tree(self):
-        for row in self.rep_tree.get_children():
-            self.rep_tree.delete(row)
-        for rep in self.store.get_all_repairs():
-            self.rep_tree.insert(
-                "",
-                "end",
-                values=(
-                    rep.repair_id,
-                    rep.bike_id,
-                    rep.reservation_id,
-                    f"{rep.defect_type}: {rep.description}",
-                ),
-            )
+        self.after_first_paint(self.load_monteur_data)
+
+    def load_monteur_data(self):
+        if self.main_frame is None or self.current_role != Role.MONTEUR:
+            return
+        self.refresh_repairs_tree(on_done=lambda: self._record_data_loaded("reparaties"))
+
+    def refresh_repairs_tree(self, on_done=None):
+        def query():
+            return [(str(rep.repair_id), self.repair_rows(rep)) for rep in self.store.iter_repairs()]
+
+        def fill(rows):
+            self._fill_tree("rep_tree", rows)
+            if on_done is not None:
+                on_done()
+
+        self.executor.submit("repairs", query, on_done=fill, on_error=self._show_error)
+
+    def repair_values(self, rep):
+        return (
+            rep.repair_id,
+            rep.bike_id,
+            rep.reservation_id,
+            f"{rep.defect_type}: {rep.description}",
+        )
 
     def fix_bike_from_selected_repair(self):
         selected = self.rep_tree.selection()
@@ -871,24 +1560,67 @@ class BikerApp(tk.Tk):
             return
         values = self.rep_tree.item(selected[0], "values")
         repair_id = int(values[0])
-        try:
-            self.store.fix_bike_from_repair(repair_id)
-        except ValueError as e:
-            messagebox.showerror("Fout", str(e))
-            return
-        messagebox.showinfo("Succes", "Fiets is gemarkeerd als OK en beschikbaar.")
-        self.refresh_repairs_tree()
+
+        def done(_):
+            messagebox.showinfo("Succes", "Fiets is gemarkeerd als OK en beschikbaar.")
+            self.refresh_repairs_tree()
+
+        self.executor.submit(None, self.store.fix_bike_from_repair, repair_id, on_done=done, on_error=self._show_error)
 
     # ---------- sluiten ----------
 
     def on_close(self):
+        # nooit een half geladen dataset wegschrijven; lopende opdracht eerst afmaken
+        self._load_thread.join()
+        self.executor.close()
+        if self.profiler is not None:
+            print("Profielen:", self.profiler.close())
+        if self._load_error is not None:
+            self.audit.close()
+            self.destroy()
+            return
         try:
-            self.store.save_to_csv(".")
+            self.save_data()
         except Exception as e:
             print("Fout bij opslaan:", e)
+        self.audit.close()
         self.destroy()
 
+    def save_data(self) -> bool:
+        """
+        Opslaan naar de datamap. Wijzigingen van een andere instantie (bv. de
+        werkplaats) worden samengevoegd; bij echte conflicten beslist de gebruiker.
+        """
+        try:
+            with self.executor.lock:
+                self.store.save_to_csv(self.data_folder)
+        except CsvConflictError as e:
+            overwrite = messagebox.askyesno(
+                "Conflict bij opslaan",
+                f"{e}\n\nDeze rijen zijn intussen ook elders gewijzigd.\n"
+                "Jouw versie gebruiken voor deze rijen?",
+            )
+            if not overwrite:
+                return False
+            with self.executor.lock:
+                self.store.save_to_csv(self.data_folder, force=True)
+        self.export_changes()
+        return True
+
+    def export_changes(self):
+        """Alleen de nieuwe (eigen) wijzigingen achter changes.jsonl plakken, daarna het checkpoint bijwerken."""
+        filename = os.path.join(self.data_folder, self.CHANGES_FILE)
+        with self.executor.lock:
+            with open(filename, "a", encoding="utf-8") as f:
+                self._changes_exported = self.store.export_changes_jsonl(f, since_seq=self._changes_exported)
+            self.store.write_changes_checkpoint(self.data_folder, self._changes_exported)
+
 
 if __name__ == "__main__":
-    app = BikerApp()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="BIKER Light")
+    parser.add_argument("--profile", metavar="MAP", help="profiel per UI-actie in deze map (zie profiling.py)")
+    args = parser.parse_args()
+    app = BikerApp(profile_folder=args.profile)
     app.mainloop()
@@ -0,0 +1,136 @@
+"""
+Auditlog: wie heeft wat geboekt, gewijzigd, geannuleerd of gerepareerd.
+
+AuditLog abonneert zich op de wijzigingsfeed van DataStore, dus elke mutatie
+(create_reservation, delete_reservation, report_defect, fix_bike_from_repair,
+...) komt erin zonder dat die methoden zelf naar schijf schrijven. Per
+wijziging wordt alleen (actor, Change) in een ringbuffer gezet; een
+achtergrondthread zet de buffer elke `flush_interval` seconden om naar
+JSON-regels, schrijft ze weg (met fsync) en roteert het bestand op grootte.
+
+Bij een crash gaan hooguit de wijzigingen van de laatste `flush_interval`
+seconden verloren. Loopt de buffer vol (schijf hangt), dan vallen de oudste
+regels eruit; `dropped` telt hoeveel.
+
+Regelformaat (audit.jsonl):
+    {"time": "2025-01-03T10:15:00.123", "actor": "admin", "seq": 12,
+     "table": "reservations", "op": "delete", "key": 7, "row": {...}}
+"""
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from model import DataStore
+
+
+# één encoder hergebruiken; json.dumps met opties maakt er per aanroep een nieuwe
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class AuditLog:
+
+    def __init__(self, store: DataStore, filename: str, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 5, flush_interval: float = 0.2, capacity: int = 100_000,
+                 fsync: bool = True):
+        self.store = store
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.fsync = fsync
+        # gebruiker die de volgende wijzigingen doet; door de app gezet bij het inloggen
+        self.actor: str | None = None
+
+        self.written = 0
+        self.dropped = 0
+        self._buffer: deque = deque(maxlen=capacity)
+        self._file = None
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+        store.subscribe(self._on_change)
+
+    # --- hoofdthread: zo goedkoop mogelijk ---
+
+    def _on_change(self, change):
+        if change.origin != "local" or change.op == "reload":
+            return
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append((self.actor, change))
+
+    # --- achtergrondthread ---
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Buffer nu wegschrijven (ook aangeroepen door de achtergrondthread)."""
+        with self._write_lock:
+            lines = []
+            buffer = self._buffer
+            encode = _encode
+            while buffer:
+                actor, change = buffer.popleft()
+                event = {
+                    "time": datetime.fromtimestamp(change.ts).isoformat(timespec="milliseconds"),
+                    "actor": actor,
+                    "seq": change.seq,
+                    "table": change.table,
+                    "op": change.op,
+                    "key": change.key,
+                    "row": change.row,
+                }
+                lines.append(encode(event))
+            if not lines:
+                return
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+                self._file = open(self.filename, "a", encoding="utf-8")
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.written += len(lines)
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        """audit.jsonl -> audit.jsonl.1 -> ... -> audit.jsonl.<backups> (oudste vervalt)."""
+        self._file.close()
+        self._file = None
+        if self.backups <= 0:
+            os.remove(self.filename)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.filename}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.filename}.{i + 1}")
+        os.replace(self.filename, f"{self.filename}.1")
+
+    def close(self):
+        """Afmelden bij de feed, laatste regels wegschrijven en de thread stoppen."""
+        if self._closed:
+            return
+        self.store.unsubscribe(self._on_change)
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
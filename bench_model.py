@@ -0,0 +1,180 @@
+"""
+Benchmark van de modellaag (DataStore) op synthetische data van datagen.py.
+
+Per grootte worden gemeten: load_from_csv, save_to_csv, boeken (create +
+delete), reserveringen per klant opvragen en de reparatie-flow
+(report_defect + fix_bike_from_repair). Boeken wordt ook gemeten met het
+auditlog (audit.py) aan, om de extra kosten per operatie te zien. Resultaten kunnen als JSON-baseline
+worden opgeslagen en met een eerdere run vergeleken.
+
+Gebruik:
+    python bench_model.py --sizes 1000 10000 100000 --save bench_baseline.json
+    python bench_model.py --sizes 1000 10000 100000 --compare bench_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from audit import AuditLog
+from datagen import GeneratorConfig, generate
+from model import DataStore, BikeType, LocationType
+
+
+def _timed(func, repeat: int = 3) -> float:
+    """Mediaan van `repeat` metingen in seconden."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def bench_size(size: int, ops: int, seed: int, data_root: str) -> dict:
+    config = GeneratorConfig.for_size(size, seed=seed)
+    folder = os.path.join(data_root, f"data_{size}")
+    if not os.path.exists(os.path.join(folder, "reservations.csv")):
+        generate(folder, config)
+
+    results = {}
+    rng = random.Random(seed)
+
+    store = DataStore()
+    results["load_s"] = _timed(lambda: store.load_from_csv(folder))
+
+    # elke meting naar een nieuwe map: bij dezelfde map slaat save_to_csv ongewijzigde tabellen over
+    save_folders = []
+
+    def save():
+        out = tempfile.mkdtemp(prefix=f"save_{size}_", dir=data_root)
+        save_folders.append(out)
+        store.save_to_csv(out)
+
+    results["save_s"] = _timed(save)
+    for out in save_folders:
+        shutil.rmtree(out)
+
+    customer_ids = list(store.customers)
+    start = config.today + timedelta(days=30)
+    end = start + timedelta(days=2)
+
+    def booking():
+        for _ in range(ops):
+            bike_type = BikeType.STADSFIETS if rng.random() < 0.7 else BikeType.E_BIKE
+            try:
+                res = store.create_reservation(
+                    customer_id=rng.choice(customer_ids),
+                    bike_type=bike_type,
+                    start=start,
+                    end=end,
+                    location_type=LocationType.OPHALEN,
+                )
+            except ValueError:
+                continue
+            store.delete_reservation(res.reservation_id)
+
+    results["booking_ops_s"] = ops / _timed(booking)
+
+    with AuditLog(store, os.path.join(data_root, f"audit_{size}.jsonl")) as audit:
+        audit.actor = "bench"
+        results["booking_audit_ops_s"] = ops / _timed(booking)
+
+    def customer_queries():
+        for _ in range(ops):
+            store.get_reservations_for_customer(rng.choice(customer_ids), only_current_and_future=False)
+
+    results["customer_query_ops_s"] = ops / _timed(customer_queries)
+
+    reservation_ids = list(store.reservations)
+
+    def repair_flow():
+        for _ in range(ops):
+            repair = store.report_defect(rng.choice(reservation_ids), "Bench", "benchmark")
+            store.fix_bike_from_repair(repair.repair_id)
+            store.delete_repair(repair.repair_id)
+
+    results["repair_flow_ops_s"] = ops / _timed(repair_flow)
+    results["rows"] = store.row_counts()
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressies: tijden die langer of doorvoer die lager uitvalt dan `threshold` (fractie)."""
+    regressions = []
+    for size, metrics in current["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for key, value in metrics.items():
+            if key == "rows" or key not in base or not base[key]:
+                continue
+            ratio = value / base[key]
+            # bij *_s (seconden) is hoger slechter, bij *_ops_s lager
+            worse = ratio < 1 - threshold if key.endswith("_ops_s") else ratio > 1 + threshold
+            flag = "  <-- REGRESSIE" if worse else ""
+            print(f"{size:>10} {key:<22} {base[key]:>14.4f} -> {value:>14.4f} ({ratio:6.2f}x){flag}")
+            if worse:
+                regressions.append(f"{size}:{key}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: benchmark van de modellaag")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ops", type=int, default=1000, help="operaties per doorvoermeting")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="map voor gegenereerde datasets (hergebruikt tussen runs)")
+    parser.add_argument("--save", help="schrijf resultaten als JSON-baseline")
+    parser.add_argument("--compare", help="vergelijk met een eerder opgeslagen baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="toegestane achteruitgang (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    tmp = None
+    data_root = args.data_dir
+    if data_root is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_root = tmp.name
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "ops": args.ops,
+        "sizes": {},
+    }
+    try:
+        for size in args.sizes:
+            result = bench_size(size, args.ops, args.seed, data_root)
+            report["sizes"][str(size)] = result
+            print(
+                f"{size:>10} rijen: load {result['load_s']:.3f}s, save {result['save_s']:.3f}s, "
+                f"boeken {result['booking_ops_s']:.0f}/s (met audit {result['booking_audit_ops_s']:.0f}/s), klantquery {result['customer_query_ops_s']:.0f}/s, "
+                f"reparatie {result['repair_flow_ops_s']:.0f}/s"
+            )
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Regressies:", ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
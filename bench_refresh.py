@@ -0,0 +1,127 @@
+"""
+Meet de refresh-latency van de tabellen (Treeviews) met en zonder de
+display-rij-cache, standaard op 50k reserveringen uit datagen.py.
+
+Zonder display wordt alleen het opmaken van de rijen gemeten (koud = alles
+opmaken, warm = uit de cache); met display ook de volledige refresh van de
+beheerderstabel.
+
+Gebruik:
+    python bench_refresh.py --reservations 50000 --runs 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tkinter as tk
+from operator import attrgetter
+from types import SimpleNamespace
+
+from datagen import GeneratorConfig, generate
+from display import DisplayCache
+from model import DataStore
+
+
+def _median_ms(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def bench_formatting(store: DataStore, runs: int) -> dict[str, tuple[float, float]]:
+    """(koud, warm) in ms per weergave, zonder Tk."""
+    from app import BikerApp
+
+    # de opmaakfuncties van de app gebruiken alleen self.store
+    owner = SimpleNamespace(store=store)
+    cache = DisplayCache(store)
+    views = {
+        "reserveringen (beheerder)": (
+            cache.view("reservations", lambda r: BikerApp.admin_reservation_values(owner, r),
+                       depends="customers", depends_key=attrgetter("customer_id")),
+            store.get_all_reservations,
+        ),
+        "fietsen": (cache.view("bikes", lambda b: BikerApp.bike_values(owner, b)), lambda: list(store.bikes.values())),
+        "reparaties": (cache.view("repairs", lambda rep: BikerApp.repair_values(owner, rep)), store.get_all_repairs),
+    }
+    results = {}
+    for name, (rows, source) in views.items():
+        items = source()
+
+        def cold():
+            rows.clear()
+            for obj in items:
+                rows(obj)
+
+        def warm():
+            for obj in items:
+                rows(obj)
+
+        results[name] = (_median_ms(cold, runs), _median_ms(warm, runs))
+    cache.close()
+    return results
+
+
+def bench_treeview(folder: str, runs: int) -> tuple[float, float] | None:
+    """(koud, warm) in ms voor refresh_admin_reservations, of None zonder display."""
+    from app import BikerApp
+
+    try:
+        app = BikerApp(data_folder=folder)
+    except tk.TclError:
+        return None
+    while app._load_thread.is_alive():
+        app.update()
+    app.role_var.set("Beheerder")
+    app.username_entry.insert(0, "admin")
+    app.password_entry.insert(0, "admin")
+    app.handle_login()
+    while getattr(app, "admin_tree", None) is None:
+        app.update()
+
+    def cold():
+        app.admin_reservation_rows.clear()
+        app.refresh_admin_reservations()
+        app.executor.wait()
+        app.update_idletasks()
+
+    def warm():
+        app.refresh_admin_reservations()
+        app.executor.wait()
+        app.update_idletasks()
+
+    result = (_median_ms(cold, runs), _median_ms(warm, runs))
+    app.destroy()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: refresh-latency van de tabellen")
+    parser.add_argument("--reservations", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        generate(folder, GeneratorConfig.for_size(args.reservations, seed=args.seed))
+        store = DataStore()
+        store.load_from_csv(folder)
+
+        print(f"{'weergave':<28}{'koud (ms)':>12}{'warm (ms)':>12}")
+        for name, (cold, warm) in bench_formatting(store, args.runs).items():
+            print(f"{name:<28}{cold:>12.1f}{warm:>12.1f}")
+
+        if os.environ.get("DISPLAY") or os.name == "nt":
+            tree = bench_treeview(folder, args.runs)
+            if tree is not None:
+                print(f"{'Treeview beheerder (totaal)':<28}{tree[0]:>12.1f}{tree[1]:>12.1f}")
+        else:
+            print("Geen display: Treeview-refresh niet gemeten.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Doorvoer van de gesharde DataStore bij 1, 2, 4, ... worker-processen.
+
+Gemeten worden boekingen (create_reservations in batches, parallel over de
+shards) en klantqueries (get_reservations_for_customer, fan-out + merge),
+met een gewone DataStore in één proces als referentie.
+
+Gebruik:
+    python bench_sharding.py --reservations 200000 --workers 1 2 4 --ops 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from datagen import GeneratorConfig, generate
+from model import DataStore, BikeType, LocationType
+from sharding import ShardedDataStore, split_folder
+
+
+def _booking_requests(config: GeneratorConfig, ops: int, rng: random.Random) -> list[dict]:
+    start = config.today + timedelta(days=30)
+    return [
+        {
+            "customer_id": rng.randrange(1, config.customers + 1),
+            "bike_type": BikeType.STADSFIETS if rng.random() < 0.7 else BikeType.E_BIKE,
+            "start": start,
+            "end": start + timedelta(days=2),
+            "location_type": LocationType.OPHALEN,
+            "station_id": rng.randrange(1, config.stations + 1),
+        }
+        for _ in range(ops)
+    ]
+
+
+def bench_single(folder: str, requests: list[dict], customers: list[int]) -> tuple[float, float]:
+    store = DataStore()
+    store.load_from_csv(folder)
+    t0 = time.perf_counter()
+    for req in requests:
+        try:
+            store.create_reservation(**req)
+        except ValueError:
+            pass
+    booking = len(requests) / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for cid in customers:
+        store.get_reservations_for_customer(cid, only_current_and_future=False)
+    query = len(customers) / (time.perf_counter() - t0)
+    return booking, query
+
+
+def bench_sharded(folder: str, requests: list[dict], customers: list[int], batch: int) -> tuple[float, float]:
+    with ShardedDataStore(folder) as store:
+        store.row_counts()      # wachten tot alle shards geladen zijn
+        t0 = time.perf_counter()
+        for i in range(0, len(requests), batch):
+            store.create_reservations(requests[i:i + batch])
+        booking = len(requests) / (time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for cid in customers:
+            store.get_reservations_for_customer(cid, only_current_and_future=False)
+        query = len(customers) / (time.perf_counter() - t0)
+    return booking, query
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: doorvoer gesharde DataStore")
+    parser.add_argument("--reservations", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--ops", type=int, default=20000, help="aantal boekingen")
+    parser.add_argument("--queries", type=int, default=200, help="aantal klantqueries")
+    parser.add_argument("--batch", type=int, default=1000, help="boekingen per batch")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    config = GeneratorConfig.for_size(args.reservations, seed=args.seed)
+    # genoeg fietsen zodat boekingen niet op een lege vloot stuklopen
+    config.bikes = max(config.bikes, args.ops * 2)
+    config.stations = max(config.stations, 2 * max(args.workers))
+    requests = _booking_requests(config, args.ops, rng)
+    customers = [rng.randrange(1, config.customers + 1) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as root:
+        src = os.path.join(root, "data")
+        generate(src, config)
+
+        booking, query = bench_single(src, requests, customers)
+        print(f"{'opzet':<22}{'boekingen/s':>14}{'klantqueries/s':>16}")
+        print(f"{'1 proces (DataStore)':<22}{booking:>14.0f}{query:>16.1f}")
+
+        for workers in args.workers:
+            dest = os.path.join(root, f"sharded_{workers}")
+            split_folder(src, dest, workers, shard_by="station")
+            booking, query = bench_sharded(dest, requests, customers, args.batch)
+            print(f"{f'{workers} shard(s)':<22}{booking:>14.0f}{query:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
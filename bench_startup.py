@@ -0,0 +1,77 @@
+"""
+Meet de tijd van inloggen tot het eerste getekende hoofdscherm (login-to-first-paint)
+en tot de data van het eerste scherm geladen is.
+
+Gebruik (heeft een display nodig):
+    python bench_startup.py --folder . --role Beheerder --user admin --password admin --runs 5
+"""
+import argparse
+import statistics
+import time
+
+from app import BikerApp
+
+
+def measure_login(app: BikerApp, role: str, username: str, password: str, timeout: float = 30.0) -> dict:
+    app.role_var.set(role)
+    app.username_entry.delete(0, "end")
+    app.username_entry.insert(0, username)
+    app.password_entry.delete(0, "end")
+    app.password_entry.insert(0, password)
+
+    app.handle_login()
+    # authenticate loopt op de executor; pas na _finish_login is current_account gezet
+    app.executor.wait(timeout)
+    if app.current_account is None:
+        raise SystemExit("Inloggen mislukt, controleer rol/gebruikersnaam/wachtwoord.")
+
+    # event-loop draaien tot het eerste scherm getekend is en de data geladen is
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        app.update()
+        timings = app.startup_timings
+        if "login_to_first_paint" in timings and any(k.startswith("data_") for k in timings):
+            break
+    timings = dict(app.startup_timings)
+    app.logout()
+    app.update()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: login-to-first-paint meting")
+    parser.add_argument("--folder", default=".")
+    parser.add_argument("--role", default="Beheerder")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    app = BikerApp(data_folder=args.folder)
+    app.update()
+    login_screen = time.perf_counter() - t0
+    # wachten tot het laden op de achtergrond klaar is
+    while app._load_thread.is_alive():
+        app.update()
+    data_loaded = time.perf_counter() - t0
+
+    results: dict[str, list[float]] = {
+        "start_to_login_screen": [login_screen],
+        "start_to_data_loaded": [data_loaded],
+    }
+    for _ in range(args.runs):
+        for key, value in measure_login(app, args.role, args.user, args.password).items():
+            results.setdefault(key, []).append(value)
+    app.destroy()
+
+    print(f"{'meting':<28}{'min (ms)':>10}{'mediaan (ms)':>14}{'max (ms)':>10}")
+    for key, values in sorted(results.items()):
+        print(
+            f"{key:<28}{min(values) * 1000:>10.1f}"
+            f"{statistics.median(values) * 1000:>14.1f}{max(values) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
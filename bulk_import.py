@@ -0,0 +1,279 @@
+"""
+Bulk-import van klanten en fietsen (onboarding van een nieuwe vloot of een
+klantenlijst van een partner).
+
+Het invoerbestand wordt in blokken gelezen; elk blok wordt in een procespool
+gevalideerd en genormaliseerd (enum-namen, IBAN-controlegetal, e-mail). In het
+hoofdproces worden dubbele e-mailadressen en onbekende stations afgevangen
+en gaan de goedgekeurde rijen per blok met DataStore.bulk_insert de store in
+(de ids lopen over de blokken heen aaneengesloten door). Er zijn hooguit
+twee blokken per worker onderweg, dus het geheugen hangt af van de blokgrootte,
+niet van het bestand. Afgekeurde rijen komen met regelnummer en reden in een
+CSV-rapport.
+
+Invoerkolommen:
+    klanten: name, email, iban, delivery_address
+    fietsen: bike_type, status, station_id      (status en station_id optioneel)
+
+Gebruik:
+    python bulk_import.py . klanten partner.csv --afgekeurd afgekeurd.csv
+    python bulk_import.py . fietsen vloot.csv
+"""
+import argparse
+import csv
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+
+from model import DataStore, Customer, Bike, BikeType, BikeStatus
+
+
+CHUNK_SIZE = 50_000
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+IBAN_RE = re.compile(r"^[A-Z]{2}\d{2}[A-Z0-9]{10,30}$")
+
+CUSTOMER_COLUMNS = ("name", "email", "iban", "delivery_address")
+BIKE_COLUMNS = ("bike_type", "status", "station_id")
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    first_id: int | None = None
+    last_id: int | None = None
+    seconds: float = 0.0
+
+
+# --- normalisatie (draait in de worker-processen) ---
+
+def normalize_iban(value: str) -> str:
+    """IBAN zonder spaties, in hoofdletters; ValueError als het controlegetal niet klopt."""
+    iban = value.replace(" ", "").upper()
+    if not IBAN_RE.match(iban):
+        raise ValueError("ongeldig IBAN-formaat")
+    # landcode + controlegetal naar achteren, letters -> cijfers (A=10 .. Z=35)
+    digits = "".join(str(int(ch, 36)) for ch in iban[4:] + iban[:4])
+    if int(digits) % 97 != 1:
+        raise ValueError("IBAN-controlegetal klopt niet")
+    return iban
+
+
+def _enum_lookup(enum_cls) -> dict[str, object]:
+    """Naam én weergavewaarde (hoofdletterongevoelig) -> enum-lid."""
+    lookup = {}
+    for member in enum_cls:
+        lookup[member.name.lower()] = member
+        lookup[member.value.lower()] = member
+    return lookup
+
+
+BIKE_TYPES = _enum_lookup(BikeType)
+BIKE_STATUSES = _enum_lookup(BikeStatus)
+
+
+def validate_customers(chunk: list[tuple[int, dict]]):
+    """-> (goedgekeurd [(regel, name, email, iban, adres)], afgekeurd [(regel, reden, rij)])"""
+    valid, rejected = [], []
+    for line, row in chunk:
+        name = (row.get("name") or "").strip()
+        email = (row.get("email") or "").strip().lower()
+        iban = (row.get("iban") or "").strip()
+        address = " ".join((row.get("delivery_address") or "").split())
+        if not name:
+            rejected.append((line, "naam ontbreekt", row))
+            continue
+        if email and not EMAIL_RE.match(email):
+            rejected.append((line, "ongeldig e-mailadres", row))
+            continue
+        if iban:
+            try:
+                iban = normalize_iban(iban)
+            except ValueError as e:
+                rejected.append((line, str(e), row))
+                continue
+        valid.append((line, " ".join(name.split()), email, iban, address))
+    return valid, rejected
+
+
+def validate_bikes(chunk: list[tuple[int, dict]]):
+    """-> (goedgekeurd [(regel, type, status, station_id)], afgekeurd [(regel, reden, rij)])"""
+    valid, rejected = [], []
+    for line, row in chunk:
+        bike_type = BIKE_TYPES.get((row.get("bike_type") or "").strip().lower())
+        if bike_type is None:
+            rejected.append((line, "onbekend fietstype", row))
+            continue
+        status_text = (row.get("status") or "").strip().lower()
+        status = BIKE_STATUSES.get(status_text) if status_text else BikeStatus.OK
+        if status is None:
+            rejected.append((line, "onbekende status", row))
+            continue
+        station_text = (row.get("station_id") or "").strip()
+        if station_text and not station_text.isdigit():
+            rejected.append((line, "ongeldig station_id", row))
+            continue
+        valid.append((line, bike_type, status, int(station_text) if station_text else None))
+    return valid, rejected
+
+
+# --- inlezen in blokken ---
+
+def _chunks(filename: str, chunk_size: int):
+    """(regelnummer, rij)-blokken; regel 1 is de kop."""
+    with open(filename, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        rows = ((reader.line_num, row) for row in reader)
+        while chunk := list(islice(rows, chunk_size)):
+            yield chunk
+
+
+def _validated(filename: str, validate, chunk_size: int, workers: int | None):
+    """Gevalideerde blokken, in volgorde; met workers > 1 parallel in een procespool."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for chunk in _chunks(filename, chunk_size):
+            yield validate(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # niet map(): die dient alle blokken meteen in (heel bestand in het geheugen);
+        # een begrensd venster houdt de volgorde vast en leest alleen vooruit wat nodig is
+        window = deque()
+        for chunk in _chunks(filename, chunk_size):
+            window.append(pool.submit(validate, chunk))
+            if len(window) >= 2 * workers:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+class _RejectWriter:
+    """Rapport van afgekeurde rijen; het bestand wordt pas bij de eerste afkeur aangemaakt."""
+
+    def __init__(self, filename: str | None, columns):
+        self.filename = filename
+        self.columns = list(columns)
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, line: int, reason: str, row: dict):
+        self.count += 1
+        if self.filename is None:
+            return
+        if self._writer is None:
+            self._file = open(self.filename, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["regel", "reden"] + self.columns)
+        self._writer.writerow([line, reason] + [row.get(col, "") for col in self.columns])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+# --- import ---
+
+def import_customers(store: DataStore, filename: str, rejected_file: str | None = None,
+                     chunk_size: int = CHUNK_SIZE, workers: int | None = None) -> ImportResult:
+    t0 = time.perf_counter()
+    rejects = _RejectWriter(rejected_file, CUSTOMER_COLUMNS)
+    seen_emails = {c.email.lower() for c in store.customers.values() if c.email}
+    first = store.next_customer_id
+    imported = 0
+    try:
+        for valid, rejected in _validated(filename, validate_customers, chunk_size, workers):
+            for line, reason, row in rejected:
+                rejects.write(line, reason, row)
+            customers = []
+            for line, name, email, iban, address in valid:
+                if email:
+                    if email in seen_emails:
+                        rejects.write(line, "dubbel e-mailadres", {
+                            "name": name, "email": email, "iban": iban, "delivery_address": address,
+                        })
+                        continue
+                    seen_emails.add(email)
+                customers.append(Customer(
+                    customer_id=first + imported + len(customers),
+                    name=name, email=email, iban=iban, delivery_address=address,
+                ))
+            store.bulk_insert("customers", customers)
+            imported += len(customers)
+    finally:
+        rejects.close()
+
+    return ImportResult(
+        imported=imported,
+        rejected=rejects.count,
+        first_id=first if imported else None,
+        last_id=first + imported - 1 if imported else None,
+        seconds=time.perf_counter() - t0,
+    )
+
+
+def import_bikes(store: DataStore, filename: str, rejected_file: str | None = None,
+                 chunk_size: int = CHUNK_SIZE, workers: int | None = None) -> ImportResult:
+    t0 = time.perf_counter()
+    rejects = _RejectWriter(rejected_file, BIKE_COLUMNS)
+    first = store.next_bike_id
+    imported = 0
+    try:
+        for valid, rejected in _validated(filename, validate_bikes, chunk_size, workers):
+            for line, reason, row in rejected:
+                rejects.write(line, reason, row)
+            bikes = []
+            for line, bike_type, status, station_id in valid:
+                if station_id is not None and station_id not in store.stations:
+                    rejects.write(line, "onbekend station", {
+                        "bike_type": bike_type.name, "status": status.name, "station_id": station_id,
+                    })
+                    continue
+                bikes.append(Bike(
+                    bike_id=first + imported + len(bikes),
+                    bike_type=bike_type, status=status, available=True, station_id=station_id,
+                ))
+            store.bulk_insert("bikes", bikes)
+            imported += len(bikes)
+    finally:
+        rejects.close()
+
+    return ImportResult(
+        imported=imported,
+        rejected=rejects.count,
+        first_id=first if imported else None,
+        last_id=first + imported - 1 if imported else None,
+        seconds=time.perf_counter() - t0,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: bulk-import van klanten of fietsen")
+    parser.add_argument("folder", help="datamap van BIKER (wordt na de import opgeslagen)")
+    parser.add_argument("soort", choices=("klanten", "fietsen"))
+    parser.add_argument("bestand")
+    parser.add_argument("--afgekeurd", help="CSV-rapport met afgekeurde rijen")
+    parser.add_argument("--workers", type=int, help="aantal processen (standaard: aantal cores)")
+    parser.add_argument("--blok", type=int, default=CHUNK_SIZE, help="rijen per blok")
+    args = parser.parse_args()
+
+    store = DataStore()
+    store.load_from_csv(args.folder)
+    importer = import_customers if args.soort == "klanten" else import_bikes
+    result = importer(store, args.bestand, args.afgekeurd, args.blok, args.workers)
+    t0 = time.perf_counter()
+    store.save_to_csv(args.folder)
+    print(
+        f"{result.imported} {args.soort} geïmporteerd (id {result.first_id}..{result.last_id}), "
+        f"{result.rejected} afgekeurd, import {result.seconds:.1f}s, opslaan {time.perf_counter() - t0:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
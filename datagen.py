@@ -0,0 +1,230 @@
+"""
+Deterministische generator van synthetische BIKER-data (klanten, vloot,
+reserveringen, reparaties en accounts) in het CSV-mapformaat van DataStore.
+
+Alles wordt rij voor rij weggeschreven, dus ook 10M reserveringen passen
+zonder alles in het geheugen te houden.
+
+Gebruik:
+    python datagen.py data_100k --reservations 100000 --seed 42
+"""
+import argparse
+import csv
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from model import DataStore, BikeType, BikeStatus, LocationType, ReservationStatus
+
+
+FIRST_NAMES = [
+    "Anna", "Bram", "Daan", "Dima", "Emma", "Fleur", "Jan", "Julia", "Kees", "Lars",
+    "Lisa", "Milan", "Noah", "Olga", "Piet", "Sanne", "Sem", "Sophie", "Tess", "Yara",
+]
+LAST_NAMES = [
+    "de Vries", "Jansen", "de Jong", "Bakker", "Visser", "Smit", "Meijer", "de Boer",
+    "Mulder", "de Groot", "Bos", "Vos", "Peters", "Hendriks", "van Dijk", "Dekker",
+]
+STREETS = [
+    "Laan van Decima", "Kerkstraat", "Dorpsstraat", "Stationsweg", "Molenweg",
+    "Schoolstraat", "Julianalaan", "Parallelweg", "Beatrixstraat", "Kanaalweg",
+]
+CITIES = ["Den Haag", "Delft", "Rijswijk", "Leiden", "Zoetermeer", "Voorburg"]
+DEFECTS = [
+    ("Lekke band", "Band is lek."),
+    ("Ketting", "Ketting loopt eraf."),
+    ("Remmen", "Remmen werken slecht."),
+    ("Verlichting", "Achterlicht doet het niet."),
+    ("Accu", "Accu laadt niet op."),
+]
+
+
+@dataclass
+class GeneratorConfig:
+    customers: int = 1000
+    bikes: int = 100
+    stations: int = 4
+    reservations: int = 1000
+    repairs: int = 50
+    accounts: int = 100          # huurder-accounts (plus admin en monteur)
+    seed: int = 42
+    today: datetime = datetime(2025, 1, 1)
+
+    @classmethod
+    def for_size(cls, reservations: int, seed: int = 42) -> "GeneratorConfig":
+        """Realistische verhoudingen bij een gegeven aantal reserveringen."""
+        return cls(
+            customers=max(10, reservations // 4),
+            bikes=max(10, reservations // 50),
+            stations=max(1, min(50, reservations // 25000 + 3)),
+            reservations=reservations,
+            repairs=max(1, reservations // 40),
+            accounts=min(1000, max(10, reservations // 4)),
+            seed=seed,
+        )
+
+
+def make_iban(rng: random.Random) -> str:
+    """Geldig NL-IBAN (mod-97 controlegetal)."""
+    bank = rng.choice(["ABNA", "INGB", "RABO", "TRIO", "SNSB"])
+    account = f"{rng.randrange(10 ** 10):010d}"
+    # letters -> cijfers (A=10 .. Z=35), landcode + "00" achteraan
+    digits = "".join(str(int(ch, 36)) for ch in bank + account + "NL00")
+    check = 98 - int(digits) % 97
+    return f"NL{check:02d}{bank}{account}"
+
+
+def make_address(rng: random.Random) -> str:
+    postcode = f"{rng.randrange(1000, 10000)} {chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}"
+    return f"{rng.choice(STREETS)} {rng.randrange(1, 300)}, {postcode} {rng.choice(CITIES)}"
+
+
+def generate(folder: str, config: GeneratorConfig) -> dict[str, int]:
+    """Schrijf een complete dataset naar `folder`; geeft het aantal rijen per tabel."""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(config.seed)
+    fmt = DataStore.DATETIME_FORMAT
+
+    def writer(name: str, header: list[str]):
+        f = open(os.path.join(folder, name), "w", newline="", encoding="utf-8")
+        w = csv.writer(f)
+        w.writerow(header)
+        return f, w
+
+    # --- klanten ---
+    f, w = writer("customers.csv", ["customer_id", "name", "email", "iban", "delivery_address"])
+    with f:
+        for cid in range(1, config.customers + 1):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            email = f"{first}.{last.replace(' ', '')}.{cid}@example.com".lower()
+            iban = make_iban(rng) if rng.random() < 0.8 else ""
+            address = make_address(rng) if rng.random() < 0.6 else ""
+            w.writerow([cid, f"{first} {last}", email, iban, address])
+
+    # --- fietsen (70% stadsfiets, 30% e-bike, ~3% defect) ---
+    bike_types = []
+    bike_status = []
+    for _ in range(config.bikes):
+        bike_types.append(BikeType.STADSFIETS if rng.random() < 0.7 else BikeType.E_BIKE)
+        bike_status.append(BikeStatus.DEFECT if rng.random() < 0.03 else BikeStatus.OK)
+
+    # --- reserveringen: per fiets een tijdlijn zonder overlap ---
+    first_start = config.today - timedelta(days=365)
+    cursor = [first_start + timedelta(hours=rng.randrange(0, 24 * 14)) for _ in range(config.bikes)]
+    active = [False] * config.bikes
+    res_bikes = []      # bike_id per reservering, voor de reparaties
+
+    f, w = writer("reservations.csv", [
+        "reservation_id", "customer_id", "bike_id", "bike_type", "start", "end",
+        "location_type", "address", "status", "total_price",
+    ])
+    with f:
+        for rid in range(1, config.reservations + 1):
+            b = rng.randrange(config.bikes)
+            start = cursor[b] + timedelta(hours=rng.randrange(2, 24 * 5))
+            days = min(1 + int(rng.expovariate(1 / 3)), 21)
+            end = start + timedelta(days=days, hours=rng.choice([0, 0, 2, 4]))
+            cursor[b] = end
+
+            if rng.random() < 0.03:
+                status = ReservationStatus.GEANNULEERD
+            elif end < config.today:
+                status = ReservationStatus.AFGEROND
+            elif start <= config.today:
+                status = ReservationStatus.LOPEND
+            else:
+                status = ReservationStatus.GEPLAND
+            if status in (ReservationStatus.GEPLAND, ReservationStatus.LOPEND):
+                active[b] = True
+
+            location = LocationType.BEZORGEN if rng.random() < 0.25 else LocationType.OPHALEN
+            address = make_address(rng) if location == LocationType.BEZORGEN else ""
+            bike_type = bike_types[b]
+            price = round(DataStore.BASE_PRICE_PER_DAY[bike_type] * max((end - start).days, 1), 2)
+
+            w.writerow([
+                rid,
+                rng.randrange(1, config.customers + 1),
+                b + 1,
+                bike_type.name,
+                start.strftime(fmt),
+                end.strftime(fmt),
+                location.name,
+                address,
+                status.name,
+                price,
+            ])
+            if len(res_bikes) < 1_000_000:
+                res_bikes.append((rid, b + 1))
+
+    # --- reparaties ---
+    f, w = writer("repairs.csv", ["repair_id", "reservation_id", "bike_id", "defect_type", "description"])
+    with f:
+        for rep_id in range(1, config.repairs + 1):
+            if res_bikes:
+                rid, bike_id = rng.choice(res_bikes)
+            else:
+                rid, bike_id = 0, rng.randrange(1, config.bikes + 1)
+            defect_type, description = rng.choice(DEFECTS)
+            w.writerow([rep_id, rid, bike_id, defect_type, description])
+
+    # --- stations (ophaalpunten) ---
+    f, w = writer("stations.csv", ["station_id", "name", "address", "capacity"])
+    with f:
+        per_station = -(-config.bikes // config.stations)
+        for sid in range(1, config.stations + 1):
+            city = CITIES[(sid - 1) % len(CITIES)]
+            w.writerow([sid, f"BIKER {city} {sid}", f"Stationsplein {sid}, {city}", per_station + 5])
+
+    # --- vloot wegschrijven nu beschikbaarheid bekend is ---
+    f, w = writer("bikes.csv", ["bike_id", "bike_type", "status", "available", "station_id"])
+    with f:
+        for b in range(config.bikes):
+            available = bike_status[b] == BikeStatus.OK and not active[b]
+            w.writerow([b + 1, bike_types[b].name, bike_status[b].name, int(available), b % config.stations + 1])
+
+    # --- accounts ---
+    f, w = writer("accounts.csv", ["username", "password", "role", "customer_id"])
+    with f:
+        w.writerow(["admin", "admin", "BEHEERDER", ""])
+        w.writerow(["monteur", "monteur", "MONTEUR", ""])
+        for cid in range(1, min(config.accounts, config.customers) + 1):
+            w.writerow([f"klant{cid}", "test", "HUURDER", cid])
+
+    return {
+        "customers": config.customers,
+        "stations": config.stations,
+        "bikes": config.bikes,
+        "reservations": config.reservations,
+        "repairs": config.repairs,
+        "accounts": min(config.accounts, config.customers) + 2,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genereer synthetische BIKER-data (CSV-map)")
+    parser.add_argument("folder")
+    parser.add_argument("--reservations", type=int, default=1000)
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--bikes", type=int)
+    parser.add_argument("--stations", type=int)
+    parser.add_argument("--repairs", type=int)
+    parser.add_argument("--accounts", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", default="2025-01-01", help="referentiedatum (YYYY-MM-DD) voor statussen")
+    args = parser.parse_args()
+
+    config = GeneratorConfig.for_size(args.reservations, seed=args.seed)
+    config.today = datetime.strptime(args.today, "%Y-%m-%d")
+    for name in ("customers", "bikes", "stations", "repairs", "accounts"):
+        if getattr(args, name) is not None:
+            setattr(config, name, getattr(args, name))
+
+    counts = generate(args.folder, config)
+    print(", ".join(f"{table}: {n}" for table, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
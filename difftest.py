@@ -0,0 +1,503 @@
+"""
+Differentiële test: DataStore (indexen, heaps, feed) tegen een eenvoudige
+referentie-implementatie die alles met scans doet.
+
+Willekeurige reeksen operaties (add_customer, add_station, add_bike,
+create_reservation, update_reservation, delete_reservation, report_defect,
+fix_bike_from_repair, opslaan + opnieuw laden) worden op beide uitgevoerd. Na elke operatie worden
+de resultaten vergeleken, om de zoveel operaties ook de volledige toestand en
+een paar afgeleide queries (beschikbare fiets, reserveringen per klant/dag).
+
+Operaties verwijzen niet naar ids maar naar "de k-de bestaande rij", zodat
+elke deelreeks weer uitvoerbaar is. Bij een verschil wordt de reeks met
+delta debugging (ddmin) verkleind tot een minimale reproductie.
+
+Gebruik:
+    python difftest.py --ops 1000000 --seed 1
+    python difftest.py --ops 2000000 --workers 4
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+from model import (
+    DataStore, BikeType, BikeStatus, LocationType, ReservationStatus,
+    Customer, Station, Bike, Reservation, Repair,
+)
+
+
+# ===== REFERENTIE =====
+
+class ReferenceStore:
+    """
+    Zelfde semantiek als DataStore voor de geteste operaties, zonder indexen:
+    elke keuze is een scan over de tabel.
+    """
+
+    def __init__(self):
+        self.customers: dict[int, Customer] = {}
+        self.stations: dict[int, Station] = {}
+        self.bikes: dict[int, Bike] = {}
+        self.reservations: dict[int, Reservation] = {}
+        self.repairs: dict[int, Repair] = {}
+        self.next_ids = {"customers": 1, "stations": 1, "bikes": 1, "reservations": 1, "repairs": 1}
+
+    def _next(self, table: str) -> int:
+        value = self.next_ids[table]
+        self.next_ids[table] += 1
+        return value
+
+    def add_customer(self, name: str) -> Customer:
+        customer = Customer(self._next("customers"), name)
+        self.customers[customer.customer_id] = customer
+        return customer
+
+    def add_station(self, name: str) -> Station:
+        station = Station(self._next("stations"), name)
+        self.stations[station.station_id] = station
+        return station
+
+    def add_bike(self, bike_type: BikeType, station_id: int | None = None) -> Bike:
+        if station_id is not None and station_id not in self.stations:
+            raise ValueError
+        bike = Bike(self._next("bikes"), bike_type, station_id=station_id)
+        self.bikes[bike.bike_id] = bike
+        return bike
+
+    def get_available_bike(self, bike_type: BikeType, station_id: int | None = None):
+        candidates = [
+            b for b in self.bikes.values()
+            if b.bike_type == bike_type and b.status == BikeStatus.OK and b.available
+            and (station_id is None or b.station_id == station_id)
+        ]
+        return min(candidates, key=lambda b: b.bike_id, default=None)
+
+    def create_reservation(self, customer_id, bike_type, start, end, location_type,
+                           address="", station_id=None) -> Reservation:
+        if customer_id not in self.customers:
+            raise ValueError
+        if station_id is not None and station_id not in self.stations:
+            raise ValueError
+        bike = self.get_available_bike(bike_type, station_id)
+        if bike is None:
+            raise ValueError
+        days = max((end - start).days, 1)
+        reservation = Reservation(
+            self._next("reservations"), customer_id, bike.bike_id, bike_type, start, end, location_type,
+            address=address if location_type == LocationType.BEZORGEN else "",
+            total_price=round(DataStore.BASE_PRICE_PER_DAY[bike_type] * days, 2),
+        )
+        self.reservations[reservation.reservation_id] = reservation
+        bike.available = False
+        return reservation
+
+    def _busy(self, bike_id: int, now: datetime) -> bool:
+        inactive = (ReservationStatus.GEANNULEERD, ReservationStatus.AFGEROND)
+        return any(
+            r.bike_id == bike_id and r.status not in inactive and r.end > now
+            for r in self.reservations.values()
+        )
+
+    def _refresh(self, bike_id: int):
+        bike = self.bikes.get(bike_id)
+        if bike is not None:
+            bike.available = bike.status == BikeStatus.OK and not self._busy(bike_id, datetime.now())
+
+    def _is_free(self, bike_id: int, start: datetime, end: datetime, ignore_id: int) -> bool:
+        return not any(
+            r.bike_id == bike_id and rid != ignore_id and r.status != ReservationStatus.GEANNULEERD
+            and r.start < end and r.end > start
+            for rid, r in self.reservations.items()
+        )
+
+    def update_reservation(self, reservation_id: int, **changes) -> Reservation:
+        if reservation_id not in self.reservations:
+            raise ValueError
+        r = self.reservations[reservation_id]
+        start, end = changes.get("start", r.start), changes.get("end", r.end)
+        bike_type = changes.get("bike_type", r.bike_type)
+        location_type = changes.get("location_type", r.location_type)
+        status = changes.get("status", r.status)
+        if end <= start:
+            raise ValueError
+        bike_id = r.bike_id
+        if status != ReservationStatus.GEANNULEERD:
+            bike = self.bikes.get(bike_id)
+            same_bike_ok = bike_type == r.bike_type and bike is not None and bike.status == BikeStatus.OK
+            # de hele nieuwe periode (de eigen boeking genegeerd); zonder overlap gelijk aan
+            # de DataStore, die alleen de nieuwe stukken controleert
+            if not same_bike_ok or not self._is_free(bike_id, start, end, reservation_id):
+                free = [
+                    b for b in self.bikes.values()
+                    if b.bike_type == bike_type and b.status == BikeStatus.OK
+                    and self._is_free(b.bike_id, start, end, reservation_id)
+                ]
+                if not free:
+                    raise ValueError
+                bike_id = min(b.bike_id for b in free)
+        old_bike_id = r.bike_id
+        days = max((end - start).days, 1)
+        r.start, r.end, r.bike_type, r.location_type, r.status, r.bike_id = (
+            start, end, bike_type, location_type, status, bike_id)
+        r.address = changes.get("address", r.address) if location_type == LocationType.BEZORGEN else ""
+        r.total_price = round(DataStore.BASE_PRICE_PER_DAY[bike_type] * days, 2)
+        self._refresh(bike_id)
+        self._refresh(old_bike_id)
+        return r
+
+    def delete_reservation(self, reservation_id: int):
+        if reservation_id not in self.reservations:
+            raise ValueError
+        r = self.reservations.pop(reservation_id)
+        self._refresh(r.bike_id)
+
+    def report_defect(self, reservation_id: int, defect_type: str, description: str) -> Repair:
+        if reservation_id not in self.reservations:
+            raise ValueError
+        r = self.reservations[reservation_id]
+        repair = Repair(self._next("repairs"), reservation_id, r.bike_id, defect_type, description)
+        self.repairs[repair.repair_id] = repair
+        bike = self.bikes[r.bike_id]
+        bike.status = BikeStatus.DEFECT
+        bike.available = False
+        return repair
+
+    def fix_bike_from_repair(self, repair_id: int):
+        if repair_id not in self.repairs:
+            raise ValueError
+        bike = self.bikes.get(self.repairs[repair_id].bike_id)
+        if bike is None:
+            raise ValueError
+        bike.status = BikeStatus.OK
+        self._refresh(bike.bike_id)
+
+    def reload(self, now: datetime):
+        """Wat opslaan + laden doet: ids verder vanaf het hoogste id, beschikbaarheid herberekend."""
+        for table in self.next_ids:
+            self.next_ids[table] = max(getattr(self, table), default=0) + 1
+        for bike in self.bikes.values():
+            bike.available = bike.status == BikeStatus.OK and not self._busy(bike.bike_id, now)
+
+    def reservations_for_customer(self, customer_id: int) -> list[int]:
+        return sorted(rid for rid, r in self.reservations.items() if r.customer_id == customer_id)
+
+    def reservations_starting_on(self, day) -> list[int]:
+        return sorted(
+            rid for rid, r in self.reservations.items()
+            if r.start.date() == day and r.status != ReservationStatus.GEANNULEERD
+        )
+
+
+# ===== OPERATIES =====
+
+# tijdstippen van 2000 t/m 2099 op hele uren, zodat er zowel afgelopen als
+# toekomstige boekingen zijn (van belang bij herladen) en CSV ze exact bewaart
+EPOCH = datetime(2000, 1, 1)
+HOURS = 100 * 365 * 24
+NAMES = ("Anna", "Bram de Vries", 'Cor "C", jr.', "Dünya", "Eva\tE")
+
+
+def random_ops(rng: random.Random, length: int) -> list[tuple]:
+    ops = []
+    for _ in range(length):
+        x = rng.random()
+        if x < 0.10:
+            ops.append(("add_customer", rng.randrange(len(NAMES))))
+        elif x < 0.12:
+            ops.append(("add_station",))
+        elif x < 0.25:
+            ops.append(("add_bike", rng.randrange(len(BikeType)), rng.randrange(4)))
+        elif x < 0.55:
+            # ook korte en "verkeerd om" ingevoerde periodes (prijs = minimaal 1 dag)
+            ops.append(("create_reservation", rng.randrange(1000), rng.randrange(len(BikeType)),
+                        rng.randrange(HOURS), rng.randrange(-24, 24 * 14), rng.randrange(2), rng.randrange(4)))
+        elif x < 0.65:
+            # verschuiven/verlengen, ander type, andere status, ophalen/bezorgen of
+            # verschuiven tot tegen een andere boeking van dezelfde fiets
+            ops.append(("update_reservation", rng.randrange(1000), rng.randrange(5), rng.randrange(-72, 72),
+                        rng.randrange(-2, 24 * 7), rng.randrange(len(BikeType)), rng.randrange(len(ReservationStatus)),
+                        rng.randrange(2)))
+        elif x < 0.80:
+            ops.append(("delete_reservation", rng.randrange(1000)))
+        elif x < 0.90:
+            ops.append(("report_defect", rng.randrange(1000)))
+        elif x < 0.995:
+            ops.append(("fix_bike_from_repair", rng.randrange(1000)))
+        else:
+            ops.append(("save_load",))
+    return ops
+
+
+def _pick(table: dict, k: int):
+    """k-de bestaande sleutel (modulo), of None als de tabel leeg is."""
+    if not table:
+        return None
+    keys = sorted(table)
+    return keys[k % len(keys)]
+
+
+def _station(table: dict, k: int):
+    """k == 0: geen station, anders het (k-1)-de bestaande station."""
+    if k == 0 or not table:
+        return None
+    return _pick(table, k - 1)
+
+
+class Runner:
+    """Voert dezelfde operaties uit op DataStore en ReferenceStore en vergelijkt."""
+
+    def __init__(self, store_class=DataStore, check_every: int = 50, folder: str | None = None):
+        self.store_class = store_class
+        self.check_every = check_every
+        self.folder = folder
+        self.store = store_class()
+        self.ref = ReferenceStore()
+
+    @staticmethod
+    def _call(func, *args):
+        try:
+            return True, func(*args)
+        except ValueError:
+            return False, None
+
+    def apply(self, op: tuple) -> str | None:
+        """Eén operatie; beschrijving van het verschil, of None."""
+        name = op[0]
+        store, ref = self.store, self.ref
+        if name == "add_customer":
+            a = store.add_customer(NAMES[op[1]])
+            b = ref.add_customer(NAMES[op[1]])
+            return None if a.customer_id == b.customer_id else f"klant-id {a.customer_id} != {b.customer_id}"
+        if name == "add_station":
+            a, b = store.add_station("Station"), ref.add_station("Station")
+            return None if a.station_id == b.station_id else f"station-id {a.station_id} != {b.station_id}"
+        if name == "add_bike":
+            bike_type = list(BikeType)[op[1]]
+            station_id = _station(ref.stations, op[2])
+            ok_a, a = self._call(store.add_bike, bike_type, BikeStatus.OK, station_id)
+            ok_b, b = self._call(ref.add_bike, bike_type, station_id)
+            if ok_a != ok_b or (ok_a and a.bike_id != b.bike_id):
+                return f"add_bike: {a} != {b}"
+            return None
+        if name == "create_reservation":
+            _, k, type_index, hour, duration, loc_index, station_k = op
+            customer_id = _pick(ref.customers, k) or 1
+            start = EPOCH + timedelta(hours=hour)
+            end = start + timedelta(hours=duration)
+            location = (LocationType.OPHALEN, LocationType.BEZORGEN)[loc_index]
+            args = (customer_id, list(BikeType)[type_index], start, end, location, "Kerkstraat 1",
+                    _station(ref.stations, station_k))
+            ok_a, a = self._call(store.create_reservation, *args)
+            ok_b, b = self._call(ref.create_reservation, *args)
+            if ok_a != ok_b:
+                return f"create_reservation: gelukt {ok_a} != {ok_b}"
+            if ok_a and (a.reservation_id, a.bike_id, a.total_price, a.address) != (
+                    b.reservation_id, b.bike_id, b.total_price, b.address):
+                return f"create_reservation: {a} != {b}"
+            return None
+        if name == "update_reservation":
+            _, k, what, shift, duration, type_index, status_index, loc_index = op
+            rid = _pick(ref.reservations, k)
+            if rid is None:
+                return None
+            r = ref.reservations[rid]
+            if what == 0:
+                start = r.start + timedelta(hours=shift)
+                changes = {"start": start, "end": start + timedelta(hours=duration)}
+            elif what == 1:
+                changes = {"bike_type": list(BikeType)[type_index]}
+            elif what == 2:
+                changes = {"status": list(ReservationStatus)[status_index]}
+            elif what == 3:
+                changes = {"location_type": (LocationType.OPHALEN, LocationType.BEZORGEN)[loc_index],
+                           "address": "Dorpsstraat 2"}
+            else:
+                others = sorted(o.start for o in ref.reservations.values() if o.bike_id == r.bike_id and o is not r)
+                start = (others[duration % len(others)] if others else r.start) + timedelta(hours=shift)
+                changes = {"start": start, "end": start + timedelta(hours=duration)}
+            ok_a, a = self._call(lambda: store.update_reservation(rid, **changes))
+            ok_b, b = self._call(lambda: ref.update_reservation(rid, **changes))
+            if ok_a != ok_b:
+                return f"update_reservation #{rid} {changes}: gelukt {ok_a} != {ok_b}"
+            if ok_a and (a.bike_id, a.total_price, a.address) != (b.bike_id, b.total_price, b.address):
+                return f"update_reservation #{rid}: {a} != {b}"
+            return None
+        if name in ("delete_reservation", "report_defect"):
+            rid = _pick(ref.reservations, op[1])
+            if rid is None:
+                return None
+            if name == "delete_reservation":
+                ok_a, _ = self._call(store.delete_reservation, rid)
+                ok_b, _ = self._call(ref.delete_reservation, rid)
+                return None if ok_a == ok_b else f"delete_reservation #{rid}: {ok_a} != {ok_b}"
+            ok_a, a = self._call(store.report_defect, rid, "band", "lek")
+            ok_b, b = self._call(ref.report_defect, rid, "band", "lek")
+            if ok_a != ok_b or (ok_a and (a.repair_id, a.bike_id) != (b.repair_id, b.bike_id)):
+                return f"report_defect #{rid}: {a} != {b}"
+            return None
+        if name == "fix_bike_from_repair":
+            repair_id = _pick(ref.repairs, op[1])
+            if repair_id is None:
+                return None
+            ok_a, _ = self._call(store.fix_bike_from_repair, repair_id)
+            ok_b, _ = self._call(ref.fix_bike_from_repair, repair_id)
+            return None if ok_a == ok_b else f"fix_bike_from_repair #{repair_id}: {ok_a} != {ok_b}"
+        if name == "save_load":
+            store.save_to_csv(self.folder)
+            self.store = self.store_class()
+            self.store.load_from_csv(self.folder)
+            ref.reload(datetime.now())
+            return self.compare()
+        raise ValueError(f"Onbekende operatie: {name}")
+
+    def compare(self) -> str | None:
+        """Volledige toestand en afgeleide queries vergelijken."""
+        store, ref = self.store, self.ref
+        for table in ("customers", "stations", "bikes", "reservations", "repairs"):
+            ours, theirs = getattr(store, table), getattr(ref, table)
+            if ours != theirs:
+                diff = sorted(k for k in ours.keys() | theirs.keys() if ours.get(k) != theirs.get(k))
+                key = diff[0]
+                return f"{table} #{key}: {ours.get(key)} != {theirs.get(key)}"
+        for bike_type in BikeType:
+            for station_id in [None, *ref.stations]:
+                a = store.get_available_bike(bike_type, station_id)
+                b = ref.get_available_bike(bike_type, station_id)
+                if (a and a.bike_id) != (b and b.bike_id):
+                    return f"get_available_bike({bike_type.name}, {station_id}): {a} != {b}"
+        for customer_id in list(ref.customers)[:5]:
+            a = sorted(r.reservation_id for r in store.get_reservations_for_customer(customer_id, False))
+            if a != ref.reservations_for_customer(customer_id):
+                return f"reserveringen van klant #{customer_id} verschillen"
+        for r in list(ref.reservations.values())[:5]:
+            day = r.start.date()
+            a = sorted(x.reservation_id for x in store.reservations_starting_on(day))
+            if a != ref.reservations_starting_on(day):
+                return f"reservations_starting_on({day}) verschilt"
+        return None
+
+    def run(self, ops: list[tuple]) -> tuple[int, str] | None:
+        """(index van de eerste afwijkende operatie, beschrijving), of None."""
+        for i, op in enumerate(ops):
+            try:
+                problem = self.apply(op)
+                if problem is None and (i + 1) % self.check_every == 0:
+                    problem = self.compare()
+            except Exception as e:      # een crash in één van beide is ook een verschil
+                problem = f"{type(e).__name__}: {e}"
+            if problem is not None:
+                return i, problem
+        problem = self.compare()
+        return (len(ops) - 1, problem) if problem is not None else None
+
+
+def replay(ops: list[tuple], store_class=DataStore) -> tuple[int, str] | None:
+    folder = tempfile.mkdtemp(prefix="difftest_")
+    try:
+        return Runner(store_class, check_every=1, folder=folder).run(ops)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def shrink(ops: list[tuple], store_class=DataStore) -> list[tuple]:
+    """ddmin: kleinste deelreeks (lokaal minimaal) die nog steeds een verschil geeft."""
+    failure = replay(ops, store_class)
+    if failure is None:
+        return ops
+    ops = ops[:failure[0] + 1]
+    n = 2
+    while len(ops) >= 2:
+        size = -(-len(ops) // n)
+        chunks = [ops[i:i + size] for i in range(0, len(ops), size)]
+        reduced = False
+        for i in range(len(chunks)):
+            # eerst één stuk proberen, dan het complement
+            for candidate in (chunks[i], [op for j, c in enumerate(chunks) if j != i for op in c]):
+                if candidate and len(candidate) < len(ops) and replay(candidate, store_class) is not None:
+                    ops, n, reduced = candidate, max(n - 1, 2) if candidate is not chunks[i] else 2, True
+                    break
+            if reduced:
+                break
+        if not reduced:
+            if n >= len(ops):
+                break
+            n = min(n * 2, len(ops))
+    return ops
+
+
+@dataclass
+class Divergence:
+    seed: int
+    sequence: int
+    problem: str
+    reproducer: list[tuple]
+
+
+def run_random(seed: int, sequences: int, length: int, store_class=DataStore,
+               first_sequence: int = 0, do_shrink: bool = True) -> Divergence | None:
+    """`sequences` reeksen van `length` operaties, elk met verse stores; eerste verschil of None."""
+    folder = tempfile.mkdtemp(prefix="difftest_")
+    try:
+        for n in range(first_sequence, first_sequence + sequences):
+            rng = random.Random(f"{seed}:{n}")
+            ops = random_ops(rng, length)
+            failure = Runner(store_class, folder=os.path.join(folder, str(n))).run(ops)
+            if failure is not None:
+                reproducer = shrink(ops, store_class) if do_shrink else ops[:failure[0] + 1]
+                problem = (replay(reproducer, store_class) or failure)[1]
+                return Divergence(seed, n, problem, reproducer)
+            shutil.rmtree(os.path.join(folder, str(n)), ignore_errors=True)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return None
+
+
+def _worker(args):
+    seed, first, count, length = args
+    return run_random(seed, count, length, first_sequence=first)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: differentiële test DataStore vs referentie")
+    parser.add_argument("--ops", type=int, default=1_000_000, help="totaal aantal operaties")
+    parser.add_argument("--length", type=int, default=500, help="operaties per reeks")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    sequences = max(1, args.ops // args.length)
+    t0 = time.perf_counter()
+    if args.workers <= 1:
+        results = [run_random(args.seed, sequences, args.length)]
+    else:
+        per = -(-sequences // args.workers)
+        jobs = [(args.seed, i, min(per, sequences - i), args.length) for i in range(0, sequences, per)]
+        with Pool(args.workers) as pool:
+            results = pool.map(_worker, jobs)
+    seconds = time.perf_counter() - t0
+
+    failures = [r for r in results if r is not None]
+    if not failures:
+        total = sequences * args.length
+        print(f"{total} operaties in {sequences} reeksen zonder verschil ({total / seconds:.0f} ops/s)")
+        return
+    failure = min(failures, key=lambda f: f.sequence)
+    print(f"Verschil in reeks {failure.sequence} (seed {failure.seed}): {failure.problem}")
+    print(f"Minimale reproductie ({len(failure.reproducer)} operaties):")
+    print("    ops = [")
+    for op in failure.reproducer:
+        print(f"        {op!r},")
+    print("    ]")
+    print("    difftest.replay(ops)")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Bezorgplanning: bundelt de bezorg- en ophaalritten (LocationType.BEZORGEN) van
+één dag tot routes.
+
+1. Ritten van de dag komen uit de dagindex van DataStore (begin = bezorgen,
+   einde = ophalen), dus zonder de hele reserveringslijst door te lopen.
+2. Ritten worden gegroepeerd op postcodegebied (eerste cijfers van de postcode)
+   en tijdvak; te grote groepen worden op postcode opgeknipt.
+3. Per groep wordt een volgorde bepaald met nearest neighbour + 2-opt op een
+   lokale afstandstabel.
+
+Zonder coördinaten is de afstand een benadering op basis van de postcode
+(Nederlandse postcodes lopen geografisch ongeveer op); met een tabel
+postcode (4 cijfers) -> (lat, lon) wordt de echte hemelsbrede afstand gebruikt.
+
+Gebruik:
+    python dispatch.py . --dag 2025-01-03
+"""
+import argparse
+import csv
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from model import DataStore, LocationType
+
+
+POSTCODE_RE = re.compile(r"\b([1-9]\d{3})\s?([A-Za-z]{2})\b")
+
+
+@dataclass
+class Job:
+    reservation_id: int
+    kind: str               # "bezorgen" of "ophalen"
+    time: datetime
+    address: str
+    postcode: str = ""      # "2497AB", leeg als onbekend
+
+
+@dataclass
+class RouteBatch:
+    area: str               # postcodegebied, bv. "24", of "?" als onbekend
+    window_start: datetime
+    window_end: datetime
+    stops: list[Job] = field(default_factory=list)
+    distance: float = 0.0   # geschatte lengte van de route (km)
+
+
+def parse_postcode(address: str) -> str:
+    """Postcode uit een adres als '2497AB', of '' als er geen in staat."""
+    match = POSTCODE_RE.search(address or "")
+    if match is None:
+        return ""
+    return match.group(1) + match.group(2).upper()
+
+
+class PostcodeDistance:
+    """
+    Afstand (km) tussen twee postcodes. Met coördinaten per 4-cijferige postcode
+    de haversine-afstand, anders een benadering via het verschil in postcode.
+    """
+
+    # ruwe schaal van de benadering: ~0.4 km per postcodenummer binnen een regio
+    KM_PER_NUMBER = 0.4
+    KM_SAME_PC4 = 0.3
+
+    def __init__(self, coordinates: dict[str, tuple[float, float]] | None = None):
+        self.coordinates = coordinates or {}
+
+    @classmethod
+    def from_csv(cls, filename: str) -> "PostcodeDistance":
+        """CSV met kolommen postcode, lat, lon (4-cijferige postcodes)."""
+        coordinates = {}
+        with open(filename, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                coordinates[row["postcode"][:4]] = (float(row["lat"]), float(row["lon"]))
+        return cls(coordinates)
+
+    def __call__(self, a: str, b: str) -> float:
+        if a == b:
+            return 0.0
+        pc_a, pc_b = a[:4], b[:4]
+        if pc_a == pc_b:
+            return self.KM_SAME_PC4
+        ca, cb = self.coordinates.get(pc_a), self.coordinates.get(pc_b)
+        if ca is not None and cb is not None:
+            return _haversine(ca, cb)
+        try:
+            return abs(int(pc_a) - int(pc_b)) * self.KM_PER_NUMBER + self.KM_SAME_PC4
+        except ValueError:
+            return 50.0
+
+
+def _haversine(a: tuple[float, float], b: tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def jobs_for_day(store: DataStore, day: date) -> list[Job]:
+    """Bezorgingen (begin op `day`) en ophaalritten (einde op `day`) met adres."""
+    jobs = []
+    for r in store.reservations_starting_on(day):
+        if r.location_type == LocationType.BEZORGEN:
+            jobs.append(Job(r.reservation_id, "bezorgen", r.start, r.address, parse_postcode(r.address)))
+    for r in store.reservations_ending_on(day):
+        if r.location_type == LocationType.BEZORGEN:
+            jobs.append(Job(r.reservation_id, "ophalen", r.end, r.address, parse_postcode(r.address)))
+    return jobs
+
+
+def order_route(stops: list[Job], distance, depot: str | None = None) -> tuple[list[Job], float]:
+    """
+    Volgorde van de stops: nearest neighbour vanaf het depot (of de eerste stop),
+    daarna 2-opt tot er geen verbetering meer is. Afstanden worden één keer in
+    een lokale tabel gezet.
+    """
+    points = ([depot] if depot else []) + [s.postcode for s in stops]
+    n = len(points)
+    if n <= 1 + (1 if depot else 0):
+        return list(stops), 0.0
+    table = [[distance(a, b) for b in points] for a in points]
+
+    # nearest neighbour
+    route = [0]
+    left = set(range(1, n))
+    while left:
+        last = table[route[-1]]
+        nxt = min(left, key=lambda j: (last[j], j))
+        route.append(nxt)
+        left.remove(nxt)
+
+    # 2-opt op een open route (begin blijft vast: depot of eerste stop)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            for k in range(i + 1, n):
+                c = route[k]
+                d = route[k + 1] if k + 1 < n else None
+                before = table[a][b] + (table[c][d] if d is not None else 0.0)
+                after = table[a][c] + (table[b][d] if d is not None else 0.0)
+                if after < before - 1e-9:
+                    route[i:k + 1] = reversed(route[i:k + 1])
+                    b = route[i]
+                    improved = True
+
+    length = sum(table[route[i]][route[i + 1]] for i in range(n - 1))
+    offset = 1 if depot else 0
+    return [stops[i - offset] for i in route if i >= offset], length
+
+
+def plan_day(store: DataStore, day: date, window_hours: int = 2, prefix_len: int = 2,
+             max_stops: int = 12, depot: str | None = None, distance=None) -> list[RouteBatch]:
+    """
+    Routebatches voor `day`, gesorteerd op tijdvak en gebied.
+    - window_hours: lengte van een tijdvak
+    - prefix_len: aantal postcodecijfers dat een gebied bepaalt
+    - max_stops: maximaal aantal stops per route
+    - depot: postcode van de uitvalsbasis (begin van elke route), optioneel
+    """
+    if window_hours <= 0 or max_stops <= 0:
+        raise ValueError("Tijdvak en aantal stops moeten positief zijn.")
+    distance = distance or PostcodeDistance()
+    midnight = datetime(day.year, day.month, day.day)
+    window = timedelta(hours=window_hours)
+
+    groups: dict[tuple[int, str], list[Job]] = {}
+    for job in jobs_for_day(store, day):
+        slot = int((job.time - midnight) // window)
+        area = job.postcode[:prefix_len] if job.postcode else "?"
+        groups.setdefault((slot, area), []).append(job)
+
+    batches = []
+    for (slot, area), jobs in sorted(groups.items()):
+        jobs.sort(key=lambda j: (j.postcode, j.reservation_id))
+        for i in range(0, len(jobs), max_stops):
+            chunk = jobs[i:i + max_stops]
+            if area == "?":
+                ordered, length = sorted(chunk, key=lambda j: j.time), 0.0
+            else:
+                ordered, length = order_route(chunk, distance, depot)
+            batches.append(RouteBatch(
+                area=area,
+                window_start=midnight + slot * window,
+                window_end=midnight + (slot + 1) * window,
+                stops=ordered,
+                distance=round(length, 2),
+            ))
+    return batches
+
+
+def format_plan(batches: list[RouteBatch]) -> str:
+    lines = []
+    for n, batch in enumerate(batches, start=1):
+        lines.append(
+            f"Route {n}: gebied {batch.area}, {batch.window_start:%H:%M}-{batch.window_end:%H:%M}, "
+            f"{len(batch.stops)} stops, ca. {batch.distance:.1f} km"
+        )
+        for job in batch.stops:
+            lines.append(f"  {job.time:%H:%M} {job.kind:<9} #{job.reservation_id:<6} {job.address}")
+    return "\n".join(lines) if lines else "Geen bezorg- of ophaalritten."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: bezorgplanning per dag")
+    parser.add_argument("folder")
+    parser.add_argument("--dag", required=True, help="datum (YYYY-MM-DD)")
+    parser.add_argument("--tijdvak", type=int, default=2, help="lengte van een tijdvak in uren")
+    parser.add_argument("--max-stops", type=int, default=12)
+    parser.add_argument("--depot", help="postcode van de uitvalsbasis")
+    parser.add_argument("--coordinaten", help="CSV met postcode, lat, lon")
+    args = parser.parse_args()
+
+    store = DataStore()
+    store.load_from_csv(args.folder)
+    distance = PostcodeDistance.from_csv(args.coordinaten) if args.coordinaten else None
+    day = datetime.strptime(args.dag, "%Y-%m-%d").date()
+    batches = plan_day(store, day, window_hours=args.tijdvak, max_stops=args.max_stops,
+                       depot=parse_postcode(args.depot or "") or None, distance=distance)
+    print(format_plan(batches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cache van opgemaakte Treeview-rijen (display-tuples).
+
+Het opmaken van een rij (strftime, .value van enums, klantnaam opzoeken) gebeurt
+alleen als de rij (of een rij waar hij van afhangt) sinds de vorige keer is
+gewijzigd; dat volgt uit de rijversies van de wijzigingsfeed van DataStore.
+Een herhaalde refresh kost zo één versie- en één dict-lookup per rij.
+"""
+from model import DataStore
+
+
+class CachedRows:
+    """
+    Opgemaakte rijen van één weergave (bv. de beheerderstabel met reserveringen).
+    Aanroepen als functie: rows(obj) -> tuple.
+    """
+
+    def __init__(self, store: DataStore, table: str, format_row,
+                 depends: str | None = None, depends_key=None):
+        self.store = store
+        self.table = table
+        self.format_row = format_row
+        # optioneel: rij hangt ook af van één rij uit een andere tabel (bv. klantnaam)
+        self.depends = depends
+        self.depends_key = depends_key
+        self.key_field = DataStore.TABLE_KEYS[table]
+        self._rows: dict = {}       # key -> (versie, tuple)
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, obj):
+        key = getattr(obj, self.key_field)
+        row_version = self.store.row_version
+        version = row_version(self.table, key)
+        if self.depends is not None:
+            version = (version, row_version(self.depends, self.depends_key(obj)))
+        cached = self._rows.get(key)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        values = self.format_row(obj)
+        self._rows[key] = (version, values)
+        return values
+
+    def discard(self, key):
+        self._rows.pop(key, None)
+
+    def clear(self):
+        self._rows.clear()
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class DisplayCache:
+    """
+    Alle CachedRows van de app. Verwijderde rijen worden via de wijzigingsfeed
+    uit de cache gehaald, zodat die niet blijft groeien.
+    """
+
+    def __init__(self, store: DataStore):
+        self.store = store
+        self.views: list[CachedRows] = []
+        store.subscribe(self._on_change)
+
+    def view(self, table: str, format_row, depends: str | None = None, depends_key=None) -> CachedRows:
+        rows = CachedRows(self.store, table, format_row, depends, depends_key)
+        self.views.append(rows)
+        return rows
+
+    def _on_change(self, change):
+        if change.op == "reload":
+            for rows in self.views:
+                rows.clear()
+        elif change.op == "delete":
+            for rows in self.views:
+                if rows.table == change.table:
+                    rows.discard(change.key)
+        elif change.op == "bulk_delete":
+            for rows in self.views:
+                if rows.table == change.table:
+                    for key in change.key:
+                        rows.discard(key)
+
+    def close(self):
+        self.store.unsubscribe(self._on_change)
@@ -0,0 +1,153 @@
+"""
+Streaming export van een tabel naar CSV of JSON-regels.
+
+In tegenstelling tot save_to_csv (volledige map, atomisch herschreven) schrijft
+export_table naar elk bestand-object: een open bestand, een pipe (stdout) of een
+gzip-stroom. Rijen komen uit een iterator (bv. DataStore.iter_reservations met
+filters) en worden in een buffer opgemaakt die per `chunk_bytes` wordt
+weggeschreven, dus het geheugengebruik hangt niet af van het aantal rijen.
+
+Kolommen en opmaak zijn gelijk aan de CSV-bestanden van de datamap; een
+JSON-regel is {kolom: waarde} zoals de rijen in de wijzigingsfeed.
+
+Gebruik:
+    python export.py . reserveringen --formaat jsonl --gzip -o historie.jsonl.gz
+    python export.py . reserveringen --klant 12 --vanaf 2025-01-01 | head
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+from model import DataStore, ReservationStatus
+
+
+CHUNK_BYTES = 1 << 20
+
+FORMATS = ("csv", "jsonl")
+
+# geen wachtwoorden in exports (zelfde regel als de wijzigingsfeed)
+HIDDEN_COLUMNS = {"accounts": ("password",)}
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def export_table(store: DataStore, table: str, f, fmt: str = "csv", rows=None,
+                 header: bool = True, chunk_bytes: int = CHUNK_BYTES) -> int:
+    """
+    Schrijf `rows` (standaard alle rijen van `table`) naar f; f mag tekst of binair zijn.
+    Geeft het aantal geschreven rijen terug.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Onbekend formaat: {fmt}")
+    if table not in store.TABLE_COLUMNS:
+        raise ValueError(f"Onbekende tabel: {table}")
+    if rows is None:
+        rows = store._table(table).values()
+
+    columns = store.TABLE_COLUMNS[table]
+    hidden = [columns.index(col) for col in HIDDEN_COLUMNS.get(table, ())]
+    keep = [i for i in range(len(columns)) if i not in hidden]
+    if hidden:
+        columns = [columns[i] for i in keep]
+    binary = isinstance(f, (io.RawIOBase, io.BufferedIOBase))
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def flush():
+        data = buf.getvalue()
+        if data:
+            f.write(data.encode("utf-8") if binary else data)
+        buf.seek(0)
+        buf.truncate()
+
+    if fmt == "csv" and header:
+        writer.writerow(columns)
+
+    row_of = store._row_of
+    count = 0
+    for obj in rows:
+        values = row_of(table, obj)
+        if hidden:
+            values = [values[i] for i in keep]
+        if fmt == "csv":
+            writer.writerow(values)
+        else:
+            buf.write(_encode(dict(zip(columns, values))))
+            buf.write("\n")
+        count += 1
+        if buf.tell() >= chunk_bytes:
+            flush()
+    flush()
+    return count
+
+
+# tabelnamen op de opdrachtregel (zoals in bulk_import.py)
+TABLES = {
+    "klanten": "customers",
+    "stations": "stations",
+    "fietsen": "bikes",
+    "reserveringen": "reservations",
+    "reparaties": "repairs",
+}
+
+
+def _date(text: str) -> datetime:
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: tabel exporteren als CSV of JSON-regels")
+    parser.add_argument("folder", help="datamap van BIKER")
+    parser.add_argument("tabel", choices=tuple(TABLES))
+    parser.add_argument("--formaat", choices=FORMATS, default="csv")
+    parser.add_argument("-o", "--uitvoer", default="-", help="bestand, of - voor stdout (standaard)")
+    parser.add_argument("--gzip", action="store_true", help="gzip-gecomprimeerd schrijven")
+    parser.add_argument("--klant", type=int, help="alleen reserveringen van deze klant")
+    parser.add_argument("--fiets", type=int, help="alleen reserveringen/reparaties van deze fiets")
+    parser.add_argument("--status", action="append", choices=[s.name for s in ReservationStatus],
+                        help="alleen reserveringen met deze status (mag vaker)")
+    parser.add_argument("--vanaf", type=_date, help="begindatum op of na YYYY-MM-DD")
+    parser.add_argument("--tot", type=_date, help="begindatum vóór YYYY-MM-DD")
+    args = parser.parse_args()
+
+    store = DataStore()
+    store.load_from_csv(args.folder)
+    table = TABLES[args.tabel]
+    rows = None
+    if table == "reservations":
+        rows = store.iter_reservations(
+            customer_id=args.klant,
+            bike_id=args.fiets,
+            status=[ReservationStatus[s] for s in args.status] if args.status else None,
+            start_from=args.vanaf,
+            start_before=args.tot,
+        )
+    elif table == "repairs":
+        rows = store.iter_repairs(bike_id=args.fiets)
+
+    out = sys.stdout.buffer if args.uitvoer == "-" else open(args.uitvoer, "wb")
+    try:
+        if args.gzip:
+            with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+                count = export_table(store, table, gz, args.formaat, rows)
+        else:
+            count = export_table(store, table, out, args.formaat, rows)
+        out.flush()
+    except BrokenPipeError:
+        # bv. `| head`: de lezer is al klaar; stdout omleiden zodat afsluiten niet opnieuw faalt
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"{count} rijen geëxporteerd.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Geheugengebruik per tabel en index van een DataStore, en een geheugenbudget.
+
+memory_report schat het aantal bytes met sys.getsizeof op een steekproef: per
+container worden hooguit `sample` elementen (gelijkmatig verspreid) volledig
+opgemeten en wordt het gemiddelde met het aantal elementen vermenigvuldigd.
+Objecten die gedeeld worden (enums, None, bools, kleine ints) tellen niet mee;
+in de indexen tellen ook de datums en ids niet mee, dat zijn dezelfde objecten
+als in de tabellen. Met --tracemalloc meet de CLI daarnaast het werkelijke
+geheugen van het laden, ter controle van de schatting.
+
+MemoryBudget: boven het budget worden oude, afgesloten reserveringen (AFGEROND
+of GEANNULEERD, geëindigd vóór nu - keep_days, zonder reparatie) naar
+reservations_archive.csv verplaatst, oudste eerst, tot de schatting weer onder
+het budget zit. Het archief heeft dezelfde kolommen als reservations.csv; een
+reservering die er al in staat (archiveren zonder daarna op te slaan) wordt er
+niet nog eens aan toegevoegd.
+
+Gebruik:
+    python memory.py .
+    python memory.py . --tracemalloc
+    python memory.py . --budget-mb 200 --bewaar-dagen 365     (archiveert en slaat op)
+"""
+import argparse
+import csv
+import dataclasses
+import math
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from itertools import islice
+
+from model import DataStore
+from export import export_table
+
+
+SAMPLE = 200
+ARCHIVE_FILE = "reservations_archive.csv"
+
+_SHARED = (Enum, bool, type(None))
+_CONTAINERS = (dict, list, tuple, set, frozenset)
+
+
+def _sample(items, n: int, k: int) -> list:
+    if n <= k:
+        return list(items)
+    return list(islice(items, 0, None, n // k))[:k]
+
+
+def _elements_size(elements, n: int, sample: int, skip: tuple) -> float:
+    """Geschatte som van deep_size over de n elementen van `elements()` (nieuwe iterator per aanroep)."""
+    picked = _sample(elements(), n, sample)
+    inner = max(sample // 10, 10)
+    if isinstance(picked[0], _CONTAINERS):
+        # containergroottes zijn vaak scheef verdeeld (postings van de zoekindex):
+        # die exact optellen en alleen de inhoud schatten
+        contents = sum(deep_size(v, inner, skip) - sys.getsizeof(v) for v in picked)
+        return sum(map(sys.getsizeof, elements())) + contents * n / len(picked)
+    return sum(deep_size(v, inner, skip) for v in picked) * n / len(picked)
+
+
+def deep_size(obj, sample: int = SAMPLE, skip: tuple = ()) -> int:
+    """Geschatte grootte van obj inclusief alles waar het naar verwijst (zie moduletekst)."""
+    if isinstance(obj, _SHARED) or (skip and isinstance(obj, skip)):
+        return 0
+    if type(obj) is int and -5 <= obj <= 256:
+        return 0
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        if obj:
+            n = len(obj)
+            size += _elements_size(obj.keys, n, sample, skip) + _elements_size(obj.values, n, sample, skip)
+    elif isinstance(obj, _CONTAINERS):
+        if obj:
+            size += _elements_size(lambda: iter(obj), len(obj), sample, skip)
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # velden uitlezen i.p.v. __dict__, dat zou per object een dict aanmaken
+        fields = dataclasses.fields(obj)
+        size += 8 * len(fields) + sum(deep_size(getattr(obj, f.name), sample, skip) for f in fields)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_size(vars(obj), sample, skip)
+    return int(size)
+
+
+@dataclass
+class MemoryUsage:
+    name: str
+    items: int
+    bytes: int
+
+    @property
+    def mb(self) -> float:
+        return self.bytes / (1024 * 1024)
+
+
+def memory_report(store: DataStore, sample: int = SAMPLE) -> list[MemoryUsage]:
+    """Geschatte bytes per tabel en per afgeleide structuur, grootste eerst binnen elke groep."""
+    tables = [
+        MemoryUsage(table, len(store._table(table)), deep_size(store._table(table), sample))
+        for table in DataStore.TABLE_FILES
+    ]
+
+    # indexen verwijzen naar dezelfde id- en datum-objecten als de tabellen
+    def usage(name, items, *parts, skip=(datetime, int)):
+        return MemoryUsage(name, items, sum(deep_size(p, sample, skip) for p in parts))
+
+    indexes = [
+        # zonder de klantentabel waar de index naar verwijst
+        usage("index: klantzoeken", len(store.customer_index._text), store.customer_index._text,
+              store.customer_index._sorted_names, store.customer_index._prefixes, store.customer_index._trigrams),
+        usage("index: boekingen per fiets", len(store._res_index_keys), store._bike_bookings, store._res_index_keys),
+        usage("index: reserveringen per dag", len(store._res_by_start_day),
+              store._res_by_start_day, store._res_by_end_day),
+        usage("index: beschikbare fietsen", len(store._available_key), store._available_heaps, store._available_key),
+        usage("wijzigingsfeed", len(store._change_log), store._change_log),
+        usage("rijversies", len(store._row_versions), store._row_versions, store._table_seq, skip=(datetime,)),
+        usage("samenvoegbasis", sum(len(rows) for rows in store._base_rows.values()), store._base_rows,
+              skip=(datetime,)),
+    ]
+    if store._cow is not None:
+        # kopieën van de rijen; de veldwaarden zelf worden gedeeld met de tabellen
+        indexes.append(usage("snapshots (copy-on-write)", sum(len(m) for m in store._cow.values()),
+                             store._cow, skip=(datetime, int, str, float)))
+    indexes.sort(key=lambda u: u.bytes, reverse=True)
+    return tables + indexes
+
+
+def total_bytes(report: list[MemoryUsage]) -> int:
+    return sum(u.bytes for u in report)
+
+
+def format_report(report: list[MemoryUsage], budget: int | None = None) -> str:
+    lines = [f"{'Onderdeel':<30} {'Aantal':>10} {'MB':>10}"]
+    for u in report:
+        lines.append(f"{u.name:<30} {u.items:>10} {u.mb:>10.2f}")
+    total = total_bytes(report)
+    lines.append(f"{'Totaal (schatting)':<30} {'':>10} {total / (1024 * 1024):>10.2f}")
+    if budget is not None:
+        lines.append(f"{'Budget':<30} {'':>10} {budget / (1024 * 1024):>10.2f}")
+    return "\n".join(lines)
+
+
+@dataclass
+class EvictionResult:
+    before: int             # geschatte bytes vóór archiveren
+    after: int
+    archived: int = 0       # aantal verplaatste reserveringen
+
+
+class MemoryBudget:
+
+    def __init__(self, store: DataStore, max_bytes: int, archive_file: str,
+                 keep_days: int = 365, sample: int = SAMPLE):
+        if max_bytes <= 0:
+            raise ValueError("Budget moet groter dan 0 zijn.")
+        self.store = store
+        self.max_bytes = max_bytes
+        self.archive_file = archive_file
+        self.keep_days = keep_days
+        self.sample = sample
+        self.archived = 0
+        self.last_report: list[MemoryUsage] = []
+
+    def _row_cost(self, report: list[MemoryUsage]) -> float:
+        """Geschatte bytes per reservering: de rij zelf plus haar aandeel in de indexen."""
+        count = len(self.store.reservations)
+        if not count:
+            return 0.0
+        names = ("reservations", "index: boekingen per fiets", "index: reserveringen per dag")
+        return sum(u.bytes for u in report if u.name in names) / count
+
+    def candidates(self, now: datetime | None = None) -> list:
+        """Archiveerbare reserveringen, oudste einddatum eerst."""
+        store = self.store
+        cutoff = (now or datetime.now()) - timedelta(days=self.keep_days)
+        with_repair = {rep.reservation_id for rep in store.repairs.values()}
+        cold = [
+            r for r in store.iter_reservations(status=store.INACTIVE_RESERVATION_STATUSES)
+            if r.end < cutoff and r.reservation_id not in with_repair
+        ]
+        cold.sort(key=lambda r: (r.end, r.reservation_id))
+        return cold
+
+    def archived_ids(self) -> set[int]:
+        """reservation_ids die al in het archiefbestand staan."""
+        if not os.path.exists(self.archive_file):
+            return set()
+        with open(self.archive_file, "r", newline="", encoding="utf-8") as f:
+            return {int(row["reservation_id"]) for row in csv.DictReader(f)}
+
+    def check(self, now: datetime | None = None) -> EvictionResult:
+        """Geheugen schatten en, als het budget overschreden is, archiveren."""
+        report = self.last_report = memory_report(self.store, self.sample)
+        before = total_bytes(report)
+        if before <= self.max_bytes:
+            return EvictionResult(before, before)
+
+        per_row = self._row_cost(report)
+        needed = math.ceil((before - self.max_bytes) / per_row) if per_row else 0
+        victims = self.candidates(now)[:needed]
+        if not victims:
+            return EvictionResult(before, before)
+
+        # nog niet opgeslagen na een eerdere ronde: die rijen staan al in het archief
+        archived = self.archived_ids()
+        new_file = not os.path.exists(self.archive_file) or os.path.getsize(self.archive_file) == 0
+        with open(self.archive_file, "a", newline="", encoding="utf-8") as f:
+            export_table(self.store, "reservations", f, header=new_file,
+                         rows=[r for r in victims if r.reservation_id not in archived])
+        self.store.bulk_delete("reservations", [r.reservation_id for r in victims])
+        self.archived += len(victims)
+
+        report = self.last_report = memory_report(self.store, self.sample)
+        return EvictionResult(before, total_bytes(report), len(victims))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: geheugengebruik per tabel en index")
+    parser.add_argument("folder", help="datamap van BIKER")
+    parser.add_argument("--steekproef", type=int, default=SAMPLE, help="elementen per container")
+    parser.add_argument("--tracemalloc", action="store_true", help="laden ook echt meten (trager)")
+    parser.add_argument("--budget-mb", type=float, help="boven dit budget oude reserveringen archiveren")
+    parser.add_argument("--bewaar-dagen", type=int, default=365)
+    parser.add_argument("--archief", help=f"archiefbestand (standaard <folder>/{ARCHIVE_FILE})")
+    args = parser.parse_args()
+
+    store = DataStore()
+    if args.tracemalloc:
+        tracemalloc.start()
+        store.load_from_csv(args.folder)
+        traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    else:
+        store.load_from_csv(args.folder)
+
+    t0 = time.perf_counter()
+    report = memory_report(store, args.steekproef)
+    elapsed = time.perf_counter() - t0
+    budget = int(args.budget_mb * 1024 * 1024) if args.budget_mb else None
+    print(format_report(report, budget))
+    print(f"(schatting in {elapsed * 1000:.0f} ms)")
+    if args.tracemalloc:
+        print(f"Gemeten met tracemalloc na laden: {traced / (1024 * 1024):.2f} MB")
+
+    if budget is not None:
+        archive = args.archief or os.path.join(args.folder, ARCHIVE_FILE)
+        result = MemoryBudget(store, budget, archive, args.bewaar_dagen, args.steekproef).check()
+        if result.archived:
+            store.save_to_csv(args.folder)
+            print(
+                f"{result.archived} reserveringen gearchiveerd naar {archive}: "
+                f"{result.before / (1024 * 1024):.2f} -> {result.after / (1024 * 1024):.2f} MB"
+            )
+        elif result.before > budget:
+            print("Budget overschreden, maar er zijn geen reserveringen om te archiveren.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Instrumentatie voor DataStore: aantallen aanroepen, latency-histogrammen
+met vaste (HDR-achtige, log-lineaire) buckets en rijen per tabel.
+Export als JSON of als Prometheus-tekstbestand.
+"""
+from bisect import bisect_left
+import json
+import os
+import time
+
+
+def _bucket_bounds(min_us: float = 1.0, octaves: int = 28, per_octave: int = 2) -> list[float]:
+    """Bovengrenzen in seconden: per verdubbeling `per_octave` lineaire stappen (1 µs .. ~4.5 min)."""
+    bounds = []
+    base = min_us
+    for _ in range(octaves):
+        step = base / per_octave
+        for i in range(1, per_octave + 1):
+            bounds.append((base + step * i) / 1_000_000)
+        base *= 2
+    return [min_us / 1_000_000] + bounds
+
+
+class LatencyHistogram:
+    """Histogram met vaste buckets; record() is O(log buckets) en alloceert niets."""
+
+    BOUNDS = _bucket_bounds()
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)   # laatste bucket: +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Bovengrens van de bucket waarin percentiel q (0..100) valt."""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min or 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": {
+                (f"{b:.9g}" if i < len(self.BOUNDS) else "+Inf"): c
+                for i, (b, c) in enumerate(zip(self.BOUNDS + [float("inf")], self.counts))
+                if c
+            },
+        }
+
+
+class Metrics:
+    """Verzamelt per methode: aantal aanroepen, fouten en latency."""
+
+    def __init__(self):
+        self.calls: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.started = time.time()
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if error:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        hist = self.latency.get(name)
+        if hist is None:
+            hist = self.latency[name] = LatencyHistogram()
+        hist.record(seconds)
+
+    def wrap(self, name: str, func):
+        """Maak een getimede versie van `func`."""
+        perf_counter = time.perf_counter
+        record = self.record
+
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                record(name, perf_counter() - t0, error=True)
+                raise
+            record(name, perf_counter() - t0)
+            return result
+
+        timed.__name__ = getattr(func, "__name__", name)
+        timed.__doc__ = getattr(func, "__doc__", None)
+        timed.__wrapped__ = func
+        return timed
+
+    def snapshot(self, row_counts: dict[str, int] | None = None) -> dict:
+        return {
+            "started": self.started,
+            "uptime": time.time() - self.started,
+            "methods": {
+                name: {
+                    "calls": self.calls.get(name, 0),
+                    "errors": self.errors.get(name, 0),
+                    "latency": hist.to_dict(),
+                }
+                for name, hist in sorted(self.latency.items())
+            },
+            "rows": dict(row_counts or {}),
+        }
+
+    def to_json(self, row_counts: dict[str, int] | None = None) -> str:
+        return json.dumps(self.snapshot(row_counts), indent=2)
+
+    def to_prometheus(self, row_counts: dict[str, int] | None = None) -> str:
+        lines = [
+            "# HELP biker_datastore_calls_total Aantal aanroepen per DataStore-methode.",
+            "# TYPE biker_datastore_calls_total counter",
+        ]
+        for name in sorted(self.calls):
+            lines.append(f'biker_datastore_calls_total{{method="{name}"}} {self.calls[name]}')
+        lines += [
+            "# HELP biker_datastore_errors_total Aantal mislukte aanroepen per DataStore-methode.",
+            "# TYPE biker_datastore_errors_total counter",
+        ]
+        for name in sorted(self.calls):
+            lines.append(f'biker_datastore_errors_total{{method="{name}"}} {self.errors.get(name, 0)}')
+        lines += [
+            "# HELP biker_datastore_latency_seconds Latency per DataStore-methode.",
+            "# TYPE biker_datastore_latency_seconds histogram",
+        ]
+        for name, hist in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, count in zip(hist.BOUNDS, hist.counts):
+                cumulative += count
+                lines.append(
+                    f'biker_datastore_latency_seconds_bucket{{method="{name}",le="{bound:.9g}"}} {cumulative}'
+                )
+            lines.append(f'biker_datastore_latency_seconds_bucket{{method="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'biker_datastore_latency_seconds_sum{{method="{name}"}} {hist.total:.9g}')
+            lines.append(f'biker_datastore_latency_seconds_count{{method="{name}"}} {hist.count}')
+        lines += [
+            "# HELP biker_datastore_rows Aantal rijen per tabel.",
+            "# TYPE biker_datastore_rows gauge",
+        ]
+        for table, count in sorted((row_counts or {}).items()):
+            lines.append(f'biker_datastore_rows{{table="{table}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def write_file(filename: str, text: str):
+        """Atomisch schrijven, zodat een scraper nooit een half bestand leest."""
+        tmp = filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, filename)
@@ -1,8 +1,26 @@
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 from enum import Enum
+from contextlib import contextmanager, nullcontext
+import bisect
 import csv
+import heapq
 import os
+import json
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:     # Windows: geen advisory locks
+    fcntl = None
+
+from metrics import Metrics
+from security import LoginThrottle, SessionCache, dummy_hash, hash_password, is_hashed, needs_rehash, verify_password
+from snapshot import CowMap, StoreSnapshot
 
 
 # ===== ENUMS =====
@@ -46,12 +64,21 @@ class Customer:
 
 
 
+@dataclass
+class Station:
+    station_id: int
+    name: str
+    address: str = ""
+    capacity: int = 0           # aantal plekken, 0 = onbekend
+
+
 @dataclass
 class Bike:
     bike_id: int
     bike_type: BikeType
     status: BikeStatus = BikeStatus.OK
     available: bool = True
+    station_id: int | None = None   # ophaalpunt, None = niet toegewezen
 
 
 @dataclass
@@ -80,11 +107,284 @@ class Repair:
 @dataclass
 class UserAccount:
     username: str
-    password: str
+    password: str       # pbkdf2-hash (zie security.py); oude rijen kunnen nog leesbaar zijn
     role: Role
     customer_id: int | None = None    # alleen voor Huurder
 
 
+def _row_copy(obj):
+    """Ondiepe kopie van een rij (sneller dan copy.copy voor onze dataclasses)."""
+    clone = object.__new__(obj.__class__)
+    clone.__dict__.update(obj.__dict__)
+    return clone
+
+
+class CsvConflictError(ValueError):
+    """Zelfde rij is zowel door ons als door een andere instantie gewijzigd."""
+
+    def __init__(self, conflicts: list[tuple[str, object]]):
+        self.conflicts = conflicts
+        details = ", ".join(f"{table} #{key}" for table, key in conflicts[:10])
+        if len(conflicts) > 10:
+            details += f" (+{len(conflicts) - 10})"
+        super().__init__(f"Conflicterende wijzigingen bij opslaan: {details}")
+
+
+@dataclass
+class TableDelta:
+    """Verschil per rij na het opnieuw inlezen van een tabel (zie poll_changes)."""
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    conflicts: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed or self.conflicts)
+
+
+@dataclass
+class StationShortage:
+    """Station dat op `day` te weinig vrije fietsen van een type heeft (zie rebalancing_report)."""
+    station_id: int
+    bike_type: BikeType
+    day: date
+    fleet: int              # fietsen (OK) van dit type op het station
+    booked: int             # daarvan op deze dag verhuurd
+    free: int
+    donor_station_id: int | None = None     # station met overschot op die dag
+
+
+@dataclass
+class ConsistencyIssue:
+    """Tegenstrijdigheid in de gegevens (zie check_consistency)."""
+    kind: str               # "dangling_customer", "dangling_bike", "dangling_reservation", "overlap", "availability"
+    table: str
+    key: int
+    detail: str
+    fixed: bool = False     # afgeleide waarde is gecorrigeerd
+
+
+@dataclass
+class Change:
+    """Eén wijziging in de DataStore (change data capture)."""
+    seq: int
+    table: str
+    op: str                 # insert / update / delete / reload / bulk_insert / bulk_delete
+    key: object             # bij bulk_*: lijst met ids, row is dan None
+    row: dict | None        # rij na de wijziging (bij delete: de verwijderde rij)
+    ts: float
+    origin: str = "local"   # local of external (ingelezen van schijf)
+
+    def to_dict(self) -> dict:
+        return {
+            "seq": self.seq,
+            "ts": self.ts,
+            "table": self.table,
+            "op": self.op,
+            "key": self.key,
+            "origin": self.origin,
+            "row": self.row,
+        }
+
+
+# ===== ZOEKINDEX KLANTEN =====
+
+class CustomerSearchIndex:
+    """
+    Type-ahead zoekindex over naam en e-mail van klanten.
+    - gesorteerde namen: klanten waarvan de naam met de zoekterm begint komen eerst
+    - korte zoektermen (< 3 tekens): prefix-index op woorden
+    - langere zoektermen: trigram-index, daarna controle op substring
+    Zoeken stopt zodra er genoeg treffers zijn, zodat ook veelvoorkomende
+    termen snel blijven.
+
+    Compact: per klant alleen "naam<tab>e-mail", postings zijn gesorteerde
+    array('I')-lijsten. De index wordt pas bij de eerste zoekopdracht in één
+    keer opgebouwd uit `customers`; tot dan kosten add/remove niets.
+    """
+
+    MIN_TRIGRAM = 3
+    TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+    def __init__(self, customers: dict | None = None):
+        self._customers = customers if customers is not None else {}
+        self._built = False
+        self._text: dict[int, str] = {}
+        self._sorted_names: list[tuple[str, int]] = []
+        self._sorted_dirty = False
+        self._prefixes: dict[str, array] = {}
+        self._trigrams: dict[str, array] = {}
+
+    @staticmethod
+    def _normalize(value: str) -> str:
+        return " ".join(value.lower().split())
+
+    def _index_text(self, customer: Customer) -> str:
+        # tab komt na normaliseren niet meer voor: scheidt naam en e-mail
+        return f"{self._normalize(customer.name)}\t{self._normalize(customer.email)}"
+
+    def _keys(self, text: str):
+        prefixes = set()
+        for token in self.TOKEN_RE.findall(text):
+            for i in range(1, min(len(token), self.MIN_TRIGRAM - 1) + 1):
+                prefixes.add(token[:i])
+        trigrams = {part[i:i + 3] for part in text.split("\t") for i in range(len(part) - 2)}
+        return prefixes, trigrams
+
+    def _build(self, customers):
+        """Alle klanten in één keer: postings verzamelen en dan pas sorteren."""
+        prefixes: dict[str, list[int]] = defaultdict(list)
+        trigrams: dict[str, list[int]] = defaultdict(list)
+        keys_of = self._keys
+        for customer in customers:
+            cid = customer.customer_id
+            text = self._index_text(customer)
+            self._text[cid] = text
+            p, t = keys_of(text)
+            for key in p:
+                prefixes[key].append(cid)
+            for key in t:
+                trigrams[key].append(cid)
+        for merged, new in ((self._prefixes, prefixes), (self._trigrams, trigrams)):
+            for key, ids in new.items():
+                ids.sort()
+                old = merged.get(key)
+                if old is None:
+                    merged[key] = array("I", ids)
+                elif not old or ids[0] > old[-1]:
+                    old.extend(ids)
+                else:
+                    merged[key] = array("I", sorted(set(old).union(ids)))
+        self._sorted_dirty = True
+
+    def _ensure_built(self):
+        if not self._built:
+            self._built = True
+            self._build(self._customers.values())
+
+    def add(self, customer: Customer, bulk: bool = False):
+        """
+        Klant (opnieuw) indexeren, bv. na toevoegen of bewerken.
+        Met bulk=True wordt de naamlijst pas bij de volgende zoekopdracht gesorteerd.
+        """
+        if not self._built:
+            return
+        cid = customer.customer_id
+        if cid in self._text:
+            self.remove(cid)
+        text = self._index_text(customer)
+        self._text[cid] = text
+        if bulk or self._sorted_dirty:
+            self._sorted_dirty = True
+        else:
+            bisect.insort(self._sorted_names, (text.split("\t")[0], cid))
+        prefixes, trigrams = self._keys(text)
+        for index, keys in ((self._prefixes, prefixes), (self._trigrams, trigrams)):
+            for key in keys:
+                ids = index.get(key)
+                if ids is None:
+                    index[key] = array("I", (cid,))
+                elif not ids or cid > ids[-1]:
+                    ids.append(cid)
+                else:
+                    ids.insert(bisect.bisect_left(ids, cid), cid)
+
+    def add_many(self, customers: list):
+        """Veel nieuwe klanten tegelijk (bulk-import): postings per sleutel in één keer bijwerken."""
+        if self._built:
+            self._build(customers)
+
+    def remove(self, customer_id: int):
+        text = self._text.pop(customer_id, None)
+        if text is None:
+            return
+        if not self._sorted_dirty:
+            pos = bisect.bisect_left(self._sorted_names, (text.split("\t")[0], customer_id))
+            del self._sorted_names[pos]
+        prefixes, trigrams = self._keys(text)
+        for index, keys in ((self._prefixes, prefixes), (self._trigrams, trigrams)):
+            for key in keys:
+                ids = index.get(key)
+                if ids is None:
+                    continue
+                pos = bisect.bisect_left(ids, customer_id)
+                if pos < len(ids) and ids[pos] == customer_id:
+                    del ids[pos]
+                if not ids:
+                    del index[key]
+
+    def clear(self):
+        self._built = False
+        self._text.clear()
+        self._sorted_names.clear()
+        self._sorted_dirty = False
+        self._prefixes.clear()
+        self._trigrams.clear()
+
+    def _postings(self, term: str):
+        """Kleinste lijst kandidaten die de term zeker bevat."""
+        if len(term) < self.MIN_TRIGRAM:
+            return self._prefixes.get(term, ())
+        best = None
+        for i in range(len(term) - 2):
+            ids = self._trigrams.get(term[i:i + 3])
+            if not ids:
+                return ()
+            if best is None or len(ids) < len(best):
+                best = ids
+        return best
+
+    def _matches(self, cid: int, long_terms, short_terms) -> bool:
+        text = self._text[cid]
+        for term in long_terms:
+            if term not in text:
+                return False
+        if short_terms:
+            words = " " + " ".join(self.TOKEN_RE.findall(text))
+            for term in short_terms:
+                if " " + term not in words:
+                    return False
+        return True
+
+    def search(self, query: str, limit: int = 20) -> list[int]:
+        """Geeft maximaal `limit` klant-id's die bij de zoekterm passen."""
+        query = self._normalize(query)
+        if not query or limit <= 0:
+            return []
+        self._ensure_built()
+        terms = set(query.split())
+        long_terms = [t for t in terms if len(t) >= self.MIN_TRIGRAM]
+        short_terms = [t for t in terms if len(t) < self.MIN_TRIGRAM]
+
+        if self._sorted_dirty:
+            self._sorted_names = sorted((text.split("\t")[0], cid) for cid, text in self._text.items())
+            self._sorted_dirty = False
+
+        # 1. naam begint met de zoekterm (alfabetisch)
+        result = []
+        names = self._sorted_names
+        pos = bisect.bisect_left(names, (query, -1))
+        while pos < len(names) and len(result) < limit:
+            name, cid = names[pos]
+            if not name.startswith(query):
+                break
+            result.append(cid)
+            pos += 1
+        if len(result) >= limit:
+            return result
+
+        # 2. aanvullen vanuit de kleinste postinglijst
+        seen = set(result)
+        postings = min((self._postings(t) for t in terms), key=len)
+        for cid in postings:
+            if cid in seen or not self._matches(cid, long_terms, short_terms):
+                continue
+            result.append(cid)
+            if len(result) >= limit:
+                break
+        return result
+
+
 # ===== BACKEND met CSV =====
 
 class DataStore:
@@ -102,14 +402,115 @@ class DataStore:
 
     DATETIME_FORMAT = "%Y-%m-%d %H:%M"
 
+    # laadvolgorde: accounts eerst, zodat inloggen kan terwijl de rest nog laadt
+    TABLE_FILES = {
+        "accounts": "accounts.csv",
+        "customers": "customers.csv",
+        "stations": "stations.csv",
+        "bikes": "bikes.csv",
+        "repairs": "repairs.csv",
+        "reservations": "reservations.csv",
+    }
+
+    # voortgang melden na zoveel ingelezen rijen
+    PROGRESS_EVERY = 1000
+
+    # methoden die getimed worden als metrics aan staan
+    INSTRUMENTED_METHODS = (
+        "add_customer",
+        "update_customer",
+        "search_customers",
+        "add_station",
+        "add_bike",
+        "move_bike",
+        "get_available_bike",
+        "create_reservation",
+        "update_reservation",
+        "get_reservations_for_customer",
+        "get_all_reservations",
+        "delete_reservation",
+        "report_defect",
+        "get_all_repairs",
+        "fix_bike_from_repair",
+        "delete_repair",
+        "authenticate",
+        "login",
+        "authenticate_token",
+        "save_to_csv",
+        "load_from_csv",
+    )
+
     def __init__(self):
         self.customers: dict[int, Customer] = {}
+        self.stations: dict[int, Station] = {}
         self.bikes: dict[int, Bike] = {}
         self.reservations: dict[int, Reservation] = {}
         self.repairs: dict[int, Repair] = {}
         self.accounts: dict[str, UserAccount] = {}
 
+        self.customer_index = CustomerSearchIndex(self.customers)
+
+        # tabellen die volledig ingelezen zijn (zie load_from_csv)
+        self.loaded_tables: set[str] = set(self.TABLE_FILES)
+        self.load_finished = threading.Event()
+        self.load_finished.set()
+        self._progress = None
+
+        # stand van de CSV-map bij laden/opslaan, voor het samenvoegen (save_to_csv)
+        self._base_folder: str | None = None
+        self._base_versions: dict[str, int] = {}
+        self._base_rows: dict[str, dict] = {}
+        self._file_stats: dict[str, tuple | None] = {}
+        self._needs_merge: set[str] = set()
+        # met bulk_delete verwijderde ids (compact, zonder samenvoegbasis), tot de volgende save
+        self._evicted: dict[str, array | list] = {}
+
+        # wijzigingsfeed: oplopend volgnummer per wijziging (zie changes_since)
+        self.change_seq = 0
+        self._change_log: list[Change] = []
+        self._change_log_start = 1
+        self._row_versions: dict[tuple, int] = {}
+        self._table_seq: dict[str, int] = {}
+        self._loaded_seq = 0
+        self._subscribers = []
+
+        # copy-on-write kopieën voor snapshots; pas opgebouwd bij de eerste snapshot()
+        self._cow: dict[str, CowMap] | None = None
+        self._cow_seq = 0
+        self._snapshot_lock = threading.Lock()
+        # slot van de schrijvers: wie vanuit meerdere threads met de store werkt, houdt
+        # dit vast tijdens schrijven (BikerApp via UiExecutor.lock); de eerste snapshot()
+        # neemt het om de tabellen te kopiëren
+        self.write_lock = threading.RLock()
+
+        # afgeleide indexen, bijgewerkt via _record_change
+        self._bike_bookings: dict[int, list[tuple[datetime, datetime, int]]] = {}
+        self._res_index_keys: dict[int, tuple] = {}
+        # reserveringen per start- en einddag (bezorgplanning, rapportages)
+        self._res_by_start_day: dict[date, set[int]] = {}
+        self._res_by_end_day: dict[date, set[int]] = {}
+        # langste geïndexeerde boeking (wordt niet kleiner bij verwijderen), begrenst _bike_is_free
+        self._longest_booking = timedelta(0)
+        # beschikbare fietsen per (station_id, type): min-heap van bike_ids met lazy
+        # deletion; _available_key[bike_id] is de geldige sleutel van een beschikbare fiets
+        self._available_heaps: dict[tuple, list[int]] = {}
+        self._available_key: dict[int, tuple] = {}
+
+        # vraaggestuurde prijzen, standaard uit (zie pricing.DynamicPricing)
+        self.pricing = None
+
+        # sessies na login en mislukte pogingen per gebruiker (zie security.py)
+        self.sessions = SessionCache()
+        self.login_throttle = LoginThrottle()
+
+        # bevindingen van de consistentiecontrole bij het laatste laden
+        self.consistency_issues: list[ConsistencyIssue] = []
+
+        # instrumentatie, standaard uit (zie enable_metrics)
+        self.metrics: Metrics | None = None
+
         self.next_customer_id = 1
+        self.next_station_id = 1
         self.next_bike_id = 1
         self.next_reservation_id = 1
         self.next_repair_id = 1
@@ -132,37 +533,190 @@ class DataStore:
             delivery_address = delivery_address
         )
         self.customers[self.next_customer_id] = customer
+        self.customer_index.add(customer)
         self.next_customer_id += 1
+        self._record_change("customers", "insert", customer.customer_id)
         return customer
 
+    def update_customer(self, customer_id: int, **changes) -> Customer:
+        """Wijzig klantgegevens (naam, email, iban, delivery_address) en werk de zoekindex bij."""
+        if customer_id not in self.customers:
+            raise ValueError("Onbekende klant.")
+        customer = self.customers[customer_id]
+        for name in changes:
+            if name not in ("name", "email", "iban", "delivery_address"):
+                raise ValueError(f"Onbekend klantveld: {name}")
+        for name, value in changes.items():
+            setattr(customer, name, value)
+        self.customer_index.add(customer)
+        self._record_change("customers", "update", customer_id)
+        return customer
+
+    def search_customers(self, query: str, limit: int = 20) -> list[Customer]:
+        """Type-ahead zoeken op naam en e-mail."""
+        return [self.customers[cid] for cid in self.customer_index.search(query, limit)]
+
+    # --- stations ---
+
+    def add_station(self, name: str, address: str = "", capacity: int = 0) -> Station:
+        station = Station(
+            station_id=self.next_station_id,
+            name=name,
+            address=address,
+            capacity=capacity,
+        )
+        self.stations[self.next_station_id] = station
+        self.next_station_id += 1
+        self._record_change("stations", "insert", station.station_id)
+        return station
+
+    def rebalancing_report(self, days: int = 7, start: date | None = None,
+                           min_free: int = 1) -> list[StationShortage]:
+        """
+        Stations die de komende `days` dagen minder dan `min_free` vrije fietsen
+        van een type hebben, met zo mogelijk een station met overschot als donor.
+        Per fiets worden alleen de boekingen in de periode uit de boekingsindex
+        gehaald (bisect); er wordt niet over alle reserveringen gelopen.
+        """
+        if days <= 0:
+            raise ValueError("Aantal dagen moet positief zijn.")
+        start = start or datetime.now().date()
+        first = datetime(start.year, start.month, start.day)
+        horizon_end = first + timedelta(days=days)
+        one_day = timedelta(days=1)
+
+        fleet: dict[tuple, int] = {}
+        booked: dict[tuple, list[int]] = {}
+        for bike in self.bikes.values():
+            if bike.station_id is None or bike.status != BikeStatus.OK:
+                continue
+            key = (bike.station_id, bike.bike_type)
+            fleet[key] = fleet.get(key, 0) + 1
+            counts = booked.setdefault(key, [0] * days)
+            bookings = self._bike_bookings.get(bike.bike_id)
+            if not bookings:
+                continue
+            pos = bisect.bisect_left(bookings, (first,))
+            if pos > 0 and bookings[pos - 1][1] > first:
+                pos -= 1
+            busy = set()
+            while pos < len(bookings) and bookings[pos][0] < horizon_end:
+                b_start, b_end, _ = bookings[pos]
+                lo = max((b_start - first) // one_day, 0)
+                hi = min(-((first - b_end) // one_day) - 1, days - 1)
+                busy.update(range(lo, hi + 1))
+                pos += 1
+            for i in busy:
+                counts[i] += 1
+
+        shortages = []
+        for i in range(days):
+            day = start + timedelta(days=i)
+            free = {key: fleet[key] - booked[key][i] for key in fleet}
+            for (station_id, bike_type), n_free in sorted(free.items(), key=lambda kv: (kv[0][0], kv[0][1].name)):
+                if n_free >= min_free:
+                    continue
+                donors = [
+                    (f, sid) for (sid, t), f in free.items()
+                    if t == bike_type and sid != station_id and f > min_free
+                ]
+                donor = max(donors, key=lambda d: (d[0], -d[1]))[1] if donors else None
+                shortages.append(StationShortage(
+                    station_id=station_id,
+                    bike_type=bike_type,
+                    day=day,
+                    fleet=fleet[(station_id, bike_type)],
+                    booked=booked[(station_id, bike_type)][i],
+                    free=n_free,
+                    donor_station_id=donor,
+                ))
+        return shortages
+
     # --- fietsen ---
 
-    def add_bike(self, bike_type: BikeType, status: BikeStatus = BikeStatus.OK) -> Bike:
+    def add_bike(self, bike_type: BikeType, status: BikeStatus = BikeStatus.OK,
+                 station_id: int | None = None) -> Bike:
+        if station_id is not None and station_id not in self.stations:
+            raise ValueError("Onbekend station.")
         bike = Bike(
             bike_id=self.next_bike_id,
             bike_type=bike_type,
             status=status,
             available=True,
+            station_id=station_id,
         )
         self.bikes[self.next_bike_id] = bike
         self.next_bike_id += 1
+        self._record_change("bikes", "insert", bike.bike_id)
         return bike
 
-    def get_available_bike(self, bike_type: BikeType):
-        """Returns available bike status for given bike_type."""
-        for bike in self.bikes.values():
-            if (
-                bike.bike_type == bike_type
-                and bike.status == BikeStatus.OK
-                and bike.available
-            ):
-                return bike
+    def move_bike(self, bike_id: int, station_id: int | None) -> Bike:
+        """Fiets naar een ander station verplaatsen (herverdeling)."""
+        if bike_id not in self.bikes:
+            raise ValueError("Onbekende fiets.")
+        if station_id is not None and station_id not in self.stations:
+            raise ValueError("Onbekend station.")
+        bike = self.bikes[bike_id]
+        bike.station_id = station_id
+        self._record_change("bikes", "update", bike_id)
+        return bike
+
+    def mark_bike_ok(self, bike_id: int) -> Bike:
+        """
+        Fiets handmatig weer OK maken (Fietsen-tab beheerder); beschikbaar als ze
+        geen lopende of toekomstige reservering heeft (zie _refresh_available).
+        """
+        if bike_id not in self.bikes:
+            raise ValueError("Onbekende fiets.")
+        bike = self.bikes[bike_id]
+        bike.status = BikeStatus.OK
+        bike.available = not self._bike_busy(bike_id)
+        self._record_change("bikes", "update", bike_id)
+        return bike
+
+    def get_available_bike(self, bike_type: BikeType, station_id: int | None = None):
+        """
+        Beschikbare fiets (OK en vrij) van dit type, met het laagste id; alleen op
+        `station_id` als dat gegeven is. O(log n) via de beschikbaarheidsindex.
+        """
+        if station_id is not None:
+            return self._peek_available((station_id, bike_type))
+        best = None
+        for key in list(self._available_heaps):
+            if key[1] != bike_type:
+                continue
+            bike = self._peek_available(key)
+            if bike is not None and (best is None or bike.bike_id < best.bike_id):
+                best = bike
+        return best
+
+    def _peek_available(self, key: tuple):
+        heap = self._available_heaps.get(key)
+        while heap:
+            bike_id = heap[0]
+            if self._available_key.get(bike_id) == key:
+                return self.bikes[bike_id]
+            heapq.heappop(heap)     # verouderd item (fiets bezet, defect of verplaatst)
         return None
 
+    def _index_bike(self, bike_id: int):
+        """Beschikbaarheidsindex voor één fiets bijwerken (na insert/update/delete)."""
+        bike = self.bikes.get(bike_id)
+        if bike is None or bike.status != BikeStatus.OK or not bike.available:
+            self._available_key.pop(bike_id, None)
+            return
+        key = (bike.station_id, bike.bike_type)
+        if self._available_key.get(bike_id) != key:
+            self._available_key[bike_id] = key
+            heapq.heappush(self._available_heaps.setdefault(key, []), bike_id)
+
     # --- reservaties ---
 
-    def _calculate_price(self, bike_type: BikeType, start: datetime, end: datetime) -> float:
-        """Prijs berekening."""
+    def _calculate_price(self, bike_type: BikeType, start: datetime, end: datetime,
+                         ignore_id: int | None = None) -> float:
+        """Prijs berekening; met vraaggestuurde prijzen aan (pricing.py) via de bezetting."""
+        if self.pricing is not None:
+            return self.pricing.price(bike_type, start, end, ignore_id)
         base_price = self.BASE_PRICE_PER_DAY[bike_type]
         delta = end - start
         days = delta.days
@@ -170,6 +724,11 @@ class DataStore:
             days = 1
         return round(base_price * days, 2)
 
+    def quote_price(self, bike_type: BikeType, start: datetime, end: datetime,
+                    reservation_id: int | None = None) -> float:
+        """Prijs zonder te boeken; reservation_id = reservering die gewijzigd wordt."""
+        return self._calculate_price(bike_type, start, end, reservation_id)
+
     def create_reservation(
         self,
         customer_id: int,
@@ -178,12 +737,17 @@ class DataStore:
         end: datetime,
         location_type: LocationType,
         address: str = "",
+        station_id: int | None = None,
     ) -> Reservation:
         if customer_id not in self.customers:
             raise ValueError("Onbekende klant.")
+        if station_id is not None and station_id not in self.stations:
+            raise ValueError("Onbekend station.")
 
-        bike = self.get_available_bike(bike_type)
+        bike = self.get_available_bike(bike_type, station_id)
         if bike is None:
+            if station_id is not None:
+                raise ValueError("Geen beschikbare fiets van dit type op dit station (OK en vrij).")
             raise ValueError("Geen beschikbare fiets van dit type (OK en vrij).")
 
         price = self._calculate_price(bike_type, start, end)
@@ -204,6 +768,8 @@ class DataStore:
         bike.available = False
         self.reservations[self.next_reservation_id] = reservation
         self.next_reservation_id += 1
+        self._record_change("reservations", "insert", reservation.reservation_id)
+        self._record_change("bikes", "update", bike.bike_id)
         return reservation
 
     def get_reservations_for_customer(self, customer_id: int, only_current_and_future: bool = True):
@@ -211,37 +777,261 @@ class DataStore:
         Geeft reserveringen voor deze klant.
         Standaard alleen actuele en toekomstige reserveringen (US3).
         """
-        now = datetime.now()
-        result = []
-        for r in self.reservations.values():
-            if r.customer_id != customer_id:
-                continue
-            # alleen actuele en toekomstige reserveringen:
-            # - toekomstige: r.end > nu
-            # - lopend: r.start <= nu <= r.end
-            if only_current_and_future:
-                if r.end < now:
-                    continue
-            result.append(r)
+        # alleen actuele en toekomstige reserveringen:
+        # - toekomstige: r.end > nu
+        # - lopend: r.start <= nu <= r.end
+        end_from = datetime.now() if only_current_and_future else None
+        return list(self.iter_reservations(customer_id=customer_id, end_from=end_from))
 
-        return result
+    def get_reservation(self, reservation_id: int):
+        return self.reservations.get(reservation_id)
 
     def get_all_reservations(self):
         return list(self.reservations.values())
 
+    def iter_reservations(self, customer_id: int | None = None, bike_id: int | None = None,
+                          bike_type: BikeType | None = None, status=None,
+                          start_from: datetime | None = None, start_before: datetime | None = None,
+                          end_from: datetime | None = None, where=None):
+        """
+        Reserveringen één voor één (generator, geen lijstkopie), gefilterd tijdens het
+        itereren: start_from <= start < start_before, end >= end_from; `status` is één
+        status of een verzameling, `where` een extra predicaat.
+        Met bike_id en een status-filter zonder GEANNULEERD wordt alleen de boekingsindex
+        van die fiets doorlopen (op begintijd, begrensd met bisect).
+        De store niet wijzigen tijdens het itereren; gebruik daarvoor snapshot().
+        """
+        statuses = None
+        if status is not None:
+            statuses = {status} if isinstance(status, ReservationStatus) else set(status)
+
+        if bike_id is not None and statuses is not None and ReservationStatus.GEANNULEERD not in statuses:
+            bookings = self._bike_bookings.get(bike_id, [])
+            lo = bisect.bisect_left(bookings, (start_from,)) if start_from is not None else 0
+            hi = bisect.bisect_left(bookings, (start_before,)) if start_before is not None else len(bookings)
+            reservations = self.reservations
+            candidates = (reservations[rid] for _, _, rid in bookings[lo:hi])
+        else:
+            candidates = self.reservations.values()
+
+        for r in candidates:
+            if customer_id is not None and r.customer_id != customer_id:
+                continue
+            if bike_id is not None and r.bike_id != bike_id:
+                continue
+            if bike_type is not None and r.bike_type != bike_type:
+                continue
+            if statuses is not None and r.status not in statuses:
+                continue
+            if start_from is not None and r.start < start_from:
+                continue
+            if start_before is not None and r.start >= start_before:
+                continue
+            if end_from is not None and r.end < end_from:
+                continue
+            if where is not None and not where(r):
+                continue
+            yield r
+
+    def reservations_starting_on(self, day: date) -> list[Reservation]:
+        """Niet-geannuleerde reserveringen die op `day` beginnen, op begintijd."""
+        ids = self._res_by_start_day.get(day, ())
+        return sorted((self.reservations[rid] for rid in ids), key=lambda r: (r.start, r.reservation_id))
+
+    def reservations_ending_on(self, day: date) -> list[Reservation]:
+        """Niet-geannuleerde reserveringen die op `day` eindigen, op eindtijd."""
+        ids = self._res_by_end_day.get(day, ())
+        return sorted((self.reservations[rid] for rid in ids), key=lambda r: (r.end, r.reservation_id))
+
+    # velden die update_reservation mag wijzigen
+    UPDATABLE_RESERVATION_FIELDS = ("start", "end", "location_type", "address", "bike_type", "status")
+
+    def update_reservation(self, reservation_id: int, **changes) -> Reservation:
+        """
+        Wijzig een reservering (start, end, location_type, address, bike_type, status).
+        Alleen het nieuwe deel van de periode wordt tegen de boekingen van de fiets
+        gecontroleerd; is de fiets dan niet vrij, dan wordt een vrije fiets van
+        hetzelfde type gezocht. Prijs wordt opnieuw berekend; `available` van de
+        oude en nieuwe fiets volgt uit hun boekingen (ook bij afronden/heractiveren).
+        """
+        if reservation_id not in self.reservations:
+            raise ValueError("Onbekende reservering.")
+        for name in changes:
+            if name not in self.UPDATABLE_RESERVATION_FIELDS:
+                raise ValueError(f"Onbekend reserveringsveld: {name}")
+
+        r = self.reservations[reservation_id]
+        start = changes.get("start", r.start)
+        end = changes.get("end", r.end)
+        bike_type = changes.get("bike_type", r.bike_type)
+        location_type = changes.get("location_type", r.location_type)
+        address = changes.get("address", r.address)
+        status = changes.get("status", r.status)
+        if end <= start:
+            raise ValueError("Einde moet na de start liggen.")
+
+        bike_id = r.bike_id
+        if status != ReservationStatus.GEANNULEERD:
+            same_bike_ok = (
+                bike_type == r.bike_type
+                and bike_id in self.bikes
+                and self.bikes[bike_id].status == BikeStatus.OK
+            )
+            if same_bike_ok and r.status != ReservationStatus.GEANNULEERD:
+                # alleen de nieuwe stukken van de periode controleren
+                intervals = self._delta_intervals(r.start, r.end, start, end)
+            else:
+                intervals = [(start, end)]
+            if not same_bike_ok or not all(
+                self._bike_is_free(bike_id, s, e, reservation_id) for s, e in intervals
+            ):
+                bike = self._find_free_bike(bike_type, start, end, reservation_id)
+                if bike is None:
+                    raise ValueError("Geen beschikbare fiets van dit type voor deze periode.")
+                bike_id = bike.bike_id
+
+        old_bike_id = r.bike_id
+        r.start = start
+        r.end = end
+        r.bike_type = bike_type
+        r.location_type = location_type
+        r.address = address if location_type == LocationType.BEZORGEN else ""
+        r.status = status
+        r.bike_id = bike_id
+        r.total_price = self._calculate_price(bike_type, start, end, reservation_id)
+        self._record_change("reservations", "update", reservation_id)
+
+        # oude en nieuwe fiets: bezet zolang er nog een actieve boeking op staat
+        self._refresh_available(bike_id)
+        if old_bike_id != bike_id:
+            self._refresh_available(old_bike_id)
+        return r
+
+    @staticmethod
+    def _delta_intervals(old_start, old_end, new_start, new_end):
+        """Delen van [new_start, new_end) die niet al in [old_start, old_end) vielen."""
+        if new_end <= old_start or new_start >= old_end:
+            return [(new_start, new_end)]
+        parts = []
+        if new_start < old_start:
+            parts.append((new_start, old_start))
+        if new_end > old_end:
+            parts.append((old_end, new_end))
+        return parts
+
+    def _bike_is_free(self, bike_id: int, start: datetime, end: datetime, ignore_id: int | None = None) -> bool:
+        """O(log n + k) via de gesorteerde boekingen van deze fiets."""
+        bookings = self._bike_bookings.get(bike_id)
+        if not bookings:
+            return True
+        # eerste boeking die pas na `end` begint; alleen de voorgangers kunnen overlappen.
+        # Oude gegevens kunnen zelf overlappen, dus niet bij de eerste vrije stoppen maar
+        # pas als een boeking zo vroeg begint dat ze ook als langste boeking vóór `start` eindigt
+        horizon = start - self._longest_booking
+        pos = bisect.bisect_left(bookings, (end,))
+        while pos > 0:
+            pos -= 1
+            b_start, b_end, rid = bookings[pos]
+            if b_start <= horizon:
+                break
+            if rid != ignore_id and b_end > start:
+                return False
+        return True
+
+    def _bike_busy(self, bike_id: int, now: datetime | None = None) -> bool:
+        """Heeft de fiets een actieve reservering (niet geannuleerd/afgerond) die na `now` eindigt?"""
+        now = now or datetime.now()
+        inactive = self.INACTIVE_RESERVATION_STATUSES
+        return any(
+            end > now and self.reservations[rid].status not in inactive
+            for _, end, rid in self._bike_bookings.get(bike_id, ())
+        )
+
+    def _refresh_available(self, bike_id: int, now: datetime | None = None):
+        """
+        `available` opnieuw afleiden: status OK en niet bezet (zelfde regel als
+        check_consistency en laden). Gebruikt na verwijderen, wijzigen en repareren.
+        """
+        bike = self.bikes.get(bike_id)
+        if bike is None:
+            return
+        expected = bike.status == BikeStatus.OK and not self._bike_busy(bike_id, now)
+        if bike.available != expected:
+            bike.available = expected
+            self._record_change("bikes", "update", bike_id)
+
+    def _find_free_bike(self, bike_type: BikeType, start: datetime, end: datetime, ignore_id: int | None = None):
+        for bike in self.bikes.values():
+            if (
+                bike.bike_type == bike_type
+                and bike.status == BikeStatus.OK
+                and self._bike_is_free(bike.bike_id, start, end, ignore_id)
+            ):
+                return bike
+        return None
+
+    # --- afgeleide indexen ---
+
+    def _index_reservation(self, reservation_id: int):
+        """Boekingsindex voor één reservering bijwerken (na insert/update/delete)."""
+        old = self._res_index_keys.pop(reservation_id, None)
+        if old is not None:
+            bike_id, start, end = old
+            bookings = self._bike_bookings.get(bike_id, [])
+            pos = bisect.bisect_left(bookings, (start, end, reservation_id))
+            if pos < len(bookings) and bookings[pos][2] == reservation_id:
+                del bookings[pos]
+            self._res_by_start_day.get(start.date(), set()).discard(reservation_id)
+            self._res_by_end_day.get(end.date(), set()).discard(reservation_id)
+        r = self.reservations.get(reservation_id)
+        if r is None or r.status == ReservationStatus.GEANNULEERD:
+            return
+        bisect.insort(self._bike_bookings.setdefault(r.bike_id, []), (r.start, r.end, reservation_id))
+        if r.end - r.start > self._longest_booking:
+            self._longest_booking = r.end - r.start
+        self._res_index_keys[reservation_id] = (r.bike_id, r.start, r.end)
+        self._res_by_start_day.setdefault(r.start.date(), set()).add(reservation_id)
+        self._res_by_end_day.setdefault(r.end.date(), set()).add(reservation_id)
+
+    def _rebuild_indexes(self):
+        """Alle afgeleide indexen in één keer opbouwen (na laden)."""
+        self._bike_bookings = {}
+        self._res_index_keys = {}
+        self._res_by_start_day = {}
+        self._res_by_end_day = {}
+        self._longest_booking = timedelta(0)
+        for rid, r in self.reservations.items():
+            if r.status == ReservationStatus.GEANNULEERD:
+                continue
+            self._bike_bookings.setdefault(r.bike_id, []).append((r.start, r.end, rid))
+            if r.end - r.start > self._longest_booking:
+                self._longest_booking = r.end - r.start
+            self._res_index_keys[rid] = (r.bike_id, r.start, r.end)
+            self._res_by_start_day.setdefault(r.start.date(), set()).add(rid)
+            self._res_by_end_day.setdefault(r.end.date(), set()).add(rid)
+        for bookings in self._bike_bookings.values():
+            bookings.sort()
+        self._available_heaps = {}
+        self._available_key = {}
+        for bike_id, bike in self.bikes.items():
+            if bike.status == BikeStatus.OK and bike.available:
+                key = (bike.station_id, bike.bike_type)
+                self._available_key[bike_id] = key
+                self._available_heaps.setdefault(key, []).append(bike_id)
+        for heap in self._available_heaps.values():
+            heapq.heapify(heap)
+
     def delete_reservation(self, reservation_id: int):
         """Verwijdert een reservering en maak gekoppelde fiets weer beschikbaar"""
         if reservation_id not in self.reservations:
             raise ValueError("Onbekende reservering.")
 
         res = self.reservations.pop(reservation_id)
+        self._record_change("reservations", "delete", reservation_id, obj=res)
 
-        # gekoppelde fiets weer vrijgeven (indien bekend)
-        if res.bike_id in self.bikes:
-            bike = self.bikes[res.bike_id]
-    #         alleen vrijgeven als de fiets niet defect is
-            if bike.status == BikeStatus.OK:
-                bike.available = True
+        # gekoppelde fiets weer vrijgeven (indien bekend), alleen als ze niet defect is
+        # en geen andere actieve boeking meer heeft
+        self._refresh_available(res.bike_id)
 
     # --- reparaties ---
 
@@ -266,11 +1056,24 @@ class DataStore:
 
         self.repairs[self.next_repair_id] = repair
         self.next_repair_id += 1
+        self._record_change("repairs", "insert", repair.repair_id)
+        self._record_change("bikes", "update", bike.bike_id)
         return repair
 
     def get_all_repairs(self):
         return list(self.repairs.values())
 
+    def iter_repairs(self, bike_id: int | None = None, reservation_id: int | None = None, where=None):
+        """Reparaties één voor één (generator), zie iter_reservations."""
+        for rep in self.repairs.values():
+            if bike_id is not None and rep.bike_id != bike_id:
+                continue
+            if reservation_id is not None and rep.reservation_id != reservation_id:
+                continue
+            if where is not None and not where(rep):
+                continue
+            yield rep
+
     def fix_bike_from_repair(self, repair_id: int):
         """Простая логика для Monteur: по repair_id пометить велосипед как OK и доступный."""
         if repair_id not in self.repairs:
@@ -281,7 +1084,14 @@ class DataStore:
             raise ValueError("Onbekende fiets.")
         bike = self.bikes[bike_id]
         bike.status = BikeStatus.OK
-        bike.available = True
+        bike.available = not self._bike_busy(bike_id)
+        self._record_change("bikes", "update", bike_id)
+
+    def delete_repair(self, repair_id: int):
+        if repair_id not in self.repairs:
+            raise ValueError("Onbekende reparatie.")
+        repair = self.repairs.pop(repair_id)
+        self._record_change("repairs", "delete", repair_id, obj=repair)
 
     # --- accounts / login ---
 
@@ -292,268 +1102,1073 @@ class DataStore:
         role: Role,
         customer_id: int | None = None,
     ) -> UserAccount:
+        if not is_hashed(password):
+            password = hash_password(password)
         acc = UserAccount(username=username, password=password, role=role, customer_id=customer_id)
+        op = "update" if username in self.accounts else "insert"
         self.accounts[username] = acc
+        self.sessions.revoke_user(username)
+        self._record_change("accounts", op, username)
         return acc
 
+    def get_account(self, username: str):
+        return self.accounts.get(username)
+
     def authenticate(self, username: str, password: str, role: Role):
+        """
+        Account bij een geldige combinatie, anders None. Na te veel mislukte
+        pogingen wordt er geweigerd zonder te hashen (zie login_throttle).
+        Onbekende naam of verkeerde rol kost even lang als een fout wachtwoord.
+        Een leesbaar opgeslagen wachtwoord wordt na een geslaagde login gehasht.
+        """
+        if self.login_throttle.retry_after(username) > 0:
+            return None
         acc = self.accounts.get(username)
+        valid = verify_password(password, acc.password if acc is not None else dummy_hash())
+        if acc is None or not valid or acc.role != role:
+            self.login_throttle.failure(username)
+            return None
+        self.login_throttle.success(username)
+        if needs_rehash(acc.password):
+            acc.password = hash_password(password)
+            self._record_change("accounts", "update", username)
+        return acc
+
+    def login(self, username: str, password: str, role: Role) -> str | None:
+        """Als authenticate, maar geeft een sessietoken terug (zie authenticate_token)."""
+        acc = self.authenticate(username, password, role)
         if acc is None:
             return None
-        if acc.password != password:
+        return self.sessions.issue(acc.username, acc.password)
+
+    def authenticate_token(self, token: str):
+        """Account bij een geldig, niet verlopen sessietoken; geen sleutelafleiding."""
+        session = self.sessions.get(token)
+        if session is None:
             return None
-        if acc.role != role:
+        acc = self.accounts.get(session.username)
+        if acc is None or acc.password != session.password:
+            self.sessions.revoke(token)
             return None
         return acc
 
-    # ====== CSV: opslaan en import ======
+    def logout(self, token: str):
+        self.sessions.revoke(token)
 
-    def save_to_csv(self, folder: str = "."):
-        os.makedirs(folder, exist_ok=True)
-        self._save_customers_csv(os.path.join(folder, "customers.csv"))
-        self._save_bikes_csv(os.path.join(folder, "bikes.csv"))
-        self._save_reservations_csv(os.path.join(folder, "reservations.csv"))
-        self._save_repairs_csv(os.path.join(folder, "repairs.csv"))
-        self._save_accounts_csv(os.path.join(folder, "accounts.csv"))
+    # --- consistentie ---
 
-    def load_from_csv(self, folder: str = "."):
-        self.customers.clear()
-        self.bikes.clear()
-        self.reservations.clear()
-        self.repairs.clear()
-        self.accounts.clear()
+    # reserveringen met deze status houden een fiets niet (meer) bezet
+    INACTIVE_RESERVATION_STATUSES = (ReservationStatus.GEANNULEERD, ReservationStatus.AFGEROND)
 
-        self.next_customer_id = 1
-        self.next_bike_id = 1
-        self.next_reservation_id = 1
-        self.next_repair_id = 1
+    def check_consistency(self, fix: bool = True, now: datetime | None = None) -> list[ConsistencyIssue]:
+        """
+        Controle van de afgeleide gegevens in één ronde over de boekingsindex
+        (per fiets op start gesorteerd, dus O(n log n) inclusief het opbouwen):
+        - per fiets een sweep line over de boekingen: overlappende reserveringen;
+        - `available` wordt per fiets opnieuw bepaald: status OK en geen actieve
+          reservering (niet geannuleerd/afgerond en nog niet afgelopen op `now`);
+        - reserveringen en reparaties met een onbekende klant, fiets of reservering.
+        Met fix=True wordt `available` gecorrigeerd (als gewone wijziging in de feed).
+        """
+        now = now or datetime.now()
+        issues = []
+
+        for bike_id, bookings in sorted(self._bike_bookings.items()):
+            if bike_id not in self.bikes:
+                for _, _, rid in bookings:
+                    issues.append(ConsistencyIssue(
+                        "dangling_bike", "reservations", rid,
+                        f"Reservering #{rid} verwijst naar onbekende fiets #{bike_id}.",
+                    ))
+                continue
+            last_end, last_rid = None, None
+            for start, end, rid in bookings:
+                if last_end is not None and start < last_end:
+                    issues.append(ConsistencyIssue(
+                        "overlap", "reservations", rid,
+                        f"Reservering #{rid} overlapt met #{last_rid} op fiets #{bike_id}.",
+                    ))
+                if last_end is None or end > last_end:
+                    last_end, last_rid = end, rid
+
+        for bike_id, bike in self.bikes.items():
+            expected = bike.status == BikeStatus.OK and not self._bike_busy(bike_id, now)
+            if bike.available == expected:
+                continue
+            issues.append(ConsistencyIssue(
+                "availability", "bikes", bike_id,
+                f"Fiets #{bike_id} staat als {'vrij' if bike.available else 'bezet'}, "
+                f"maar is {'vrij' if expected else 'bezet'}.",
+                fixed=fix,
+            ))
+            if fix:
+                bike.available = expected
+                self._record_change("bikes", "update", bike_id)
+
+        for rid, r in self.reservations.items():
+            if r.customer_id not in self.customers:
+                issues.append(ConsistencyIssue(
+                    "dangling_customer", "reservations", rid,
+                    f"Reservering #{rid} verwijst naar onbekende klant #{r.customer_id}.",
+                ))
+        for repair_id, repair in self.repairs.items():
+            if repair.bike_id not in self.bikes:
+                issues.append(ConsistencyIssue(
+                    "dangling_bike", "repairs", repair_id,
+                    f"Reparatie #{repair_id} verwijst naar onbekende fiets #{repair.bike_id}.",
+                ))
+            if repair.reservation_id not in self.reservations:
+                issues.append(ConsistencyIssue(
+                    "dangling_reservation", "repairs", repair_id,
+                    f"Reparatie #{repair_id} verwijst naar onbekende reservering #{repair.reservation_id}.",
+                ))
+        return issues
+
+    # --- bulk-import ---
+
+    def bulk_insert(self, table: str, objects: list):
+        """
+        Veel nieuwe rijen in één keer toevoegen (zie bulk_import.py). Ids moeten
+        vrij zijn. In de wijzigingsfeed komt één compacte bulk_insert met de ids;
+        de indexen worden per blok bijgewerkt (zie _record_bulk).
+        """
+        if not objects:
+            return
+        items = self._table(table)
+        key_field = self.TABLE_KEYS[table]
+        ids = [getattr(obj, key_field) for obj in objects]
+        for key in ids:
+            if key in items:
+                raise ValueError(f"{table}: id {key} bestaat al.")
+        items.update(zip(ids, objects))
+        if table == "customers":
+            self.customer_index.add_many(objects)
+        self._reset_next_ids()
+        self._record_bulk(table, "bulk_insert", ids)
+
+    def bulk_delete(self, table: str, keys) -> list:
+        """
+        Veel rijen in één keer verwijderen (archiveren, zie memory.py); tegenhanger
+        van bulk_insert. Bedoeld om geheugen vrij te maken: in de feed komt één
+        compacte bulk_delete met de ids (geen rij per id), en rijversies en
+        samenvoegbasis van de rijen worden opgeruimd. Geeft de verwijderde rijen terug.
+        """
+        items = self._table(table)
+        base = self._base_rows.get(table, {})
+        removed = []
+        for key in keys:
+            obj = items.pop(key, None)
+            if obj is None:
+                continue
+            removed.append(obj)
+            base.pop(key, None)
+            if table == "customers":
+                self.customer_index.remove(key)
+        if not removed:
+            return removed
+
+        key_field = self.TABLE_KEYS[table]
+        ids = [getattr(obj, key_field) for obj in removed]
+        # save_to_csv moet ze zonder samenvoegbasis nog als verwijderd herkennen
+        self._evicted.setdefault(table, [] if table == "accounts" else array("I")).extend(ids)
+        self._record_bulk(table, "bulk_delete", ids)
+        return removed
+
+    def _record_bulk(self, table: str, op: str, ids: list):
+        """
+        Eén wijziging (bulk_insert / bulk_delete) voor veel rijen: key is de lijst
+        met ids, zonder rijen. Afgeleide indexen worden één keer bijgewerkt in
+        plaats van per rij.
+        """
+        self.change_seq += 1
+        seq = self.change_seq
+        change = Change(seq=seq, table=table, op=op, key=ids, row=None, ts=time.time())
+        self._change_log.append(change)
+        versions = self._row_versions
+        if op == "bulk_delete":
+            # verwijderd: geen versie meer bijhouden (scheelt geheugen bij archiveren)
+            for key in ids:
+                versions.pop((table, key), None)
+        else:
+            versions.update(((table, key), seq) for key in ids)
+        self._table_seq[table] = seq
+        if table == "reservations":
+            self._rebuild_indexes()
+        elif table == "bikes":
+            for key in ids:
+                self._index_bike(key)
+        if self._cow is not None and table in self._cow:
+            self._build_cow()
+        for callback in self._subscribers:
+            callback(change)
+
+    # --- wijzigingsfeed (change data capture) ---
+
+    def _record_change(self, table: str, op: str, key, obj=None, origin: str = "local"):
+        """
+        Leg een wijziging vast met een oplopend volgnummer. `obj` is nodig bij
+        'delete' (de rij bestaat dan niet meer in de tabel).
+        """
+        self.change_seq += 1
+        seq = self.change_seq
+        if obj is None and op != "reload":
+            obj = self._table(table).get(key)
+        row = None
+        if obj is not None:
+            row = dict(zip(self.TABLE_COLUMNS[table], self._row_of(table, obj)))
+            if table == "accounts":
+                row.pop("password", None)   # geen wachtwoorden in de feed
+        change = Change(seq=seq, table=table, op=op, key=key, row=row, ts=time.time(), origin=origin)
+        self._change_log.append(change)
+        if op == "reload":
+            self._rebuild_indexes()
+            if self._cow is not None:
+                self._build_cow()
+        else:
+            self._row_versions[(table, key)] = seq
+            self._table_seq[table] = seq
+            if table == "reservations":
+                self._index_reservation(key)
+            elif table == "bikes":
+                self._index_bike(key)
+            if self._cow is not None and table in self._cow:
+                current = self._table(table).get(key)
+                with self._snapshot_lock:
+                    if current is None:
+                        self._cow[table].pop(key)
+                    else:
+                        self._cow[table].set(key, _row_copy(current))
+                    self._cow_seq = seq
+        for callback in self._subscribers:
+            callback(change)
+        return change
+
+    def record_change(self, table: str, key, op: str = "update"):
+        """Voor code die een object direct heeft aangepast: wijziging alsnog vastleggen."""
+        if table not in self.TABLE_COLUMNS:
+            raise ValueError(f"Onbekende tabel: {table}")
+        if op != "delete" and key not in self._table(table):
+            raise ValueError(f"Onbekende rij: {table} #{key}")
+        return self._record_change(table, op, key)
+
+    def changes_since(self, seq: int = 0, tables=None, include_external: bool = True) -> list[Change]:
+        """Alle wijzigingen met volgnummer > seq (O(log n + delta))."""
+        if seq < self._change_log_start - 1:
+            raise ValueError("Wijzigingen zijn al opgeschoond; volledige export nodig.")
+        start = bisect.bisect_right(self._change_log, seq, key=lambda c: c.seq)
+        return [
+            c for c in self._change_log[start:]
+            if (tables is None or c.table in tables or c.op == "reload")
+            and (include_external or c.origin == "local")
+        ]
+
+    def truncate_changes(self, upto_seq: int):
+        """Wijzigingen t/m upto_seq vergeten (bv. als alle afnemers ze verwerkt hebben)."""
+        cut = bisect.bisect_right(self._change_log, upto_seq, key=lambda c: c.seq)
+        del self._change_log[:cut]
+        self._change_log_start = max(self._change_log_start, upto_seq + 1)
+
+    def continue_changes(self, seq: int):
+        """Volgnummers na seq laten doorlopen, bv. na het checkpoint van een eerdere sessie."""
+        if seq > self.change_seq:
+            self.change_seq = seq
+            self._change_log_start = max(self._change_log_start, seq + 1)
+
+    def export_changes_jsonl(self, f, since_seq: int = 0, tables=None,
+                             include_external: bool = False, chunk_size: int = 1000) -> int:
+        """
+        Schrijf de wijzigingen na since_seq als JSON-regels naar een tekstbestand(-object).
+        Geeft het volgnummer tot waar geëxporteerd is terug (checkpoint voor de volgende keer).
+        """
+        upto = self.change_seq
+        buf = []
+        for change in self.changes_since(since_seq, tables, include_external):
+            if change.seq > upto:
+                break
+            if change.op == "reload":
+                continue
+            buf.append(json.dumps(change.to_dict(), ensure_ascii=False))
+            if len(buf) >= chunk_size:
+                f.write("\n".join(buf) + "\n")
+                buf.clear()
+        if buf:
+            f.write("\n".join(buf) + "\n")
+        return max(upto, since_seq)
+
+    def row_version(self, table: str, key) -> int:
+        """Volgnummer van de laatste wijziging van deze rij (of van het laatste laden)."""
+        return self._row_versions.get((table, key), self._loaded_seq)
+
+    def table_version(self, table: str) -> int:
+        return self._table_seq.get(table, self._loaded_seq)
+
+    # --- snapshots (copy-on-write) ---
+
+    SNAPSHOT_TABLES = ("customers", "bikes", "reservations", "repairs")
+
+    def _build_cow(self):
+        # onder het schrijversslot: geen wijziging tussen kopiëren en publiceren
+        with self.write_lock:
+            cow = {
+                table: CowMap((key, _row_copy(obj)) for key, obj in self._table(table).items())
+                for table in self.SNAPSHOT_TABLES
+            }
+            with self._snapshot_lock:
+                self._cow = cow
+                self._cow_seq = self.change_seq
+
+    def snapshot(self) -> StoreSnapshot:
+        """
+        Consistente point-in-time view voor rapportages, bv. vanuit een andere thread.
+        Kost O(n / bucketgrootte); de eerste aanroep bouwt eenmalig de kopieën op
+        (onder write_lock), daarna kopieert elke wijziging alleen de rij en hooguit
+        één gedeelde bucket.
+        """
+        if self._cow is None:
+            with self.write_lock:
+                if self._cow is None:
+                    self._build_cow()
+        with self._snapshot_lock:
+            views = {table: cow.snapshot() for table, cow in self._cow.items()}
+            seq = self._cow_seq
+        return StoreSnapshot(seq, views)
+
+    def subscribe(self, callback):
+        """callback(change) wordt na elke vastgelegde wijziging aangeroepen."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    # --- instrumentatie ---
+
+    def enable_metrics(self) -> Metrics:
+        """
+        Zet instrumentatie aan: de methoden uit INSTRUMENTED_METHODS worden op deze
+        instantie vervangen door getimede versies. Uit = geen wrappers, dus geen kosten.
+        """
+        if self.metrics is None:
+            self.metrics = Metrics()
+            for name in self.INSTRUMENTED_METHODS:
+                setattr(self, name, self.metrics.wrap(name, getattr(self, name)))
+        return self.metrics
+
+    def disable_metrics(self):
+        if self.metrics is None:
+            return
+        for name in self.INSTRUMENTED_METHODS:
+            self.__dict__.pop(name, None)
+        self.metrics = None
+
+    def row_counts(self) -> dict[str, int]:
+        return {
+            "customers": len(self.customers),
+            "stations": len(self.stations),
+            "bikes": len(self.bikes),
+            "reservations": len(self.reservations),
+            "repairs": len(self.repairs),
+            "accounts": len(self.accounts),
+        }
+
+    def export_metrics(self, filename: str | None = None, fmt: str = "json") -> str:
+        """Metrics als JSON of Prometheus-tekst; optioneel (atomisch) naar bestand."""
+        metrics = self.metrics or Metrics()
+        if fmt == "json":
+            text = metrics.to_json(self.row_counts())
+        elif fmt == "prometheus":
+            text = metrics.to_prometheus(self.row_counts())
+        else:
+            raise ValueError(f"Onbekend exportformaat: {fmt}")
+        if filename is not None:
+            Metrics.write_file(filename, text)
+        return text
 
-        self._load_customers_csv(os.path.join(folder, "customers.csv"))
-        self._load_bikes_csv(os.path.join(folder, "bikes.csv"))
-        self._load_reservations_csv(os.path.join(folder, "reservations.csv"))
-        self._load_repairs_csv(os.path.join(folder, "repairs.csv"))
-        self._load_accounts_csv(os.path.join(folder, "accounts.csv"))
+    # ====== CSV: opslaan en import ======
 
-    # --- CSV: customers ---
+    # kolommen per tabel (volgorde zoals in de CSV-bestanden)
+    TABLE_COLUMNS = {
+        "customers": ["customer_id", "name", "email", "iban", "delivery_address"],
+        "stations": ["station_id", "name", "address", "capacity"],
+        "bikes": ["bike_id", "bike_type", "status", "available", "station_id"],
+        "reservations": [
+            "reservation_id",
+            "customer_id",
+            "bike_id",
+            "bike_type",
+            "start",
+            "end",
+            "location_type",
+            "address",
+            "status",
+            "total_price",
+        ],
+        "repairs": ["repair_id", "reservation_id", "bike_id", "defect_type", "description"],
+        "accounts": ["username", "password", "role", "customer_id"],
+    }
 
-    def _save_customers_csv(self, filename: str):
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["customer_id", "name", "email", "iban", "delivery_address"])
-            for c in self.customers.values():
-                writer.writerow([c.customer_id, c.name, c.email, c.iban, c.delivery_address])
+    # volgorde waarin tabellen worden samengevoegd: ouders voor kinderen,
+    # zodat hernummerde id's kunnen doorwerken in verwijzingen
+    MERGE_ORDER = ("customers", "stations", "bikes", "reservations", "repairs", "accounts")
 
-    def _load_customers_csv(self, filename: str):
-        if not os.path.exists(filename):
-            return
-        max_id = 0
-        with open(filename, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                cid = int(row["customer_id"])
-                name = row["name"]
-                email = row.get("name", "")
-                iban = row.get("iban", "")
-                delivery_address = row.get("delivery_address", "")
-
-                self.customers[cid] = Customer(
-                    customer_id=cid,
-                    name=name,
-                    email = email,
-                    iban = iban,
-                    delivery_address = delivery_address,
+    VERSIONS_FILE = "versions.csv"
+    LOCK_FILE = ".biker.lock"
+
+    def save_to_csv(self, folder: str = ".", force: bool = False):
+        """
+        Schrijf alle tabellen naar CSV.
+
+        Is deze map ook door een andere instantie bijgewerkt sinds wij laadden
+        (versienummer in versions.csv verschilt), dan worden onze wijzigingen per
+        rij samengevoegd met wat er nu op schijf staat. Alleen als beide kanten
+        dezelfde rij anders hebben gewijzigd ontstaat een CsvConflictError
+        (er wordt dan niets geschreven); met force=True winnen onze wijzigingen.
+        Nieuwe rijen met een id dat intussen op schijf bestaat krijgen een nieuw id.
+        Botst een van onze reserveringen daarna met een boeking van de andere
+        instantie, dan gaat ze naar een vrije fiets van hetzelfde type; is die er
+        niet, dan ook een CsvConflictError (met force=True blijft de dubbele boeking).
+        """
+        os.makedirs(folder, exist_ok=True)
+        folder_key = os.path.abspath(folder)
+        same_folder = folder_key == self._base_folder
+
+        with self._folder_lock(folder, exclusive=True):
+            disk_versions = self._read_versions(folder)
+            merged_tables = {}
+            conflicts = []
+            moved_bikes = set()
+
+            for table in self.MERGE_ORDER:
+                filename = os.path.join(folder, self.TABLE_FILES[table])
+                # versie gelijk én bestand niet aangeraakt (ook niet door andere tools)
+                unchanged_on_disk = not os.path.exists(filename) or (
+                    disk_versions.get(table, 0) == self._base_versions.get(table, 0)
+                    and self._file_stats.get(table) == self._stat_file(filename)
+                    and table not in self._needs_merge
                 )
+                if not same_folder or unchanged_on_disk:
+                    # niemand anders heeft geschreven (of export naar andere map)
+                    merged_tables[table] = None
+                    continue
 
-                if cid > max_id:
-                    max_id = cid
-        self.next_customer_id = max_id + 1
+                disk = self._read_table_rows(table, filename)
+                base = self._base_rows.get(table, {})
+                if self._evicted.get(table):
+                    # gearchiveerd: alsof de basis gelijk was aan schijf, zodat het een verwijdering blijft
+                    base = dict(base)
+                    for key in self._evicted[table]:
+                        if key in disk:
+                            base[key] = hash(disk[key])
+                if table != "accounts":
+                    self._renumber_new_rows(table, base, disk)
+                ours = {key: self._row_of(table, obj) for key, obj in self._table(table).items()}
+                merged, table_conflicts = self._merge_rows(base, ours, disk)
+                for key in table_conflicts:
+                    conflicts.append((table, key))
+                    if force:
+                        merged[key] = ours.get(key)
+                if table == "reservations":
+                    bikes = merged_tables["bikes"]
+                    bike_rows = bikes[0] if bikes is not None else {
+                        key: self._row_of("bikes", bike) for key, bike in self.bikes.items()
+                    }
+                    unplaced, moved_bikes = self._recheck_bookings(merged, disk, bike_rows)
+                    for key in unplaced:
+                        conflicts.append((table, key))
+                merged_tables[table] = (merged, disk)
+
+            if conflicts and not force:
+                raise CsvConflictError(conflicts)
+
+            # wijzigingen van de andere kant ook in het geheugen overnemen
+            for table in self.MERGE_ORDER:
+                entry = merged_tables[table]
+                if entry is None:
+                    continue
+                merged, disk = entry
+                rows = {key: row for key, row in merged.items() if row is not None}
+                for key, row in rows.items():
+                    if self._base_rows.get(table, {}).get(key) != hash(row):
+                        self._apply_row(table, key, row)
+                for key in [k for k in self._table(table) if k not in rows]:
+                    self._apply_row(table, key, None)
+                merged_tables[table] = (rows, disk)
+
+            # verplaatste boekingen: `available` van oude en nieuwe fiets (en de heap) bijwerken,
+            # daarom bikes.csv pas na deze stap opmaken
+            if moved_bikes:
+                for bike_id in moved_bikes:
+                    self._refresh_available(bike_id)
+                if merged_tables["bikes"] is not None:
+                    rows = merged_tables["bikes"][0]
+                    for bike_id in moved_bikes:
+                        if bike_id in self.bikes:
+                            rows[bike_id] = self._row_of("bikes", self.bikes[bike_id])
+
+            for table in self.MERGE_ORDER:
+                filename = os.path.join(folder, self.TABLE_FILES[table])
+                entry = merged_tables[table]
+                if entry is None:
+                    rows = {key: self._row_of(table, obj) for key, obj in self._table(table).items()}
+                    changed = not same_folder or bool(self._evicted.get(table)) or self._rows_differ(table, rows)
+                else:
+                    rows, disk = entry
+                    changed = rows != {k: r for k, r in disk.items() if r is not None}
+                if changed or not os.path.exists(filename):
+                    self._write_table_csv(table, filename, rows.values())
+                    disk_versions[table] = disk_versions.get(table, 0) + 1
+                self._base_rows[table] = {key: hash(row) for key, row in rows.items()}
+                self._file_stats[table] = self._stat_file(filename)
+
+            self._write_versions(folder, disk_versions)
+            self._base_versions = dict(disk_versions)
+            self._needs_merge.clear()
+            self._evicted.clear()
+            self._base_folder = folder_key
+            self._reset_next_ids()
+
+    def _rows_differ(self, table: str, rows: dict) -> bool:
+        base = self._base_rows.get(table)
+        if base is None or len(base) != len(rows):
+            return True
+        return any(base.get(key) != hash(row) for key, row in rows.items())
+
+    @staticmethod
+    def _merge_rows(base: dict, ours: dict, disk: dict):
+        """
+        Drieweg-merge per rij. base bevat hashes van de rijen zoals wij ze laadden,
+        ours/disk de rijen zelf (None/afwezig = verwijderd).
+        """
+        merged = {}
+        conflicts = []
+        for key in ours.keys() | disk.keys() | base.keys():
+            o = ours.get(key)
+            d = disk.get(key)
+            b = base.get(key)
+            o_changed = (hash(o) if o is not None else None) != b
+            d_changed = (hash(d) if d is not None else None) != b
+            if not o_changed:
+                merged[key] = d
+            elif not d_changed or o == d:
+                merged[key] = o
+            else:
+                merged[key] = d
+                conflicts.append(key)
+        return merged, conflicts
+
+    def _recheck_bookings(self, merged: dict, disk: dict, bike_rows: dict) -> list:
+        """
+        Per rij samenvoegen kan dezelfde fiets twee keer voor dezelfde periode
+        opleveren (beide instanties boekten de laatste vrije fiets). Rijen die
+        de andere instantie al schreef blijven staan; onze nieuwe of gewijzigde
+        reserveringen worden opnieuw tegen het samengevoegde resultaat gecontroleerd
+        en zo nodig naar een vrije fiets van hetzelfde type verplaatst (in `merged`).
+        Geeft (reserveringen waarvoor geen fiets meer vrij is, oude en nieuwe fietsen
+        van de verplaatste reserveringen) terug.
+        """
+        columns = self.TABLE_COLUMNS["reservations"]
+        bike_col = columns.index("bike_id")
 
-    # --- CSV: bikes ---
+        def parse(table, row):
+            return self._parse_row(table, dict(zip(self.TABLE_COLUMNS[table], row)))
 
-    def _save_bikes_csv(self, filename: str):
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["bike_id", "bike_type", "status", "available"])
-            for b in self.bikes.values():
-                writer.writerow([
-                    b.bike_id,
-                    b.bike_type.name,
-                    b.status.name,
-                    int(b.available),
-                ])
-
-    def _load_bikes_csv(self, filename: str):
-        if not os.path.exists(filename):
+        bookings = {}
+        ours = []
+        for key, row in merged.items():
+            if row is None:
+                continue
+            r = parse("reservations", row)
+            if r.status == ReservationStatus.GEANNULEERD:
+                continue
+            if row == disk.get(key):
+                bookings.setdefault(r.bike_id, []).append((r.start, r.end))
+            else:
+                ours.append((key, r))
+
+        def is_free(bike_id, start, end):
+            return all(e <= start or s >= end for s, e in bookings.get(bike_id, ()))
+
+        bikes = [parse("bikes", row) for _, row in sorted(bike_rows.items()) if row is not None]
+        unplaced = []
+        moved = set()
+        for key, r in sorted(ours, key=lambda item: item[0]):
+            if not is_free(r.bike_id, r.start, r.end):
+                bike = next((
+                    b for b in bikes
+                    if b.bike_type == r.bike_type and b.status == BikeStatus.OK
+                    and is_free(b.bike_id, r.start, r.end)
+                ), None)
+                if bike is None:
+                    unplaced.append(key)
+                    continue
+                row = list(merged[key])
+                row[bike_col] = str(bike.bike_id)
+                merged[key] = tuple(row)
+                moved.update((r.bike_id, bike.bike_id))
+                r.bike_id = bike.bike_id
+            bookings.setdefault(r.bike_id, []).append((r.start, r.end))
+        return unplaced, moved
+
+    def _renumber_new_rows(self, table: str, base: dict, disk: dict):
+        """
+        Rijen die wij nieuw hebben aangemaakt, maar waarvan het id intussen
+        op schijf door een andere instantie gebruikt is, krijgen een vrij id.
+        """
+        items = self._table(table)
+        clashes = [key for key in items if key not in base and key in disk]
+        if not clashes:
             return
-        max_id = 0
-        with open(filename, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                bid = int(row["bike_id"])
-                bike_type_name = row["bike_type"]
-                status_name = row["status"]
-                available = bool(int(row["available"]))
-                bike_type = BikeType[bike_type_name]
-                status = BikeStatus[status_name]
-                self.bikes[bid] = Bike(
-                    bike_id=bid,
-                    bike_type=bike_type,
-                    status=status,
-                    available=available,
-                )
-                if bid > max_id:
-                    max_id = bid
-        self.next_bike_id = max_id + 1
-
-    # --- CSV: reservations ---
-
-    def _save_reservations_csv(self, filename: str):
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "reservation_id",
-                "customer_id",
-                "bike_id",
-                "bike_type",
-                "start",
-                "end",
-                "location_type",
-                "address",
-                "status",
-                "total_price",
-            ])
-            for r in self.reservations.values():
-                writer.writerow([
-                    r.reservation_id,
-                    r.customer_id,
-                    r.bike_id,
-                    r.bike_type.name,
-                    r.start.strftime(self.DATETIME_FORMAT),
-                    r.end.strftime(self.DATETIME_FORMAT),
-                    r.location_type.name,
-                    r.address,
-                    r.status.name,
-                    r.total_price,
-                ])
-
-    def _load_reservations_csv(self, filename: str):
-        if not os.path.exists(filename):
+        next_id = max(max(items), max(disk), max(base, default=0)) + 1
+        for old_id in clashes:
+            # ook bij toevallig identieke inhoud: het blijven twee verschillende rijen
+            self._change_id(table, old_id, next_id)
+            next_id += 1
+
+    def _change_id(self, table: str, old_id: int, new_id: int):
+        """Hernummer een rij en werk verwijzingen in andere tabellen bij."""
+        items = self._table(table)
+        obj = items.pop(old_id)
+        self._record_change(table, "delete", old_id, obj=obj)
+        setattr(obj, self.TABLE_KEYS[table], new_id)
+        items[new_id] = obj
+        self._record_change(table, "insert", new_id)
+        if table == "customers":
+            self.customer_index.remove(old_id)
+            self.customer_index.add(obj)
+            refs = [("reservations", "customer_id"), ("accounts", "customer_id")]
+        elif table == "stations":
+            refs = [("bikes", "station_id")]
+        elif table == "bikes":
+            refs = [("reservations", "bike_id"), ("repairs", "bike_id")]
+        elif table == "reservations":
+            refs = [("repairs", "reservation_id")]
+        else:
+            refs = []
+        for ref_table, ref_field in refs:
+            for key, ref in self._table(ref_table).items():
+                if getattr(ref, ref_field) == old_id:
+                    setattr(ref, ref_field, new_id)
+                    self._record_change(ref_table, "update", key)
+
+    def _apply_row(self, table: str, key, row):
+        """
+        Zet één CSV-rij in het geheugen. Een bestaand object wordt ter plekke
+        bijgewerkt (zodat verwijzingen ernaar geldig blijven); row=None verwijdert.
+        """
+        items = self._table(table)
+        if row is None:
+            old = items.pop(key, None)
+            if table == "customers":
+                self.customer_index.remove(key)
+            if old is not None:
+                self._record_change(table, "delete", key, obj=old, origin="external")
             return
-        max_id = 0
-        with open(filename, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames or []
-            has_status = "status" in fieldnames
-
-            for row in reader:
-                rid = int(row["reservation_id"])
-                customer_id = int(row["customer_id"])
-                bike_id = int(row["bike_id"])
-                bike_type = BikeType[row["bike_type"]]
-                start = datetime.strptime(row["start"], self.DATETIME_FORMAT)
-                end = datetime.strptime(row["end"], self.DATETIME_FORMAT)
-                location_type = LocationType[row["location_type"]]
-                address = row["address"]
-
-                total_price = float(row["total_price"])
-
-                # Voor oude CSV-bestanden zonder 'status'-kolom:
-                if has_status:
-                    status_name = row.get("status") or "GEPLAND"
-                    status = ReservationStatus[status_name]
+        new = self._parse_row(table, dict(zip(self.TABLE_COLUMNS[table], row)))
+        old = items.get(key)
+        if old is None:
+            items[key] = new
+            old = new
+            op = "insert"
+        elif old == new:
+            return
+        else:
+            old.__dict__.update(new.__dict__)
+            op = "update"
+        if table == "customers":
+            self.customer_index.add(old)
+        self._record_change(table, op, key, origin="external")
+
+    def _reset_next_ids(self):
+        self.next_customer_id = max(self.customers, default=0) + 1
+        self.next_station_id = max(self.stations, default=0) + 1
+        self.next_bike_id = max(self.bikes, default=0) + 1
+        self.next_reservation_id = max(self.reservations, default=0) + 1
+        self.next_repair_id = max(self.repairs, default=0) + 1
+
+    # --- externe wijzigingen (file-watch) ---
+
+    @staticmethod
+    def _stat_file(filename: str):
+        """(mtime, grootte, inode) van een bestand, None als het niet bestaat."""
+        try:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def changed_tables(self, folder: str | None = None) -> list[str]:
+        """Tabellen waarvan het CSV-bestand sinds laden/opslaan/pollen gewijzigd is."""
+        folder = folder or self._base_folder
+        if folder is None:
+            return []
+        return [
+            table
+            for table, filename in self.TABLE_FILES.items()
+            if self._stat_file(os.path.join(folder, filename)) != self._file_stats.get(table)
+        ]
+
+    def poll_changes(self, folder: str | None = None) -> dict[str, TableDelta]:
+        """
+        Lees alleen gewijzigde tabellen opnieuw in en pas het verschil per rij toe.
+        Bestaande objecten worden ter plekke bijgewerkt. Rijen die wij zelf
+        (nog niet opgeslagen) hebben gewijzigd blijven staan en komen in
+        `conflicts`; save_to_csv voegt ze later samen.
+        """
+        folder = folder or self._base_folder
+        tables = self.changed_tables(folder)
+        if not tables:
+            return {}
+
+        deltas = {}
+        with self._folder_lock(folder, exclusive=False):
+            disk_versions = self._read_versions(folder)
+            for table in tables:
+                filename = os.path.join(folder, self.TABLE_FILES[table])
+                self._file_stats[table] = self._stat_file(filename)
+                disk = self._read_table_rows(table, filename)
+                base = self._base_rows.setdefault(table, {})
+                items = self._table(table)
+                delta = TableDelta()
+
+                for key in base.keys() | disk.keys():
+                    d = disk.get(key)
+                    d_hash = hash(d) if d is not None else None
+                    if d_hash == base.get(key):
+                        continue
+                    obj = items.get(key)
+                    o_hash = hash(self._row_of(table, obj)) if obj is not None else None
+                    if o_hash != base.get(key) and o_hash != d_hash:
+                        delta.conflicts.append(key)
+                        continue
+                    if d is None:
+                        delta.removed.append(key)
+                    elif obj is None:
+                        delta.added.append(key)
+                    else:
+                        delta.changed.append(key)
+                    self._apply_row(table, key, d)
+                    if d is None:
+                        base.pop(key, None)
+                    else:
+                        base[key] = d_hash
+
+                if delta.conflicts:
+                    # bij opslaan niet blind overschrijven, maar samenvoegen
+                    self._needs_merge.add(table)
                 else:
-                    status = ReservationStatus.GEPLAND
+                    self._base_versions[table] = disk_versions.get(table, 0)
+                if delta:
+                    deltas[table] = delta
+        self._reset_next_ids()
+        return deltas
+
+    # --- versies en vergrendeling ---
+
+    @contextmanager
+    def _folder_lock(self, folder: str, exclusive: bool):
+        """Advisory lock (fcntl) op de datamap; zonder fcntl (Windows) geen lock."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(folder, self.LOCK_FILE), "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _read_versions(self, folder: str) -> dict[str, int]:
+        filename = os.path.join(folder, self.VERSIONS_FILE)
+        if not os.path.exists(filename):
+            return {}
+        with open(filename, "r", newline="", encoding="utf-8") as f:
+            return {row["table"]: int(row["version"]) for row in csv.DictReader(f)}
 
-                self.reservations[rid] = Reservation(
-                    reservation_id=rid,
-                    customer_id=customer_id,
-                    bike_id=bike_id,
-                    bike_type=bike_type,
-                    start=start,
-                    end=end,
-                    location_type=location_type,
-                    address=address,
-                    status=status,
-                    total_price=total_price,
-                )
+    def _write_versions(self, folder: str, versions: dict[str, int]):
+        filename = os.path.join(folder, self.VERSIONS_FILE)
+        tmp = filename + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["table", "version"])
+            for table in self.MERGE_ORDER:
+                writer.writerow([table, versions.get(table, 0)])
+        os.replace(tmp, filename)
 
-                if rid > max_id:
-                    max_id = rid
-        self.next_reservation_id = max_id + 1
+    CHANGES_CHECKPOINT_FILE = "changes_checkpoint.txt"
 
-    # --- CSV: repairs ---
+    def read_changes_checkpoint(self, folder: str) -> int:
+        """
+        Tot waar de wijzigingen al naar de map geëxporteerd zijn (0 als nog nooit).
+        De volgnummers lopen daarna door, zodat een append-only export oplopend blijft.
+        """
+        filename = os.path.join(folder, self.CHANGES_CHECKPOINT_FILE)
+        seq = 0
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                seq = int(f.read().strip() or 0)
+        self.continue_changes(seq)
+        return seq
+
+    def write_changes_checkpoint(self, folder: str, seq: int):
+        """Checkpoint naast versions.csv bewaren en de geëxporteerde wijzigingen vergeten."""
+        filename = os.path.join(folder, self.CHANGES_CHECKPOINT_FILE)
+        tmp = filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{seq}\n")
+        os.replace(tmp, filename)
+        self.truncate_changes(seq)
+
+    # --- rijen <-> objecten ---
+
+    TABLE_KEYS = {
+        "customers": "customer_id",
+        "stations": "station_id",
+        "bikes": "bike_id",
+        "reservations": "reservation_id",
+        "repairs": "repair_id",
+        "accounts": "username",
+    }
 
-    def _save_repairs_csv(self, filename: str):
-        with open(filename, "w", newline="", encoding="utf-8") as f:
+    def _table(self, table: str) -> dict:
+        return getattr(self, table)
+
+    @classmethod
+    def _parse_datetime(cls, value: str) -> datetime:
+        # DATETIME_FORMAT is ISO-compatibel; fromisoformat is veel sneller dan strptime
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return datetime.strptime(value, cls.DATETIME_FORMAT)
+
+    @staticmethod
+    def _format_datetime(value: datetime) -> str:
+        # gelijk aan strftime(DATETIME_FORMAT), maar sneller
+        return value.isoformat(" ", "minutes")
+
+    def _row_of(self, table: str, obj) -> tuple:
+        """Object -> CSV-rij (tuple van strings, genormaliseerd)."""
+        if table == "customers":
+            return (str(obj.customer_id), obj.name, obj.email, obj.iban, obj.delivery_address)
+        if table == "stations":
+            return (str(obj.station_id), obj.name, obj.address, str(obj.capacity))
+        if table == "bikes":
+            return (
+                str(obj.bike_id),
+                obj.bike_type.name,
+                obj.status.name,
+                str(int(obj.available)),
+                str(obj.station_id) if obj.station_id is not None else "",
+            )
+        if table == "reservations":
+            return (
+                str(obj.reservation_id),
+                str(obj.customer_id),
+                str(obj.bike_id),
+                obj.bike_type.name,
+                self._format_datetime(obj.start),
+                self._format_datetime(obj.end),
+                obj.location_type.name,
+                obj.address,
+                obj.status.name,
+                str(obj.total_price),
+            )
+        if table == "repairs":
+            return (str(obj.repair_id), str(obj.reservation_id), str(obj.bike_id), obj.defect_type, obj.description)
+        if table == "accounts":
+            return (
+                obj.username,
+                obj.password,
+                obj.role.name,
+                str(obj.customer_id) if obj.customer_id is not None else "",
+            )
+        raise ValueError(f"Onbekende tabel: {table}")
+
+    def _parse_row(self, table: str, row: dict):
+        """CSV-rij (dict) -> object."""
+        if table == "customers":
+            return Customer(
+                customer_id=int(row["customer_id"]),
+                name=row["name"],
+                email=row.get("email") or "",
+                iban=row.get("iban") or "",
+                delivery_address=row.get("delivery_address") or "",
+            )
+        if table == "stations":
+            return Station(
+                station_id=int(row["station_id"]),
+                name=row["name"],
+                address=row.get("address") or "",
+                capacity=int(row.get("capacity") or 0),
+            )
+        if table == "bikes":
+            # oude CSV-bestanden zonder 'station_id'-kolom: niet toegewezen
+            station_id = row.get("station_id")
+            return Bike(
+                bike_id=int(row["bike_id"]),
+                bike_type=BikeType[row["bike_type"]],
+                status=BikeStatus[row["status"]],
+                available=bool(int(row["available"])),
+                station_id=int(station_id) if station_id else None,
+            )
+        if table == "reservations":
+            # voor oude CSV-bestanden zonder 'status'-kolom: GEPLAND
+            return Reservation(
+                reservation_id=int(row["reservation_id"]),
+                customer_id=int(row["customer_id"]),
+                bike_id=int(row["bike_id"]),
+                bike_type=BikeType[row["bike_type"]],
+                start=self._parse_datetime(row["start"]),
+                end=self._parse_datetime(row["end"]),
+                location_type=LocationType[row["location_type"]],
+                address=row["address"],
+                status=ReservationStatus[row.get("status") or "GEPLAND"],
+                total_price=float(row["total_price"]),
+            )
+        if table == "repairs":
+            return Repair(
+                repair_id=int(row["repair_id"]),
+                reservation_id=int(row["reservation_id"]),
+                bike_id=int(row["bike_id"]),
+                defect_type=row["defect_type"],
+                description=row["description"],
+            )
+        if table == "accounts":
+            cust_id_str = row["customer_id"]
+            return UserAccount(
+                username=row["username"],
+                password=row["password"],
+                role=Role[row["role"]],
+                customer_id=int(cust_id_str) if cust_id_str else None,
+            )
+        raise ValueError(f"Onbekende tabel: {table}")
+
+    def _read_table_rows(self, table: str, filename: str) -> dict:
+        """Tabel van schijf lezen als {key: genormaliseerde rij}."""
+        rows = {}
+        if not os.path.exists(filename):
+            return rows
+        with open(filename, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                obj = self._parse_row(table, row)
+                rows[getattr(obj, self.TABLE_KEYS[table])] = self._row_of(table, obj)
+        return rows
+
+    def _write_table_csv(self, table: str, filename: str, rows):
+        """Atomisch schrijven: eerst naar .tmp, dan vervangen."""
+        tmp = filename + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow([
-                "repair_id",
-                "reservation_id",
-                "bike_id",
-                "defect_type",
-                "description",
-            ])
-            for rep in self.repairs.values():
-                writer.writerow([
-                    rep.repair_id,
-                    rep.reservation_id,
-                    rep.bike_id,
-                    rep.defect_type,
-                    rep.description,
-                ])
-
-    def _load_repairs_csv(self, filename: str):
+            writer.writerow(self.TABLE_COLUMNS[table])
+            writer.writerows(rows)
+        os.replace(tmp, filename)
+
+    @staticmethod
+    def count_csv_rows(filename: str) -> int:
+        """Snel aantal datarijen (regels min kop) tellen, voor de voortgangsbalk."""
         if not os.path.exists(filename):
+            return 0
+        lines = 0
+        last = b"\n"
+        with open(filename, "rb") as f:
+            while chunk := f.read(1 << 20):
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+        if last != b"\n":
+            lines += 1
+        return max(lines - 1, 0)
+
+    def _track(self, rows, table: str):
+        """Geef rijen door en meld per PROGRESS_EVERY rijen de voortgang."""
+        if self._progress is None:
+            yield from rows
             return
-        max_id = 0
-        with open(filename, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                rep_id = int(row["repair_id"])
-                reservation_id = int(row["reservation_id"])
-                bike_id = int(row["bike_id"])
-                defect_type = row["defect_type"]
-                description = row["description"]
-
-                self.repairs[rep_id] = Repair(
-                    repair_id=rep_id,
-                    reservation_id=reservation_id,
-                    bike_id=bike_id,
-                    defect_type=defect_type,
-                    description=description,
-                )
-                if rep_id > max_id:
-                    max_id = rep_id
-        self.next_repair_id = max_id + 1
+        callback, state = self._progress
+        for i, row in enumerate(rows, 1):
+            yield row
+            if i % self.PROGRESS_EVERY == 0:
+                callback(table, state["done"] + i, state["total"])
 
-    # --- CSV: accounts ---
+    def load_from_csv(self, folder: str = ".", progress=None):
+        """
+        Lees alle tabellen uit CSV. Tabellen worden in de volgorde van TABLE_FILES
+        geladen; `loaded_tables` geeft aan welke al klaar zijn (bv. voor inloggen).
+        progress(table, rows_done, rows_total) wordt regelmatig aangeroepen,
+        ook vanuit een worker-thread.
+
+        write_lock wordt alleen vastgehouden tijdens het leegmaken en het afronden
+        (feed, indexen, consistentie). Tijdens het inlezen mag een andere thread
+        onder write_lock al met de tabellen uit `loaded_tables` werken, bv.
+        inloggen (en een wachtwoord omzetten) zodra de accounts er zijn.
+        """
+        with self.write_lock:
+            self._clear_for_load()
+        try:
+            with self._folder_lock(folder, exclusive=False) if os.path.isdir(folder) else nullcontext():
+                self._base_versions = self._read_versions(folder)
+                self._base_folder = os.path.abspath(folder)
+                if progress is not None:
+                    counts = {
+                        table: self.count_csv_rows(os.path.join(folder, filename))
+                        for table, filename in self.TABLE_FILES.items()
+                    }
+                    self._progress = (progress, {"done": 0, "total": sum(counts.values())})
+                for table, filename in self.TABLE_FILES.items():
+                    self._load_table_csv(table, os.path.join(folder, filename))
+                    self.loaded_tables.add(table)
+                    if progress is not None:
+                        state = self._progress[1]
+                        state["done"] = sum(counts[t] for t in self.loaded_tables)
+                        progress(table, state["done"], state["total"])
+            with self.write_lock:
+                self._reset_next_ids()
+                # alles is opnieuw ingelezen: afnemers van de feed moeten opnieuw synchroniseren
+                self._loaded_seq = self.change_seq + 1
+                self._record_change(None, "reload", None)
+                # opgeslagen `available` niet blind vertrouwen (gebruikt de net opgebouwde indexen)
+                self.consistency_issues = self.check_consistency()
+        finally:
+            self._progress = None
+            self.load_finished.set()
+
+    def _clear_for_load(self):
+        self.loaded_tables = set()
+        self.load_finished.clear()
+        self.customers.clear()
+        self.stations.clear()
+        self.bikes.clear()
+        self.reservations.clear()
+        self.repairs.clear()
+        self.accounts.clear()
+        self.customer_index.clear()
+        self._base_rows = {}
+        self._file_stats = {}
+        self._needs_merge = set()
+        self._evicted = {}
+        self._row_versions.clear()
+        self._table_seq.clear()
 
-    def _save_accounts_csv(self, filename: str):
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["username", "password", "role", "customer_id"])
-            for acc in self.accounts.values():
-                writer.writerow([
-                    acc.username,
-                    acc.password,
-                    acc.role.name,
-                    acc.customer_id if acc.customer_id is not None else "",
-                ])
-
-    def _load_accounts_csv(self, filename: str):
+        self.next_customer_id = 1
+        self.next_station_id = 1
+        self.next_bike_id = 1
+        self.next_reservation_id = 1
+        self.next_repair_id = 1
+
+    def _load_table_csv(self, table: str, filename: str):
         if not os.path.exists(filename):
             return
+        self._file_stats[table] = self._stat_file(filename)
+        items = self._table(table)
+        key_field = self.TABLE_KEYS[table]
+        parse = self._parse_row
+        row_of = self._row_of
+        base = {}
         with open(filename, "r", newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
-            for row in reader:
-                username = row["username"]
-                password = row["password"]
-                role = Role[row["role"]]
-                cust_id_str = row["customer_id"]
-                customer_id = int(cust_id_str) if cust_id_str else None
-                self.accounts[username] = UserAccount(
-                    username=username,
-                    password=password,
-                    role=role,
-                    customer_id=customer_id,
-                )
+            for row in self._track(reader, table):
+                obj = parse(table, row)
+                key = getattr(obj, key_field)
+                items[key] = obj
+                base[key] = hash(row_of(table, obj))
+                if table == "customers":
+                    self.customer_index.add(obj, bulk=True)
+        self._base_rows[table] = base
@@ -0,0 +1,214 @@
+"""
+Vraaggestuurde prijzen: het dagtarief van een fietstype gaat omhoog als de
+vloot op die dag al goed bezet is (en iets omlaag als het rustig is).
+
+Per fietstype houdt een Fenwick-boom over dagnummers bij hoeveel fietsen er
+per dag geboekt zijn. Een boeking telt mee op elke kalenderdag die ze raakt
+(range-add); de bezetting van één dag is een prefixsom (punt-query). Beide
+zijn O(log n), dus een offerte kost O(dagen · log n) zonder de reserveringen
+door te lopen. De bomen worden via de wijzigingsfeed bijgewerkt bij boeken,
+wijzigen en annuleren; na laden worden ze in O(n) opnieuw opgebouwd.
+
+Aanzetten:
+    pricing = DynamicPricing(store)     # DataStore._calculate_price gebruikt hem vanaf nu
+    pricing.close()                     # terug naar het vaste dagtarief
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from model import DataStore, BikeStatus, BikeType
+
+
+class OccupancyTree:
+    """Fenwick-boom (range-add, punt-query) over dagen vanaf ORIGIN."""
+
+    ORIGIN = date(2000, 1, 1).toordinal()
+    SIZE = 1 << 17          # ruim 350 jaar aan dagen
+
+    def __init__(self):
+        self._tree = [0] * (self.SIZE + 1)
+
+    def _index(self, day: date) -> int:
+        return min(max(day.toordinal() - self.ORIGIN + 1, 1), self.SIZE)
+
+    def _add(self, i: int, delta: int):
+        tree, n = self._tree, self.SIZE
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def add_range(self, first: date, last: date, delta: int = 1):
+        """delta optellen bij elke dag van first t/m last."""
+        self._add(self._index(first), delta)
+        end = self._index(last) + 1
+        if end <= self.SIZE:
+            self._add(end, -delta)
+
+    def at(self, day: date) -> int:
+        tree, i, total = self._tree, self._index(day), 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def build(self, ranges):
+        """Opnieuw opbouwen uit (first, last)-paren in O(n + SIZE) i.p.v. n · log SIZE."""
+        n = self.SIZE
+        tree = [0] * (n + 1)
+        for first, last in ranges:
+            tree[self._index(first)] += 1
+            end = self._index(last) + 1
+            if end <= n:
+                tree[end] -= 1
+        # verschillenrij -> Fenwick-boom: elk knooppunt geeft zijn som door aan zijn ouder
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+def booked_days(start: datetime, end: datetime) -> tuple[date, date]:
+    """Eerste en laatste kalenderdag waarop een boeking de fiets bezet houdt."""
+    last = end - timedelta(microseconds=1) if end > start else start
+    return start.date(), last.date()
+
+
+@dataclass
+class DayRate:
+    day: date
+    booked: int
+    fleet: int
+    factor: float
+
+    @property
+    def occupancy(self) -> float:
+        return self.booked / self.fleet if self.fleet else 1.0
+
+
+@dataclass
+class Quote:
+    bike_type: BikeType
+    total: float
+    base_total: float       # wat het vaste dagtarief zou kosten
+    days: list[DayRate] = field(default_factory=list)
+
+    @property
+    def peak_occupancy(self) -> float:
+        return max((d.occupancy for d in self.days), default=0.0)
+
+
+class DynamicPricing:
+    """
+    Dagtarief = basistarief × factor(bezetting):
+    - boven `threshold` lineair oplopend tot 1 + surge bij een volle vloot;
+    - daaronder lineair aflopend tot 1 - discount bij een lege vloot.
+    De factor wordt per kalenderdag van de boeking bepaald en gemiddeld; het
+    aantal gerekende dagen is hetzelfde als bij het vaste tarief.
+    """
+
+    def __init__(self, store: DataStore, threshold: float = 0.5, surge: float = 0.5, discount: float = 0.1):
+        if not 0 < threshold < 1:
+            raise ValueError("Drempel moet tussen 0 en 1 liggen.")
+        self.store = store
+        self.threshold = threshold
+        self.surge = surge
+        self.discount = discount
+        self._trees = {bike_type: OccupancyTree() for bike_type in BikeType}
+        self._booked: dict[int, tuple] = {}     # reservation_id -> (type, eerste dag, laatste dag)
+        self._bike_types: dict[int, BikeType] = {}  # bike_id -> type, alleen fietsen met status OK
+        self._fleet = {bike_type: 0 for bike_type in BikeType}
+        self._rebuild()
+        store.subscribe(self._on_change)
+        store.pricing = self
+
+    def close(self):
+        self.store.unsubscribe(self._on_change)
+        if self.store.pricing is self:
+            self.store.pricing = None
+
+    # --- bijhouden via de wijzigingsfeed ---
+
+    def _counts(self, r) -> bool:
+        return r.status not in self.store.INACTIVE_RESERVATION_STATUSES
+
+    def _rebuild(self):
+        self._booked = {}
+        ranges = {bike_type: [] for bike_type in BikeType}
+        for rid, r in self.store.reservations.items():
+            if self._counts(r):
+                first, last = booked_days(r.start, r.end)
+                self._booked[rid] = (r.bike_type, first, last)
+                ranges[r.bike_type].append((first, last))
+        for bike_type, tree in self._trees.items():
+            tree.build(ranges[bike_type])
+        self._bike_types = {
+            bike_id: bike.bike_type for bike_id, bike in self.store.bikes.items() if bike.status == BikeStatus.OK
+        }
+        self._fleet = {bike_type: 0 for bike_type in BikeType}
+        for bike_type in self._bike_types.values():
+            self._fleet[bike_type] += 1
+
+    def _on_change(self, change):
+        if change.op == "reload" or (
+                change.op in ("bulk_insert", "bulk_delete") and change.table in ("reservations", "bikes")):
+            self._rebuild()
+        elif change.op in ("bulk_insert", "bulk_delete"):
+            return
+        elif change.table == "reservations":
+            old = self._booked.pop(change.key, None)
+            if old is not None:
+                self._trees[old[0]].add_range(old[1], old[2], -1)
+            r = self.store.reservations.get(change.key)
+            if r is not None and self._counts(r):
+                first, last = booked_days(r.start, r.end)
+                self._booked[change.key] = (r.bike_type, first, last)
+                self._trees[r.bike_type].add_range(first, last, 1)
+        elif change.table == "bikes":
+            old = self._bike_types.pop(change.key, None)
+            if old is not None:
+                self._fleet[old] -= 1
+            bike = self.store.bikes.get(change.key)
+            if bike is not None and bike.status == BikeStatus.OK:
+                self._bike_types[change.key] = bike.bike_type
+                self._fleet[bike.bike_type] += 1
+
+    # --- prijzen ---
+
+    def factor(self, booked: int, fleet: int) -> float:
+        occupancy = min(booked / fleet, 1.0) if fleet else 1.0
+        if occupancy >= self.threshold:
+            return 1.0 + self.surge * (occupancy - self.threshold) / (1.0 - self.threshold)
+        return 1.0 - self.discount * (self.threshold - occupancy) / self.threshold
+
+    def occupancy(self, bike_type: BikeType, day: date) -> int:
+        """Aantal geboekte fietsen van dit type op `day`."""
+        return self._trees[bike_type].at(day)
+
+    def quote(self, bike_type: BikeType, start: datetime, end: datetime, ignore_id: int | None = None) -> Quote:
+        """Offerte; ignore_id = reservering die gewijzigd wordt (telt niet mee voor de bezetting)."""
+        base = self.store.BASE_PRICE_PER_DAY[bike_type]
+        charged = max((end - start).days, 1)
+        first, last = booked_days(start, end)
+        own = self._booked.get(ignore_id) if ignore_id is not None else None
+        tree = self._trees[bike_type]
+        fleet = self._fleet[bike_type]
+
+        rates = []
+        day = first
+        while day <= last:
+            booked = tree.at(day)
+            if own is not None and own[0] == bike_type and own[1] <= day <= own[2]:
+                booked -= 1
+            rates.append(DayRate(day, booked, fleet, self.factor(booked, fleet)))
+            day += timedelta(days=1)
+        average = sum(rate.factor for rate in rates) / len(rates)
+        return Quote(
+            bike_type=bike_type,
+            total=round(base * charged * average, 2),
+            base_total=round(base * charged, 2),
+            days=rates,
+        )
+
+    def price(self, bike_type: BikeType, start: datetime, end: datetime, ignore_id: int | None = None) -> float:
+        return self.quote(bike_type, start, end, ignore_id).total
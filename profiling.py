@@ -0,0 +1,233 @@
+"""
+Profileermodus voor BikerApp: per UI-actie (knop, tabblad, login) een profiel.
+
+Aanzetten met BIKER_PROFILE=<map> of `python app.py --profile <map>`; staat hij
+uit, dan wordt er niets ingepakt en kost het niets. Aan vervangt attach() de
+methoden uit BikerApp.PROFILED_ACTIONS op de instantie door geprofileerde
+versies (zoals DataStore.enable_metrics), vóórdat de knoppen ze binden.
+
+Een actie loopt door tot ook het werk dat ze via de UiExecutor indient klaar is:
+de opdracht op de worker-thread en de callback op de Tk-thread tellen mee in
+hetzelfde profiel. Per actie komt er één bestand in de map:
+    0007_refresh_bikes.pstats       (mode "cprofile", te openen met pstats/snakeviz)
+    0007_refresh_bikes.collapsed    (mode "sample": stapels voor flamegraph.pl/speedscope)
+Bij afsluiten komt summary.txt erbij: de traagste acties en per actie de totalen.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass
+
+
+MODES = ("cprofile", "sample")
+
+
+@dataclass
+class ActionRecord:
+    seq: int
+    name: str
+    wall: float         # seconden van start tot het laatste (asynchrone) deel klaar is
+    filename: str
+
+
+class _Capture:
+    """Eén lopende actie: profielen of stapels van alle threads waar ze draaide."""
+
+    def __init__(self, seq: int, name: str):
+        self.seq = seq
+        self.name = name
+        self.started = self.ended = time.perf_counter()
+        self.pending = 1        # het deel op de Tk-thread zelf
+        self.profiles: list[cProfile.Profile] = []
+        self.samples: Counter = Counter()
+
+
+class ActionProfiler:
+
+    def __init__(self, folder: str, mode: str = "cprofile", interval: float = 0.001, top: int = 20):
+        if mode not in MODES:
+            raise ValueError(f"Onbekende profileermodus: {mode}")
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.mode = mode
+        self.interval = interval
+        self.top = top
+        self.records: list[ActionRecord] = []
+        self._seq = 0
+        self._current: _Capture | None = None      # alleen gebruikt op de Tk-thread
+        self._open: list[_Capture] = []
+        self._executor = None
+        self._sampling: dict[int, _Capture] = {}   # thread-id -> actie (mode "sample")
+        self._closed = False
+        self._sampler = None
+        if mode == "sample":
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+            self._sampler.start()
+
+    # --- inpakken ---
+
+    def attach(self, app, actions):
+        """Methoden `actions` van app en app.executor.submit vervangen door geprofileerde versies."""
+        for name in actions:
+            setattr(app, name, self._wrap_action(name, getattr(app, name)))
+        executor = getattr(app, "executor", None)
+        if executor is not None:
+            self._executor = executor
+            executor.submit = self._wrap_submit(executor.submit)
+
+    def _wrap_action(self, name: str, func):
+        def profiled(*args, **kwargs):
+            if self._current is not None:
+                # aangeroepen vanuit een andere actie: hoort bij dat profiel
+                return func(*args, **kwargs)
+            capture = self._begin(name)
+            self._current = capture
+            try:
+                return self._run(capture, func, args, kwargs)
+            finally:
+                self._current = None
+                self._release(capture)
+
+        profiled.__name__ = getattr(func, "__name__", name)
+        profiled.__wrapped__ = func
+        return profiled
+
+    def _wrap_submit(self, submit):
+        def profiled_submit(key, func, *args, on_done=None, on_error=None, **kwargs):
+            capture = self._current
+            if capture is None:
+                return submit(key, func, *args, on_done=on_done, on_error=on_error, **kwargs)
+            capture.pending += 1
+
+            def work(*a, **kw):
+                return self._run(capture, func, a, kw)
+
+            def deliver(callback, error: bool):
+                def delivered(value):
+                    self._current = capture
+                    try:
+                        if callback is not None:
+                            self._run(capture, callback, (value,), {})
+                        elif error:
+                            traceback.print_exception(value)
+                    finally:
+                        self._current = None
+                        self._release(capture)
+                return delivered
+
+            return submit(key, work, *args, on_done=deliver(on_done, False), on_error=deliver(on_error, True),
+                          **kwargs)
+
+        profiled_submit.__wrapped__ = submit
+        return profiled_submit
+
+    # --- meten ---
+
+    def _run(self, capture: _Capture, func, args, kwargs):
+        if self.mode == "sample":
+            ident = threading.get_ident()
+            self._sampling[ident] = capture
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._sampling.pop(ident, None)
+                capture.ended = time.perf_counter()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: maar één profiler tegelijk (bv. Tk-thread en worker); dit deel alleen timen
+            profile = None
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+                capture.profiles.append(profile)
+            capture.ended = time.perf_counter()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._closed:
+            time.sleep(self.interval)
+            if not self._sampling:
+                continue
+            frames = sys._current_frames()
+            for ident, capture in list(self._sampling.items()):
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                capture.samples[";".join(reversed(stack))] += 1
+
+    # --- acties afronden ---
+
+    def _begin(self, name: str) -> _Capture:
+        # resultaten die de executor als verouderd weggooide komen nooit terug:
+        # is de executor leeg, dan zijn alle open acties klaar
+        if self._open and (self._executor is None or self._executor.pending == 0):
+            for capture in list(self._open):
+                self._finish(capture)
+        self._seq += 1
+        capture = _Capture(self._seq, name)
+        self._open.append(capture)
+        return capture
+
+    def _release(self, capture: _Capture):
+        capture.pending -= 1
+        if capture.pending == 0:
+            self._finish(capture)
+
+    def _finish(self, capture: _Capture):
+        if capture not in self._open:
+            return
+        self._open.remove(capture)
+        wall = capture.ended - capture.started
+        base = os.path.join(self.folder, f"{capture.seq:04d}_{capture.name}")
+        if self.mode == "sample":
+            filename = base + ".collapsed"
+            with open(filename, "w", encoding="utf-8") as f:
+                for stack, count in capture.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        else:
+            filename = base + ".pstats"
+            if capture.profiles:
+                pstats.Stats(*capture.profiles).dump_stats(filename)
+        self.records.append(ActionRecord(capture.seq, capture.name, wall, filename))
+
+    def summary(self) -> str:
+        lines = [f"Traagste acties (van {len(self.records)}):"]
+        for r in sorted(self.records, key=lambda r: r.wall, reverse=True)[:self.top]:
+            lines.append(f"  {r.wall * 1000:10.1f} ms  {r.name:<32} {os.path.basename(r.filename)}")
+        per_action: dict[str, list[float]] = {}
+        for r in self.records:
+            per_action.setdefault(r.name, []).append(r.wall)
+        lines.append("")
+        lines.append(f"  {'Actie':<32} {'Aantal':>7} {'Totaal (ms)':>12} {'Gem. (ms)':>10} {'Max (ms)':>10}")
+        for name, walls in sorted(per_action.items(), key=lambda kv: sum(kv[1]), reverse=True):
+            lines.append(
+                f"  {name:<32} {len(walls):>7} {sum(walls) * 1000:>12.1f} "
+                f"{sum(walls) / len(walls) * 1000:>10.1f} {max(walls) * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> str:
+        """Open acties wegschrijven en summary.txt maken; geeft het pad terug."""
+        for capture in list(self._open):
+            self._finish(capture)
+        self._closed = True
+        if self._sampler is not None:
+            self._sampler.join()
+        filename = os.path.join(self.folder, "summary.txt")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(self.summary() + "\n")
+        return filename
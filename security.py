@@ -0,0 +1,166 @@
+"""
+Wachtwoorden en sessies voor DataStore.authenticate / login.
+
+- Wachtwoorden worden opgeslagen als "pbkdf2_sha256$<iteraties>$<salt>$<hash>"
+  (hashlib.pbkdf2_hmac). Oude rijen met een leesbaar wachtwoord blijven werken
+  en worden bij de eerstvolgende geslaagde login omgezet.
+- SessionCache: na een geslaagde login een token, zodat herhaalde verzoeken
+  de (bewust trage) sleutelafleiding overslaan. Begrensd (LRU) en met verlooptijd.
+- LoginThrottle: teller van mislukte pogingen per gebruikersnaam; na te veel
+  pogingen wordt er een tijd lang geweigerd vóórdat er gehasht wordt.
+- Onbekende namen worden tegen dummy_hash() gecontroleerd, zodat de
+  responstijd niet verraadt welke gebruikersnamen bestaan.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+PBKDF2_ALGORITHM = "pbkdf2_sha256"
+PBKDF2_ITERATIONS = 310_000
+SALT_BYTES = 16
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password: str, iterations: int = PBKDF2_ITERATIONS) -> str:
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{PBKDF2_ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(PBKDF2_ALGORITHM + "$")
+
+
+def needs_rehash(stored: str, iterations: int = PBKDF2_ITERATIONS) -> bool:
+    """Leesbaar wachtwoord of hash met minder iteraties dan nu gebruikelijk."""
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split("$")[1]) < iterations
+    except (IndexError, ValueError):
+        return True
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Vergelijk met een hash of (oude rijen) met het leesbare wachtwoord, in constante tijd."""
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        _, iterations, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+_dummy_hash = None
+
+
+def dummy_hash() -> str:
+    """Hash van een willekeurig wachtwoord (eenmalig berekend) voor onbekende gebruikersnamen."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
+@dataclass
+class Session:
+    username: str
+    password: str       # opgeslagen hash bij uitgifte; wachtwoord gewijzigd = sessie ongeldig
+    expires: float
+
+
+class SessionCache:
+    """Sessietokens -> gebruikersnaam; maximaal max_size sessies, oudste gebruikte eerst eruit."""
+
+    def __init__(self, ttl: float = 30 * 60, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, username: str, password: str) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = Session(username, password, time.monotonic() + self.ttl)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+        return token
+
+    def get(self, token: str) -> Session | None:
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session.expires <= time.monotonic():
+                del self._sessions[token]
+                return None
+            self._sessions.move_to_end(token)
+            return session
+
+    def revoke(self, token: str):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def revoke_user(self, username: str):
+        with self._lock:
+            for token in [t for t, s in self._sessions.items() if s.username == username]:
+                del self._sessions[token]
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class LoginThrottle:
+    """
+    Mislukte pogingen per gebruikersnaam. Vanaf max_failures wordt er `lockout`
+    seconden geweigerd, bij elke volgende mislukking twee keer zo lang (tot
+    max_lockout). Ook onbekende namen tellen mee; het aantal bijgehouden namen
+    is begrensd, maar een lopende blokkade wordt nooit weggegooid: bij een volle
+    tabel verdwijnt de oudste naam die niet (meer) geblokkeerd is.
+    """
+
+    def __init__(self, max_failures: int = 5, lockout: float = 30.0,
+                 max_lockout: float = 15 * 60, max_entries: int = 10_000):
+        self.max_failures = max_failures
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+        self.max_entries = max_entries
+        # gebruikersnaam -> [mislukt, geblokkeerd_tot]
+        self._failures: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retry_after(self, username: str) -> float:
+        """Seconden tot een nieuwe poging mag; 0 = toegestaan."""
+        entry = self._failures.get(username)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry[1] - time.monotonic())
+
+    def failure(self, username: str):
+        with self._lock:
+            entry = self._failures.pop(username, None) or [0, 0.0]
+            entry[0] += 1
+            if entry[0] >= self.max_failures:
+                delay = min(self.lockout * 2 ** (entry[0] - self.max_failures), self.max_lockout)
+                entry[1] = time.monotonic() + delay
+            self._failures[username] = entry
+            if len(self._failures) > self.max_entries:
+                now = time.monotonic()
+                victim = next((name for name, (_, until) in self._failures.items() if until <= now), None)
+                if victim is not None:
+                    del self._failures[victim]
+
+    def success(self, username: str):
+        with self._lock:
+            self._failures.pop(username, None)
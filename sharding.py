@@ -0,0 +1,440 @@
+"""
+Gesharde DataStore: fietsen, reserveringen en reparaties verdeeld over
+worker-processen per BikeType of per station.
+
+- Elke shard is een eigen proces met een gewone DataStore en een eigen map
+  (map/shard_0, map/shard_1, ...). Klanten, stations en accounts staan in
+  elke shard (ze worden naar alle shards gestuurd), zodat een shard een
+  boeking zelfstandig kan valideren.
+- ShardedDataStore is de router: boekingen gaan naar de shard van het type of
+  station, vragen over meerdere shards (bv. reserveringen van een klant)
+  worden parallel uitgezet en samengevoegd.
+- Ids van fietsen, reserveringen en reparaties zijn naar buiten globaal:
+  global = lokaal * aantal_shards + shard.
+
+Een bestaande CSV-map opsplitsen:
+    python sharding.py split data_100k data_sharded --shards 4 --by station
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+
+from model import DataStore, BikeType, BikeStatus, LocationType, Reservation, Repair, Bike, _row_copy
+from security import hash_password, is_hashed
+
+
+SHARDS_FILE = "shards.json"
+SHARD_BY = ("bike_type", "station")
+
+# tabellen die in elke shard volledig aanwezig zijn
+REPLICATED_TABLES = ("customers", "stations", "accounts")
+
+
+def shard_folder(folder: str, shard: int) -> str:
+    return os.path.join(folder, f"shard_{shard}")
+
+
+def _worker(conn, folder: str):
+    """Shard-proces: voert lijsten van (methode, args, kwargs) uit op een eigen DataStore."""
+    store = DataStore()
+    if os.path.isdir(folder):
+        store.load_from_csv(folder)
+    # geladen rijen leven tot het einde: niet bij elke gc-ronde opnieuw doorlopen
+    gc.freeze()
+    while True:
+        calls = conn.recv()
+        if calls is None:
+            break
+        results = []
+        for method, args, kwargs in calls:
+            try:
+                results.append((True, getattr(store, method)(*args, **kwargs)))
+            except Exception as e:
+                results.append((False, e))
+        conn.send(results)
+    conn.close()
+
+
+class ShardedDataStore:
+    """
+    Router voor een gesharde DataStore. Gebruik als context manager (of close()),
+    zodat de worker-processen netjes stoppen.
+    """
+
+    def __init__(self, folder: str, shards: int | None = None, shard_by: str | None = None):
+        config = self.read_config(folder)
+        if config is None:
+            config = {"shards": shards or 2, "shard_by": shard_by or "bike_type"}
+            if config["shard_by"] not in SHARD_BY:
+                raise ValueError(f"Onbekende shardsleutel: {config['shard_by']}")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, SHARDS_FILE), "w", encoding="utf-8") as f:
+                json.dump(config, f)
+        elif (shards is not None and shards != config["shards"]) or (
+                shard_by is not None and shard_by != config["shard_by"]):
+            raise ValueError("Map is al gesharded met een andere indeling (zie shards.json).")
+
+        self.folder = folder
+        self.n = config["shards"]
+        self.shard_by = config["shard_by"]
+        self._conns = []
+        self._procs = []
+        for shard in range(self.n):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_worker, args=(child, shard_folder(folder, shard)), daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self._next_shard = 0
+
+    @staticmethod
+    def read_config(folder: str) -> dict | None:
+        filename = os.path.join(folder, SHARDS_FILE)
+        if not os.path.exists(filename):
+            return None
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- communicatie met de shards ---
+
+    def _fan_out(self, calls_per_shard: dict[int, list]) -> dict[int, list]:
+        """Stuur alle shards tegelijk hun calls en verzamel daarna de resultaten."""
+        for shard, calls in calls_per_shard.items():
+            self._conns[shard].send(calls)
+        return {shard: self._conns[shard].recv() for shard in calls_per_shard}
+
+    def _call(self, shard: int, method: str, *args, **kwargs):
+        ok, result = self._fan_out({shard: [(method, args, kwargs)]})[shard][0]
+        if not ok:
+            raise result
+        return result
+
+    def _broadcast(self, method: str, *args, **kwargs) -> list:
+        call = [(method, args, kwargs)]
+        results = self._fan_out({shard: call for shard in range(self.n)})
+        values = []
+        for shard in range(self.n):
+            ok, result = results[shard][0]
+            if not ok:
+                raise result
+            values.append(result)
+        return values
+
+    # --- sleutels en ids ---
+
+    def shard_for(self, bike_type: BikeType | None = None, station_id: int | None = None) -> int | None:
+        """Shard van een type of station; None als de sleutel niet gegeven is."""
+        if self.shard_by == "bike_type":
+            return None if bike_type is None else list(BikeType).index(bike_type) % self.n
+        return None if station_id is None else station_id % self.n
+
+    def to_global(self, shard: int, local_id: int) -> int:
+        return local_id * self.n + shard
+
+    def split_id(self, global_id: int) -> tuple[int, int]:
+        """(shard, lokaal id) van een globaal id."""
+        return global_id % self.n, global_id // self.n
+
+    def _globalize(self, shard: int, obj):
+        """Kopie van een object uit een shard met globale ids."""
+        if obj is None:
+            return None
+        obj = _row_copy(obj)
+        g = self.to_global
+        if isinstance(obj, Reservation):
+            obj.reservation_id = g(shard, obj.reservation_id)
+            obj.bike_id = g(shard, obj.bike_id)
+        elif isinstance(obj, Repair):
+            obj.repair_id = g(shard, obj.repair_id)
+            obj.reservation_id = g(shard, obj.reservation_id)
+            obj.bike_id = g(shard, obj.bike_id)
+        elif isinstance(obj, Bike):
+            obj.bike_id = g(shard, obj.bike_id)
+        return obj
+
+    # --- gerepliceerde tabellen ---
+
+    def add_customer(self, name: str, email: str = "", iban: str = "", delivery_address: str = ""):
+        customers = self._broadcast("add_customer", name, email, iban, delivery_address)
+        if len({c.customer_id for c in customers}) != 1:
+            raise ValueError("Shards lopen uit de pas: verschillende klantnummers.")
+        return customers[0]
+
+    def update_customer(self, customer_id: int, **changes):
+        return self._broadcast("update_customer", customer_id, **changes)[0]
+
+    def add_station(self, name: str, address: str = "", capacity: int = 0):
+        return self._broadcast("add_station", name, address, capacity)[0]
+
+    def add_account(self, username: str, password: str, role, customer_id: int | None = None):
+        # één keer hashen, niet in elke shard opnieuw
+        if not is_hashed(password):
+            password = hash_password(password)
+        return self._broadcast("add_account", username, password, role, customer_id)[0]
+
+    # inloggen en sessies lopen via shard 0
+    def _login_on_first_shard(self, method: str, username: str, password: str, role):
+        """
+        `method` op shard 0. Heeft die het wachtwoord opnieuw gehasht (leesbaar of
+        te weinig iteraties), dan krijgen de andere shards dezelfde hash.
+        """
+        # versienummers vergelijken: het account zelf wordt pas na de hele lijst verstuurd
+        calls = [
+            ("row_version", ("accounts", username), {}),
+            (method, (username, password, role), {}),
+            ("row_version", ("accounts", username), {}),
+            ("get_account", (username,), {}),
+        ]
+        (_, before), (ok, result), (_, version), (_, after) = self._fan_out({0: calls})[0]
+        if not ok:
+            raise result
+        if version != before and after is not None and self.n > 1:
+            call = [("add_account", (after.username, after.password, after.role, after.customer_id), {})]
+            for answers in self._fan_out({shard: call for shard in range(1, self.n)}).values():
+                ok, error = answers[0]
+                if not ok:
+                    raise error
+        return result
+
+    def authenticate(self, username: str, password: str, role):
+        return self._login_on_first_shard("authenticate", username, password, role)
+
+    def login(self, username: str, password: str, role) -> str | None:
+        return self._login_on_first_shard("login", username, password, role)
+
+    def authenticate_token(self, token: str):
+        return self._call(0, "authenticate_token", token)
+
+    def search_customers(self, query: str, limit: int = 20):
+        return self._call(0, "search_customers", query, limit)
+
+    # --- fietsen ---
+
+    def add_bike(self, bike_type: BikeType, status: BikeStatus = BikeStatus.OK, station_id: int | None = None):
+        shard = self.shard_for(bike_type, station_id)
+        if shard is None:
+            raise ValueError("Bij sharding per station moet een fiets een station hebben.")
+        return self._globalize(shard, self._call(shard, "add_bike", bike_type, status, station_id))
+
+    def get_available_bike(self, bike_type: BikeType, station_id: int | None = None):
+        shard = self.shard_for(bike_type, station_id)
+        shards = [shard] if shard is not None else range(self.n)
+        for shard in shards:
+            bike = self._call(shard, "get_available_bike", bike_type, station_id)
+            if bike is not None:
+                return self._globalize(shard, bike)
+        return None
+
+    # --- reserveringen ---
+
+    def _candidate_shards(self, bike_type: BikeType, station_id: int | None) -> list[int]:
+        shard = self.shard_for(bike_type, station_id)
+        if shard is not None:
+            return [shard]
+        # per station gesharded zonder station: shards om de beurt proberen
+        start = self._next_shard
+        self._next_shard = (start + 1) % self.n
+        return [(start + i) % self.n for i in range(self.n)]
+
+    def create_reservation(self, customer_id: int, bike_type: BikeType, start, end,
+                           location_type: LocationType, address: str = "", station_id: int | None = None):
+        error = None
+        for shard in self._candidate_shards(bike_type, station_id):
+            try:
+                res = self._call(shard, "create_reservation", customer_id, bike_type, start, end,
+                                 location_type, address, station_id)
+            except ValueError as e:
+                error = e
+                continue
+            return self._globalize(shard, res)
+        raise error
+
+    def create_reservations(self, requests: list[dict]) -> list:
+        """
+        Veel boekingen tegelijk: per shard één bericht, alle shards werken parallel.
+        requests: dicts met de argumenten van create_reservation (station_id verplicht
+        bij sharding per station). Resultaat per request: Reservation of ValueError.
+        """
+        per_shard: dict[int, list] = {}
+        positions: dict[int, list[int]] = {}
+        results: list = [None] * len(requests)
+        for i, req in enumerate(requests):
+            shard = self.shard_for(req.get("bike_type"), req.get("station_id"))
+            if shard is None:
+                results[i] = ValueError("Geen shard te bepalen voor deze boeking.")
+                continue
+            per_shard.setdefault(shard, []).append(("create_reservation", (), req))
+            positions.setdefault(shard, []).append(i)
+        for shard, answers in self._fan_out(per_shard).items():
+            for i, (ok, value) in zip(positions[shard], answers):
+                results[i] = self._globalize(shard, value) if ok else value
+        return results
+
+    def delete_reservation(self, reservation_id: int):
+        shard, local = self.split_id(reservation_id)
+        self._call(shard, "delete_reservation", local)
+
+    def update_reservation(self, reservation_id: int, **changes):
+        """
+        Als DataStore.update_reservation. Hoort het nieuwe fietstype bij een andere
+        shard, dan wordt de reservering verplaatst: eerst in de nieuwe shard geboekt,
+        daarna in de oude verwijderd. Ze krijgt dan een nieuw (globaal) id.
+        """
+        shard, local = self.split_id(reservation_id)
+        target = self.shard_for(changes.get("bike_type"))
+        if target is None or target == shard:
+            return self._globalize(shard, self._call(shard, "update_reservation", local, **changes))
+        return self._move_reservation(shard, local, target, changes)
+
+    def _move_reservation(self, shard: int, local: int, target: int, changes: dict):
+        for name in changes:
+            if name not in DataStore.UPDATABLE_RESERVATION_FIELDS:
+                raise ValueError(f"Onbekend reserveringsveld: {name}")
+        old = self._call(shard, "get_reservation", local)
+        if old is None:
+            raise ValueError("Onbekende reservering.")
+        fields = {name: changes.get(name, getattr(old, name)) for name in DataStore.UPDATABLE_RESERVATION_FIELDS}
+        res = self._call(
+            target, "create_reservation", old.customer_id, fields["bike_type"], fields["start"], fields["end"],
+            fields["location_type"], fields["address"],
+        )
+        try:
+            # periode en status opnieuw laten controleren, dan pas de oude weghalen
+            res = self._call(target, "update_reservation", res.reservation_id,
+                             start=fields["start"], end=fields["end"], status=fields["status"])
+            self._call(shard, "delete_reservation", local)
+        except Exception:
+            self._call(target, "delete_reservation", res.reservation_id)
+            raise
+        return self._globalize(target, res)
+
+    def _gather(self, method: str, *args, **kwargs) -> list:
+        """Roep `method` op alle shards parallel aan en voeg de lijsten samen (globale ids)."""
+        merged = []
+        for shard, items in enumerate(self._broadcast(method, *args, **kwargs)):
+            merged.extend(self._globalize(shard, obj) for obj in items)
+        return merged
+
+    def get_reservations_for_customer(self, customer_id: int, only_current_and_future: bool = True):
+        merged = self._gather("get_reservations_for_customer", customer_id, only_current_and_future)
+        merged.sort(key=lambda r: (r.start, r.reservation_id))
+        return merged
+
+    def get_all_reservations(self):
+        return sorted(self._gather("get_all_reservations"), key=lambda r: r.reservation_id)
+
+    # --- reparaties ---
+
+    def report_defect(self, reservation_id: int, defect_type: str, description: str):
+        shard, local = self.split_id(reservation_id)
+        return self._globalize(shard, self._call(shard, "report_defect", local, defect_type, description))
+
+    def get_all_repairs(self):
+        return sorted(self._gather("get_all_repairs"), key=lambda r: r.repair_id)
+
+    def fix_bike_from_repair(self, repair_id: int):
+        shard, local = self.split_id(repair_id)
+        self._call(shard, "fix_bike_from_repair", local)
+
+    # --- opslaan / statistiek ---
+
+    def save_to_csv(self, force: bool = False):
+        """Elke shard schrijft naar zijn eigen map."""
+        results = self._fan_out({
+            shard: [("save_to_csv", (shard_folder(self.folder, shard),), {"force": force})]
+            for shard in range(self.n)
+        })
+        for shard in range(self.n):
+            ok, result = results[shard][0]
+            if not ok:
+                raise result
+
+    def row_counts(self) -> dict[str, int]:
+        counts = self._broadcast("row_counts")
+        total = dict(counts[0])
+        for other in counts[1:]:
+            for table, n in other.items():
+                if table not in REPLICATED_TABLES:
+                    total[table] += n
+        return total
+
+
+def split_folder(src: str, dest: str, shards: int, shard_by: str = "bike_type") -> dict[str, int]:
+    """
+    Verdeel een gewone CSV-map over `shards` shardmappen onder `dest`.
+    Fietsen gaan naar de shard van hun type/station, reserveringen en reparaties
+    volgen hun fiets; klanten, stations en accounts komen in elke shard.
+    De lokale ids blijven gelijk aan de oorspronkelijke.
+    """
+    if shard_by not in SHARD_BY:
+        raise ValueError(f"Onbekende shardsleutel: {shard_by}")
+    source = DataStore()
+    source.load_from_csv(src)
+
+    def shard_of_bike(bike) -> int:
+        if shard_by == "bike_type":
+            return list(BikeType).index(bike.bike_type) % shards
+        if bike.station_id is None:
+            raise ValueError(f"Fiets {bike.bike_id} heeft geen station; sharding per station kan niet.")
+        return bike.station_id % shards
+
+    stores = [DataStore() for _ in range(shards)]
+    for store in stores:
+        for table in REPLICATED_TABLES:
+            store._table(table).update(source._table(table))
+    bike_shard = {}
+    for bike_id, bike in source.bikes.items():
+        bike_shard[bike_id] = shard_of_bike(bike)
+        stores[bike_shard[bike_id]].bikes[bike_id] = bike
+    for rid, r in source.reservations.items():
+        stores[bike_shard.get(r.bike_id, 0)].reservations[rid] = r
+    for rep_id, rep in source.repairs.items():
+        stores[bike_shard.get(rep.bike_id, 0)].repairs[rep_id] = rep
+
+    os.makedirs(dest, exist_ok=True)
+    for shard, store in enumerate(stores):
+        store.save_to_csv(shard_folder(dest, shard))
+    with open(os.path.join(dest, SHARDS_FILE), "w", encoding="utf-8") as f:
+        json.dump({"shards": shards, "shard_by": shard_by}, f)
+    return {f"shard_{i}": len(store.reservations) for i, store in enumerate(stores)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIKER Light: gesharde datamap")
+    sub = parser.add_subparsers(dest="command", required=True)
+    split = sub.add_parser("split", help="gewone CSV-map opsplitsen in shards")
+    split.add_argument("src")
+    split.add_argument("dest")
+    split.add_argument("--shards", type=int, default=2)
+    split.add_argument("--by", choices=SHARD_BY, default="bike_type")
+    args = parser.parse_args()
+
+    if args.command == "split":
+        counts = split_folder(args.src, args.dest, args.shards, args.by)
+        print(", ".join(f"{name}: {n} reserveringen" for name, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
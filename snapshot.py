@@ -0,0 +1,119 @@
+"""
+Copy-on-write tabellen voor consistente leesviews (snapshots) van DataStore.
+
+Een CowMap verdeelt de rijen op hash over buckets (2**BUCKET_BITS). Een
+snapshot kopieert alleen de lijst met buckets (één verwijzing per bucket);
+een schrijver die daarna een gedeelde bucket wijzigt, kopieert eerst die ene
+bucket. Een rapport kan zo ongestoord over een vaste stand itereren terwijl
+er gewoon verder geboekt wordt.
+"""
+from collections.abc import Mapping
+from datetime import datetime
+
+
+class CowMap:
+    """
+    Dict-achtige map met goedkope snapshots (copy-on-write per bucket).
+    Schrijven en snapshot() moeten door de aanroeper geserialiseerd worden
+    (DataStore doet dat met een kort slot); lezen uit een MapView nooit.
+    """
+
+    BUCKET_BITS = 8     # 256 sleutels per bucket
+
+    def __init__(self, items=None):
+        self._buckets: dict[int, tuple[int, dict]] = {}
+        self._gen = 0
+        self._len = 0
+        if items:
+            for key, value in items:
+                self._bucket_for_write(key)[key] = value
+                self._len += 1
+
+    def _bucket_no(self, key) -> int:
+        return hash(key) >> self.BUCKET_BITS
+
+    def _bucket_for_write(self, key) -> dict:
+        no = self._bucket_no(key)
+        entry = self._buckets.get(no)
+        if entry is None:
+            bucket = {}
+            self._buckets[no] = (self._gen, bucket)
+        elif entry[0] != self._gen:
+            # bucket wordt gedeeld met een snapshot: eerst kopiëren
+            bucket = dict(entry[1])
+            self._buckets[no] = (self._gen, bucket)
+        else:
+            bucket = entry[1]
+        return bucket
+
+    def set(self, key, value):
+        bucket = self._bucket_for_write(key)
+        if key not in bucket:
+            self._len += 1
+        bucket[key] = value
+
+    def pop(self, key):
+        entry = self._buckets.get(self._bucket_no(key))
+        if entry is None or key not in entry[1]:
+            return
+        self._bucket_for_write(key).pop(key)
+        self._len -= 1
+
+    def snapshot(self) -> "MapView":
+        self._gen += 1
+        return MapView(dict(self._buckets), self._len)
+
+    def __len__(self):
+        return self._len
+
+
+class MapView(Mapping):
+    """Onveranderlijke (point-in-time) view op een CowMap."""
+
+    def __init__(self, buckets: dict, length: int):
+        self._buckets = buckets
+        self._len = length
+
+    def __getitem__(self, key):
+        entry = self._buckets.get(hash(key) >> CowMap.BUCKET_BITS)
+        if entry is None:
+            raise KeyError(key)
+        return entry[1][key]
+
+    def __iter__(self):
+        for no in sorted(self._buckets):
+            yield from self._buckets[no][1]
+
+    def values(self):
+        for no in sorted(self._buckets):
+            yield from self._buckets[no][1].values()
+
+    def __len__(self):
+        return self._len
+
+
+class StoreSnapshot:
+    """
+    Consistente leesview van een DataStore op één moment (volgnummer `seq`).
+    De rijen zijn kopieën: ze veranderen niet meer als de store verder gaat.
+    """
+
+    def __init__(self, seq: int, tables: dict[str, MapView]):
+        self.seq = seq
+        self.customers = tables["customers"]
+        self.bikes = tables["bikes"]
+        self.reservations = tables["reservations"]
+        self.repairs = tables["repairs"]
+
+    def get_all_reservations(self):
+        return list(self.reservations.values())
+
+    def get_all_repairs(self):
+        return list(self.repairs.values())
+
+    def get_reservations_for_customer(self, customer_id: int, only_current_and_future: bool = True):
+        now = datetime.now()
+        return [
+            r for r in self.reservations.values()
+            if r.customer_id == customer_id and (not only_current_and_future or r.end >= now)
+        ]
@@ -1,6 +1,8 @@
 import unittest
 import tempfile
 import os
+import json
+import time
 from datetime import datetime, timedelta
 
 from model import (
@@ -9,7 +11,41 @@ from model import (
     LocationType,
     Role,
     BikeStatus,
+    CsvConflictError,
+    Repair,
+    UserAccount,
 )
+import analytics
+import datagen
+from display import DisplayCache
+import dispatch
+import bulk_import
+from sharding import ShardedDataStore
+import security
+from audit import AuditLog
+from pricing import DynamicPricing
+import difftest
+from ui_executor import UiExecutor
+import export
+import memory
+from profiling import ActionProfiler
+
+
+class FakeWidget:
+    """Minimale after()/update() zonder display, voor UiExecutor."""
+
+    def __init__(self):
+        self.timers = []
+
+    def after(self, ms, callback):
+        self.timers.append((time.perf_counter() + ms / 1000, callback))
+
+    def update(self):
+        now = time.perf_counter()
+        due = [t for t in self.timers if t[0] <= now]
+        self.timers = [t for t in self.timers if t[0] > now]
+        for _, callback in due:
+            callback()
 
 
 class TestBikerDataStore(unittest.TestCase):
@@ -210,3 +246,1017 @@ class TestBikerDataStore(unittest.TestCase):
     def test_delete_reservation_makes_bike_available(self):
         cust = self.store.add_customer("Test")
         bike = self.store.add_bike(BikeType.STADSFIETS)
+
+    # Extra: klanten zoeken via de type-ahead index
+    def test_search_customers(self):
+        anna = self.store.add_customer("Anna de Vries", email="anna@example.com", delivery_address="Laan 1")
+        self.store.add_customer("Johan", email="johan@example.com", delivery_address="Annastraat 5")
+        self.store.add_customer("Piet", email="piet@example.com")
+
+        # naam die met de zoekterm begint komt eerst
+        found = self.store.search_customers("ann")
+        self.assertEqual(found[0].customer_id, anna.customer_id)
+        # alleen naam en e-mail: Annastraat (adres) telt niet mee
+        self.assertEqual(len(found), 1)
+
+        # zoeken op e-mail en korte prefix
+        self.assertEqual([c.name for c in self.store.search_customers("piet@")], ["Piet"])
+        self.assertEqual([c.name for c in self.store.search_customers("v")], ["Anna de Vries"])
+        self.assertEqual(self.store.search_customers("xyz"), [])
+
+        # na de eerste zoekopdracht bijgewerkt, ook bij toevoegen en verwijderen
+        kees = self.store.add_customer("Kees Vos", email="kees@example.com")
+        self.assertEqual(self.store.search_customers("vos"), [kees])
+        self.store.bulk_delete("customers", [kees.customer_id])
+        self.assertEqual(self.store.search_customers("vos"), [])
+
+    # Extra: bewerken van klant werkt de zoekindex bij
+    def test_update_customer_updates_search_index(self):
+        cust = self.store.add_customer("Dima", email="dima@example.com")
+        self.store.update_customer(cust.customer_id, name="Dmitri", delivery_address="Kade 3")
+
+        self.assertEqual(self.store.search_customers("dima"), [cust])  # e-mail blijft
+        self.assertEqual(self.store.search_customers("dmi"), [cust])
+        self.assertEqual(self.store.search_customers("kade"), [])   # adres wordt niet geïndexeerd
+        self.assertEqual(self.store.search_customers("dmitri dima"), [cust])
+        with self.assertRaises(ValueError):
+            self.store.update_customer(cust.customer_id, onbekend="x")
+
+    # Extra: instrumentatie telt aanroepen en is zonder kosten uit te zetten
+    def test_metrics_instrumentation(self):
+        metrics = self.store.enable_metrics()
+        cust = self.store.add_customer("Meet")
+        self.store.add_bike(BikeType.STADSFIETS)
+        self.store.create_reservation(
+            customer_id=cust.customer_id,
+            bike_type=BikeType.STADSFIETS,
+            start=datetime(2030, 1, 1, 10, 0),
+            end=datetime(2030, 1, 2, 10, 0),
+            location_type=LocationType.OPHALEN,
+        )
+        with self.assertRaises(ValueError):
+            self.store.delete_reservation(999)
+
+        self.assertEqual(metrics.calls["create_reservation"], 1)
+        self.assertEqual(metrics.errors["delete_reservation"], 1)
+        self.assertEqual(metrics.latency["add_customer"].count, 1)
+
+        prom = self.store.export_metrics(fmt="prometheus")
+        self.assertIn('biker_datastore_calls_total{method="create_reservation"} 1', prom)
+        self.assertIn('biker_datastore_rows{table="reservations"} 1', prom)
+
+        self.store.disable_metrics()
+        self.assertNotIn("create_reservation", self.store.__dict__)
+        self.assertIsNone(self.store.metrics)
+
+    # Extra: twee instanties op dezelfde map overschrijven elkaars wijzigingen niet
+    def test_two_instances_merge_on_save(self):
+        cust = self.store.add_customer("Dima")
+        self.store.add_bike(BikeType.STADSFIETS)
+        self.store.add_bike(BikeType.STADSFIETS)
+        self.store.save_to_csv(self.folder)
+
+        balie = DataStore()
+        balie.load_from_csv(self.folder)
+        werkplaats = DataStore()
+        werkplaats.load_from_csv(self.folder)
+
+        start = datetime(2030, 1, 1, 10, 0)
+        end = datetime(2030, 1, 2, 10, 0)
+        res_balie = balie.create_reservation(cust.customer_id, BikeType.STADSFIETS, start, end, LocationType.OPHALEN)
+        werkplaats.customers[cust.customer_id].iban = "NL00TEST0123456789"
+        res_werkplaats = werkplaats.create_reservation(
+            cust.customer_id, BikeType.STADSFIETS, start, end, LocationType.OPHALEN,
+        )
+
+        balie.save_to_csv(self.folder)
+        werkplaats.save_to_csv(self.folder)
+
+        check = DataStore()
+        check.load_from_csv(self.folder)
+        self.assertEqual(len(check.reservations), 2)
+        self.assertEqual(check.customers[cust.customer_id].iban, "NL00TEST0123456789")
+        # botsend id is hernummerd
+        self.assertEqual(res_balie.reservation_id, 1)
+        self.assertEqual(res_werkplaats.reservation_id, 2)
+        self.assertIn(2, werkplaats.reservations)
+        # beide boekten de enige vrije fiets: onze reservering is naar de andere fiets verplaatst
+        self.assertNotEqual(check.reservations[1].bike_id, check.reservations[2].bike_id)
+        self.assertEqual(werkplaats.reservations[2].bike_id, check.reservations[2].bike_id)
+        self.assertFalse([i for i in check.check_consistency(fix=False) if i.kind == "overlap"])
+        # de fiets waar de boeking naartoe ging staat als bezet, in het geheugen en in bikes.csv
+        moved_to = werkplaats.reservations[2].bike_id
+        self.assertFalse(werkplaats.bikes[moved_to].available)
+        self.assertEqual(werkplaats.check_consistency(fix=False), [])
+        self.assertIsNone(werkplaats.get_available_bike(BikeType.STADSFIETS))
+        self.assertEqual(check.consistency_issues, [])
+
+        # geen vrije fiets meer over: conflict, er wordt niets geschreven
+        balie.create_reservation(cust.customer_id, BikeType.STADSFIETS, start, end, LocationType.OPHALEN)
+        with self.assertRaises(CsvConflictError):
+            balie.save_to_csv(self.folder)
+        check = DataStore()
+        check.load_from_csv(self.folder)
+        self.assertEqual(len(check.reservations), 2)
+
+    # Extra: conflict alleen als beide kanten dezelfde rij wijzigen
+    def test_conflicting_save_raises(self):
+        cust = self.store.add_customer("Anna")
+        self.store.save_to_csv(self.folder)
+
+        a = DataStore()
+        a.load_from_csv(self.folder)
+        b = DataStore()
+        b.load_from_csv(self.folder)
+        a.customers[cust.customer_id].name = "Anna A"
+        b.customers[cust.customer_id].name = "Anna B"
+
+        a.save_to_csv(self.folder)
+        with self.assertRaises(CsvConflictError) as ctx:
+            b.save_to_csv(self.folder)
+        self.assertEqual(ctx.exception.conflicts, [("customers", cust.customer_id)])
+
+        b.save_to_csv(self.folder, force=True)
+        check = DataStore()
+        check.load_from_csv(self.folder)
+        self.assertEqual(check.customers[cust.customer_id].name, "Anna B")
+
+    # Extra: externe wijziging in repairs.csv wordt per rij ingelezen
+    def test_poll_changes_reloads_only_changed_rows(self):
+        cust = self.store.add_customer("Monteur test")
+        self.store.add_bike(BikeType.E_BIKE)
+        res = self.store.create_reservation(
+            customer_id=cust.customer_id,
+            bike_type=BikeType.E_BIKE,
+            start=datetime(2030, 1, 1, 10, 0),
+            end=datetime(2030, 1, 2, 10, 0),
+            location_type=LocationType.OPHALEN,
+        )
+        repair = self.store.report_defect(res.reservation_id, "Lekke band", "Achterband is lek.")
+        self.store.save_to_csv(self.folder)
+        self.assertEqual(self.store.poll_changes(), {})
+
+        # ander programma wijzigt de reparatie en voegt er een toe
+        other = DataStore()
+        other.load_from_csv(self.folder)
+        other.repairs[repair.repair_id].description = "Voorband is lek."
+        other.report_defect(res.reservation_id, "Remmen", "Remmen piepen.")
+        other.save_to_csv(self.folder)
+
+        deltas = self.store.poll_changes()
+        self.assertEqual(set(deltas), {"repairs"})
+        self.assertEqual(deltas["repairs"].changed, [repair.repair_id])
+        self.assertEqual(deltas["repairs"].added, [repair.repair_id + 1])
+        # hetzelfde object, ter plekke bijgewerkt
+        self.assertIs(self.store.repairs[repair.repair_id], repair)
+        self.assertEqual(repair.description, "Voorband is lek.")
+        self.assertEqual(self.store.next_repair_id, repair.repair_id + 2)
+
+    # Extra: wijzigingsfeed geeft alleen de delta sinds een volgnummer
+    def test_changes_since_and_jsonl_export(self):
+        cust = self.store.add_customer("Billing")
+        self.store.add_bike(BikeType.STADSFIETS)
+        checkpoint = self.store.change_seq
+
+        res = self.store.create_reservation(
+            customer_id=cust.customer_id,
+            bike_type=BikeType.STADSFIETS,
+            start=datetime(2030, 1, 1, 10, 0),
+            end=datetime(2030, 1, 3, 10, 0),
+            location_type=LocationType.OPHALEN,
+        )
+        res.total_price = 10.0      # directe wijziging, zoals in het bewerkvenster
+        self.store.record_change("reservations", res.reservation_id)
+        self.store.delete_reservation(res.reservation_id)
+
+        changes = self.store.changes_since(checkpoint, tables={"reservations"})
+        self.assertEqual([c.op for c in changes], ["insert", "update", "delete"])
+        self.assertEqual(changes[1].row["total_price"], "10.0")
+        self.assertEqual(changes[2].row["reservation_id"], str(res.reservation_id))
+
+        path = os.path.join(self.folder, "changes.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            last = self.store.export_changes_jsonl(f, since_seq=checkpoint, tables={"reservations"})
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(last, self.store.change_seq)
+        self.assertEqual(self.store.changes_since(last), [])
+
+        # volgende sessie: nummering loopt door na het bewaarde checkpoint
+        self.store.write_changes_checkpoint(self.folder, last)
+        self.assertEqual(self.store.changes_since(last), [])
+        other = DataStore()
+        self.assertEqual(other.read_changes_checkpoint(self.folder), last)
+        other.load_from_csv(self.folder)
+        self.assertGreater(other.change_seq, last)
+
+    # Extra: reservering bijwerken controleert de nieuwe periode en wisselt zo nodig van fiets
+    def test_update_reservation_revalidates_period(self):
+        cust = self.store.add_customer("Wijzig")
+        bike1 = self.store.add_bike(BikeType.STADSFIETS)
+        bike2 = self.store.add_bike(BikeType.STADSFIETS)
+        ebike1 = self.store.add_bike(BikeType.E_BIKE)
+
+        r1 = self.store.create_reservation(
+            cust.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 1, 1, 10, 0), datetime(2030, 1, 3, 10, 0), LocationType.OPHALEN,
+        )
+        r2 = self.store.create_reservation(
+            cust.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 1, 5, 10, 0), datetime(2030, 1, 6, 10, 0), LocationType.OPHALEN,
+        )
+        r3 = self.store.create_reservation(
+            cust.customer_id, BikeType.E_BIKE,
+            datetime(2030, 1, 10, 10, 0), datetime(2030, 1, 11, 10, 0), LocationType.OPHALEN,
+        )
+        self.assertEqual(r2.bike_id, bike2.bike_id)
+
+        # verlengen binnen vrije tijd: zelfde fiets, nieuwe prijs
+        self.store.update_reservation(r1.reservation_id, end=datetime(2030, 1, 4, 10, 0))
+        self.assertEqual(r1.bike_id, bike1.bike_id)
+        self.assertEqual(r1.total_price, 45.0)
+
+        # enige e-bike is dan al bezet
+        with self.assertRaises(ValueError):
+            self.store.update_reservation(
+                r2.reservation_id, bike_type=BikeType.E_BIKE,
+                start=datetime(2030, 1, 10, 12, 0), end=datetime(2030, 1, 11, 12, 0),
+            )
+        self.assertEqual(r2.bike_type, BikeType.STADSFIETS)
+
+        # met een tweede e-bike wordt gewisseld
+        ebike2 = self.store.add_bike(BikeType.E_BIKE)
+        self.store.update_reservation(
+            r2.reservation_id, bike_type=BikeType.E_BIKE,
+            start=datetime(2030, 1, 10, 12, 0), end=datetime(2030, 1, 11, 12, 0),
+        )
+        self.assertEqual(r2.bike_id, ebike2.bike_id)
+        self.assertEqual(r2.total_price, 25.0)
+        self.assertTrue(self.store.bikes[bike2.bike_id].available)
+        self.assertFalse(self.store.bikes[ebike2.bike_id].available)
+        self.assertEqual(r3.bike_id, ebike1.bike_id)
+
+        with self.assertRaises(ValueError):
+            self.store.update_reservation(r1.reservation_id, end=datetime(2030, 1, 1, 9, 0))
+
+        self.store.update_reservation(r1.reservation_id, location_type=LocationType.BEZORGEN, address="Kade 1")
+        self.assertEqual(r1.address, "Kade 1")
+        ops = [c.op for c in self.store.changes_since(0, tables={"reservations"})]
+        self.assertEqual(ops.count("update"), 3)
+
+    # Extra: snapshot blijft gelijk terwijl er verder geboekt wordt
+    def test_snapshot_is_isolated_from_later_writes(self):
+        self.store.add_bike(BikeType.STADSFIETS)
+        self.store.add_bike(BikeType.STADSFIETS)
+        c = self.store.add_customer("Snap", "snap@example.com")
+        r1 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 2, 10, 0), LocationType.OPHALEN,
+        )
+        snap = self.store.snapshot()
+
+        r2 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 2, 10, 0), LocationType.OPHALEN,
+        )
+        self.store.update_reservation(r1.reservation_id, end=datetime(2030, 2, 3, 10, 0))
+        later = self.store.snapshot()
+        self.store.delete_reservation(r1.reservation_id)
+
+        self.assertEqual([r.reservation_id for r in snap.get_all_reservations()], [r1.reservation_id])
+        self.assertEqual(snap.reservations[r1.reservation_id].end, datetime(2030, 2, 2, 10, 0))
+        self.assertEqual(len(later.reservations), 2)
+        self.assertEqual(later.reservations[r1.reservation_id].end, datetime(2030, 2, 3, 10, 0))
+        self.assertNotIn(r1.reservation_id, self.store.snapshot().reservations)
+        self.assertIn(r2.reservation_id, self.store.snapshot().reservations)
+        self.assertLess(snap.seq, later.seq)
+
+    # Extra: eerste snapshot vanuit een andere thread terwijl er (onder write_lock) geboekt wordt
+    def test_first_snapshot_from_other_thread(self):
+        import threading
+        c = self.store.add_customer("Rapport")
+        for _ in range(200):
+            self.store.add_bike(BikeType.STADSFIETS)
+        errors = []
+        done = threading.Event()
+
+        def writer():
+            try:
+                for i in range(200):
+                    with self.store.write_lock:
+                        self.store.create_reservation(
+                            c.customer_id, BikeType.STADSFIETS, datetime(2030, 1, 1) + timedelta(days=i),
+                            datetime(2030, 1, 2) + timedelta(days=i), LocationType.OPHALEN,
+                        )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        snap = self.store.snapshot()
+        thread.join()
+        self.assertEqual(errors, [])
+        # alles tot snap.seq zit erin, niets daarna; latere boekingen komen in de volgende snapshot
+        in_snap = {rid for rid in self.store.reservations if self.store.row_version("reservations", rid) <= snap.seq}
+        self.assertEqual(set(snap.reservations), in_snap)
+        self.assertEqual(len(self.store.snapshot().reservations), 200)
+
+    # Extra: vlootanalyse (bezetting, omzet per week, defecten)
+    @unittest.skipUnless(analytics.np is not None, "NumPy niet geïnstalleerd")
+    def test_fleet_analytics(self):
+        b1 = self.store.add_bike(BikeType.STADSFIETS)
+        self.store.add_bike(BikeType.STADSFIETS)
+        c = self.store.add_customer("Analyse", "analyse@example.com")
+        r1 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 1, 7, 0, 0), datetime(2030, 1, 9, 0, 0), LocationType.OPHALEN,
+        )
+        fa = analytics.FleetAnalytics(self.store)
+        start, end = datetime(2030, 1, 7), datetime(2030, 1, 11)
+
+        self.assertAlmostEqual(fa.utilization_per_bike(start, end)[b1.bike_id], 0.5)
+        self.assertAlmostEqual(fa.utilization_per_type(start, end)[BikeType.STADSFIETS], 0.25)
+        self.assertEqual([v for _, v in fa.utilization_per_day(start, end)], [0.5, 0.5, 0.0, 0.0])
+        self.assertEqual(fa.revenue_per_week(), [(datetime(2030, 1, 7), r1.total_price)])
+
+        # projectie wordt na een wijziging opnieuw opgebouwd
+        self.store.report_defect(r1.reservation_id, "Band", "lek")
+        self.assertEqual(fa.defect_rate_per_type()[BikeType.STADSFIETS], 1.0)
+        self.store.delete_reservation(r1.reservation_id)
+        self.assertEqual(fa.revenue_per_week(), [])
+
+    # Extra: display-rij-cache maakt alleen gewijzigde rijen opnieuw op
+    def test_display_cache_reformats_only_changed_rows(self):
+        self.store.add_bike(BikeType.STADSFIETS)
+        self.store.add_bike(BikeType.STADSFIETS)
+        c = self.store.add_customer("Weergave", "weergave@example.com")
+        r1 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 3, 1, 10, 0), datetime(2030, 3, 2, 10, 0), LocationType.OPHALEN,
+        )
+        r2 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 3, 1, 10, 0), datetime(2030, 3, 2, 10, 0), LocationType.OPHALEN,
+        )
+        cache = DisplayCache(self.store)
+        rows = cache.view(
+            "reservations",
+            lambda r: (r.reservation_id, self.store.customers[r.customer_id].name, f"{r.total_price:.2f}"),
+            depends="customers", depends_key=lambda r: r.customer_id,
+        )
+        for r in (r1, r2, r1, r2):
+            rows(r)
+        self.assertEqual((rows.misses, rows.hits), (2, 2))
+
+        self.store.update_reservation(r1.reservation_id, end=datetime(2030, 3, 3, 10, 0))
+        self.assertEqual(rows(r1)[2], f"{r1.total_price:.2f}")
+        rows(r2)
+        self.assertEqual((rows.misses, rows.hits), (3, 3))
+
+        # klantnaam gewijzigd: rijen van die klant opnieuw opmaken
+        self.store.update_customer(c.customer_id, name="Nieuw")
+        self.assertEqual(rows(r2)[1], "Nieuw")
+
+        self.store.delete_reservation(r2.reservation_id)
+        self.assertEqual(len(rows), 1)
+        cache.close()
+
+    # Extra: bezorgplanning bundelt ritten per gebied en tijdvak
+    def test_dispatch_plan_groups_and_orders_deliveries(self):
+        for _ in range(5):
+            self.store.add_bike(BikeType.STADSFIETS)
+        c = self.store.add_customer("Bezorg", "bezorg@example.com")
+        addresses = ["Kerkstraat 1, 2497 AB Den Haag", "Molenweg 2, 2400 AA Den Haag",
+                     "Kade 3, 2450 CD Den Haag", "Dorpsstraat 4, 1012 AB Amsterdam"]
+        res = [
+            self.store.create_reservation(
+                c.customer_id, BikeType.STADSFIETS, datetime(2030, 4, 1, 9, 0), datetime(2030, 4, 3, 9, 0),
+                LocationType.BEZORGEN, address=address,
+            )
+            for address in addresses
+        ]
+        self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 4, 1, 9, 30), datetime(2030, 4, 2, 9, 0),
+            LocationType.OPHALEN,
+        )
+        self.assertEqual(len(self.store.reservations_starting_on(datetime(2030, 4, 1).date())), 5)
+
+        batches = dispatch.plan_day(self.store, datetime(2030, 4, 1).date())
+        self.assertEqual([b.area for b in batches], ["10", "24"])
+        self.assertEqual(
+            [j.postcode for j in batches[1].stops], ["2400AA", "2450CD", "2497AB"],
+        )
+        self.assertTrue(all(j.kind == "bezorgen" for b in batches for j in b.stops))
+
+        # ophalen op de einddag; verplaatste reservering verhuist in de dagindex
+        self.store.update_reservation(res[0].reservation_id, end=datetime(2030, 4, 4, 9, 0))
+        pickups = dispatch.jobs_for_day(self.store, datetime(2030, 4, 3).date())
+        self.assertEqual(sorted(j.reservation_id for j in pickups), [r.reservation_id for r in res[1:]])
+
+    # Extra: stations met beschikbaarheid per (station, type) en herverdelingsrapport
+    def test_stations_availability_and_rebalancing(self):
+        centrum = self.store.add_station("Centrum")
+        strand = self.store.add_station("Strand")
+        b1 = self.store.add_bike(BikeType.STADSFIETS, station_id=centrum.station_id)
+        b2 = self.store.add_bike(BikeType.STADSFIETS, station_id=strand.station_id)
+        b3 = self.store.add_bike(BikeType.STADSFIETS, station_id=strand.station_id)
+        c = self.store.add_customer("Station", "station@example.com")
+
+        r = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 5, 1, 10, 0), datetime(2030, 5, 3, 10, 0),
+            LocationType.OPHALEN, station_id=strand.station_id,
+        )
+        self.assertEqual(r.bike_id, b2.bike_id)
+        self.assertEqual(self.store.get_available_bike(BikeType.STADSFIETS).bike_id, b1.bike_id)
+        self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 5, 2, 10, 0), datetime(2030, 5, 2, 18, 0),
+            LocationType.OPHALEN, station_id=centrum.station_id,
+        )
+        with self.assertRaises(ValueError):
+            self.store.create_reservation(
+                c.customer_id, BikeType.STADSFIETS, datetime(2030, 5, 2, 10, 0), datetime(2030, 5, 2, 18, 0),
+                LocationType.OPHALEN, station_id=centrum.station_id,
+            )
+
+        # verplaatste fiets is op het nieuwe station beschikbaar
+        self.store.move_bike(b3.bike_id, centrum.station_id)
+        self.assertEqual(self.store.get_available_bike(BikeType.STADSFIETS, centrum.station_id).bike_id, b3.bike_id)
+        self.assertIsNone(self.store.get_available_bike(BikeType.STADSFIETS, strand.station_id))
+
+        report = self.store.rebalancing_report(days=4, start=datetime(2030, 5, 1).date())
+        short = [(s.station_id, s.day.day, s.booked, s.free) for s in report]
+        self.assertEqual(short, [(strand.station_id, 1, 1, 0), (strand.station_id, 2, 1, 0), (strand.station_id, 3, 1, 0)])
+        self.assertEqual(report[0].donor_station_id, centrum.station_id)
+        self.assertIsNone(report[1].donor_station_id)   # op 2 mei is centrum zelf krap
+
+        # stations en toewijzing gaan mee via CSV
+        self.store.save_to_csv(self.folder)
+        store2 = DataStore()
+        store2.load_from_csv(self.folder)
+        self.assertEqual(store2.stations[strand.station_id].name, "Strand")
+        self.assertEqual(store2.bikes[b3.bike_id].station_id, centrum.station_id)
+        self.assertEqual(store2.get_available_bike(BikeType.STADSFIETS, centrum.station_id).bike_id, b3.bike_id)
+
+    # Extra: testdata is bij hetzelfde seed byte voor byte gelijk (reproduceerbare benchmarks)
+    def test_datagen_deterministic_for_seed(self):
+        def files(name: str, seed: int) -> dict[str, bytes]:
+            folder = os.path.join(self.folder, name)
+            counts = datagen.generate(folder, datagen.GeneratorConfig.for_size(500, seed=seed))
+            self.assertEqual(counts["reservations"], 500)
+            result = {}
+            for filename in sorted(os.listdir(folder)):
+                with open(os.path.join(folder, filename), "rb") as f:
+                    result[filename] = f.read()
+            return result
+
+        first = files("a", 7)
+        self.assertEqual(first, files("b", 7))
+        self.assertNotEqual(first["reservations.csv"], files("c", 8)["reservations.csv"])
+
+        store = DataStore()
+        store.load_from_csv(os.path.join(self.folder, "a"))
+        self.assertEqual(len(store.reservations), 500)
+
+    # Extra: gesharde DataStore (per fietstype) met fan-out over de shards
+    def test_sharded_store_routes_and_merges(self):
+        folder = os.path.join(self.folder, "sharded")
+        with ShardedDataStore(folder, shards=2, shard_by="bike_type") as store:
+            c = store.add_customer("Shard", "shard@example.com")
+            city = store.add_bike(BikeType.STADSFIETS)
+            ebike = store.add_bike(BikeType.E_BIKE)
+            self.assertNotEqual(city.bike_id, ebike.bike_id)
+
+            r1 = store.create_reservation(
+                c.customer_id, BikeType.E_BIKE, datetime(2030, 6, 2, 10, 0), datetime(2030, 6, 3, 10, 0),
+                LocationType.OPHALEN,
+            )
+            r2 = store.create_reservation(
+                c.customer_id, BikeType.STADSFIETS, datetime(2030, 6, 1, 10, 0), datetime(2030, 6, 2, 10, 0),
+                LocationType.OPHALEN,
+            )
+            self.assertEqual(r1.bike_id, ebike.bike_id)
+            self.assertEqual(
+                [r.reservation_id for r in store.get_reservations_for_customer(c.customer_id)],
+                [r2.reservation_id, r1.reservation_id],
+            )
+            with self.assertRaises(ValueError):
+                store.create_reservation(
+                    c.customer_id, BikeType.E_BIKE, datetime(2030, 6, 2, 10, 0), datetime(2030, 6, 3, 10, 0),
+                    LocationType.OPHALEN,
+                )
+            store.delete_reservation(r1.reservation_id)
+            # ander fietstype: verhuist naar de shard van de e-bikes
+            r2 = store.update_reservation(r2.reservation_id, bike_type=BikeType.E_BIKE)
+            self.assertEqual(r2.bike_id, ebike.bike_id)
+            self.assertEqual(
+                [r.reservation_id for r in store.get_reservations_for_customer(c.customer_id)], [r2.reservation_id],
+            )
+
+            # oude hash in alle shards; shard 0 hasht opnieuw en de andere shards volgen
+            store.add_account("shard", security.hash_password("geheim", iterations=1000), Role.HUURDER, c.customer_id)
+            self.assertIsNotNone(store.authenticate("shard", "geheim", Role.HUURDER))
+            hashes = {acc.password for acc in store._broadcast("get_account", "shard")}
+            self.assertEqual(len(hashes), 1)
+            self.assertFalse(security.needs_rehash(hashes.pop()))
+
+            store.save_to_csv()
+            self.assertEqual(store.row_counts()["reservations"], 1)
+
+        with ShardedDataStore(folder) as store:
+            self.assertEqual([r.reservation_id for r in store.get_all_reservations()], [r2.reservation_id])
+            self.assertEqual(store.get_available_bike(BikeType.STADSFIETS).bike_id, city.bike_id)
+
+    # Extra: bulk-import met validatie, doorlopende ids en rapport van afgekeurde rijen
+    def test_bulk_import_customers_and_bikes(self):
+        self.store.add_customer("Bestaand", "bestaand@example.com")
+        station = self.store.add_station("Centrum")
+        klanten = os.path.join(self.folder, "klanten.csv")
+        with open(klanten, "w", encoding="utf-8") as f:
+            f.write(
+                "name,email,iban,delivery_address\n"
+                "Anna  de Vries,Anna@Example.com,nl91 abna 0417 1643 00,Dorpsstraat 1\n"
+                "Dubbel,bestaand@example.com,,\n"
+                "Fout IBAN,fout@example.com,NL91ABNA0417164301,\n"
+                "Bram,anna@example.com,,\n"
+                ",leeg@example.com,,\n"
+                "Cor,,,\n"
+            )
+        afgekeurd = os.path.join(self.folder, "afgekeurd.csv")
+        result = bulk_import.import_customers(self.store, klanten, afgekeurd, chunk_size=2, workers=1)
+        self.assertEqual((result.imported, result.rejected, result.first_id, result.last_id), (2, 4, 2, 3))
+        anna = self.store.customers[2]
+        self.assertEqual((anna.name, anna.email, anna.iban), ("Anna de Vries", "anna@example.com", "NL91ABNA0417164300"))
+        self.assertEqual([c.customer_id for c in self.store.search_customers("anna")], [2])
+        with open(afgekeurd, encoding="utf-8") as f:
+            rows = [line.split(",")[:2] for line in f.read().splitlines()[1:]]
+        self.assertEqual(rows, [
+            ["3", "dubbel e-mailadres"], ["4", "IBAN-controlegetal klopt niet"],
+            ["5", "dubbel e-mailadres"], ["6", "naam ontbreekt"],
+        ])
+        self.assertEqual(self.store.add_customer("Na import", "").customer_id, 4)
+        # elke geïmporteerde klant in de feed (export en audit): per blok één compacte bulk_insert
+        inserts = []
+        for c in self.store.changes_since(0, tables=["customers"]):
+            if c.op == "insert":
+                inserts.append(c.key)
+            elif c.op == "bulk_insert":
+                self.assertIsNone(c.row)
+                inserts.extend(c.key)
+        self.assertEqual(inserts, [1, 2, 3, 4])
+
+        fietsen = os.path.join(self.folder, "fietsen.csv")
+        with open(fietsen, "w", encoding="utf-8") as f:
+            f.write(
+                "bike_type,status,station_id\n"
+                f"E-bike,,{station.station_id}\n"
+                "stadsfiets,defect,\n"
+                "bakfiets,,\n"
+                "Stadsfiets,,99\n"
+            )
+        result = bulk_import.import_bikes(self.store, fietsen, workers=1)
+        self.assertEqual((result.imported, result.rejected), (2, 2))
+        self.assertEqual(self.store.get_available_bike(BikeType.E_BIKE, station.station_id).bike_id, result.first_id)
+        self.assertEqual(self.store.bikes[result.last_id].status, BikeStatus.DEFECT)
+
+    # Extra: consistentiecontrole bij laden herstelt beschikbaarheid en meldt losse verwijzingen
+    def test_consistency_check_on_load(self):
+        c = self.store.add_customer("Consistent", "consistent@example.com")
+        b1 = self.store.add_bike(BikeType.STADSFIETS)
+        b2 = self.store.add_bike(BikeType.STADSFIETS)
+        r1 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 7, 1, 10, 0), datetime(2030, 7, 5, 10, 0),
+            LocationType.OPHALEN,
+        )
+        r2 = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 7, 1, 10, 0), datetime(2030, 7, 2, 10, 0),
+            LocationType.OPHALEN,
+        )
+        # tegenstrijdigheden zoals in oude CSV-bestanden
+        self.store.reservations[r2.reservation_id].bike_id = b1.bike_id       # overlapt met r1
+        self.store.bikes[b2.bike_id].available = False                          # geen reservering
+        self.store.reservations[r1.reservation_id].customer_id = 999
+        self.store.repairs[1] = Repair(1, 4242, 77, "band", "lek")
+        self.store.save_to_csv(self.folder)
+
+        store2 = DataStore()
+        store2.load_from_csv(self.folder)
+        found = sorted((i.kind, i.table, i.key, i.fixed) for i in store2.consistency_issues)
+        self.assertEqual(found, [
+            ("availability", "bikes", b2.bike_id, True),
+            ("dangling_bike", "repairs", 1, False),
+            ("dangling_customer", "reservations", r1.reservation_id, False),
+            ("dangling_reservation", "repairs", 1, False),
+            ("overlap", "reservations", r1.reservation_id, False),
+        ])
+        self.assertTrue(store2.bikes[b2.bike_id].available)
+        self.assertEqual(store2.get_available_bike(BikeType.STADSFIETS).bike_id, b2.bike_id)
+
+        # na afloop van de boekingen is de fiets weer vrij (op verzoek)
+        issues = store2.check_consistency(now=datetime(2030, 8, 1))
+        self.assertEqual([(i.kind, i.key) for i in issues if i.kind == "availability"], [("availability", b1.bike_id)])
+        self.assertTrue(store2.bikes[b1.bike_id].available)
+
+    # Extra: laden op de achtergrond; inloggen kan zodra de accounts er zijn, de rest volgt
+    def test_deferred_load_allows_login_before_other_tables(self):
+        import threading
+        c = self.store.add_customer("Laat")
+        self.store.add_bike(BikeType.STADSFIETS)
+        self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 1, 1), datetime(2030, 1, 2), LocationType.OPHALEN,
+        )
+        self.store.accounts["laat"] = UserAccount("laat", "geheim", Role.HUURDER, customer_id=c.customer_id)
+        self.store.save_to_csv(self.folder)
+
+        store = DataStore()
+        accounts_loaded = threading.Event()
+        logged_in = threading.Event()
+
+        def progress(table, done, total):
+            if table == "accounts":
+                accounts_loaded.set()
+                logged_in.wait(5)       # rest van het laden houdt op tot er ingelogd is
+
+        loader = threading.Thread(target=store.load_from_csv, args=(self.folder, progress))
+        loader.start()
+        self.assertTrue(accounts_loaded.wait(5))
+        try:
+            # zoals BikerApp: via het schrijversslot, terwijl de grote tabellen nog laden
+            with store.write_lock:
+                self.assertNotIn("reservations", store.loaded_tables)
+                acc = store.authenticate("laat", "geheim", Role.HUURDER)
+        finally:
+            logged_in.set()
+        loader.join(5)
+
+        self.assertIsNotNone(acc)
+        self.assertTrue(store.load_finished.is_set())
+        self.assertEqual(len(store.reservations), 1)
+        self.assertEqual(store.customers[c.customer_id].name, "Laat")
+        # omgezet wachtwoord is een gewone wijziging en wordt opgeslagen
+        self.assertTrue(security.is_hashed(store.accounts["laat"].password))
+        store.save_to_csv(self.folder)
+        check = DataStore()
+        check.load_from_csv(self.folder)
+        self.assertTrue(security.is_hashed(check.accounts["laat"].password))
+
+    # Extra: leesbare wachtwoorden worden bij inloggen gehasht; blokkade vóór het hashen; sessietokens
+    def test_password_migration_throttle_and_sessions(self):
+        self.store.accounts["oud"] = UserAccount("oud", "geheim", Role.HUURDER, customer_id=1)
+        self.store.save_to_csv(self.folder)
+        store = DataStore()
+        store.load_from_csv(self.folder)
+        self.assertEqual(store.accounts["oud"].password, "geheim")
+
+        acc = store.authenticate("oud", "geheim", Role.HUURDER)
+        self.assertIsNotNone(acc)
+        self.assertTrue(security.is_hashed(acc.password))
+        store.save_to_csv(self.folder)
+        store2 = DataStore()
+        store2.load_from_csv(self.folder)
+        self.assertNotIn("geheim", store2.accounts["oud"].password)
+        self.assertIsNotNone(store2.authenticate("oud", "geheim", Role.HUURDER))
+
+        # na te veel mislukte pogingen ook met het goede wachtwoord geweigerd, zonder te hashen
+        for _ in range(store2.login_throttle.max_failures):
+            self.assertIsNone(store2.authenticate("oud", "fout", Role.HUURDER))
+        self.assertGreater(store2.login_throttle.retry_after("oud"), 0)
+        calls = []
+        original = security.hashlib.pbkdf2_hmac
+        security.hashlib.pbkdf2_hmac = lambda *a: calls.append(a) or original(*a)
+        try:
+            self.assertIsNone(store2.authenticate("oud", "geheim", Role.HUURDER))
+        finally:
+            security.hashlib.pbkdf2_hmac = original
+        self.assertEqual(calls, [])
+
+        # onbekende naam en verkeerde rol: wel sleutelafleiding (geen verschil in responstijd)
+        security.dummy_hash()
+        security.hashlib.pbkdf2_hmac = lambda *a: calls.append(a) or original(*a)
+        try:
+            self.assertIsNone(store2.authenticate("niemand", "geheim", Role.HUURDER))
+            store2.login_throttle.success("oud")
+            self.assertIsNone(store2.authenticate("oud", "geheim", Role.BEHEERDER))
+        finally:
+            security.hashlib.pbkdf2_hmac = original
+        self.assertEqual(len(calls), 2)
+
+        # een volle tabel met onzinnamen gooit een lopende blokkade niet weg
+        throttle = security.LoginThrottle(max_failures=2, max_entries=3)
+        throttle.failure("admin")
+        throttle.failure("admin")
+        for i in range(10):
+            throttle.failure(f"onzin{i}")
+        self.assertGreater(throttle.retry_after("admin"), 0)
+        self.assertEqual(len(throttle._failures), 3)
+
+        # sessietoken: geldig tot uitloggen of een nieuw wachtwoord
+        token = self.store.login("oud", "geheim", Role.HUURDER)
+        self.assertEqual(self.store.authenticate_token(token).username, "oud")
+        self.store.add_account("oud", "nieuw", Role.HUURDER, customer_id=1)
+        self.assertIsNone(self.store.authenticate_token(token))
+        token = self.store.login("oud", "nieuw", Role.HUURDER)
+        self.store.logout(token)
+        self.assertIsNone(self.store.authenticate_token(token))
+
+    # Extra: auditlog schrijft mutaties met actor als JSON-regels en roteert op grootte
+    def test_audit_log_records_mutations(self):
+        filename = os.path.join(self.folder, "audit.jsonl")
+        with AuditLog(self.store, filename, max_bytes=10_000, backups=2, flush_interval=60) as audit:
+            audit.actor = "admin"
+            c = self.store.add_customer("Audit", "audit@example.com")
+            bike = self.store.add_bike(BikeType.STADSFIETS)
+            r = self.store.create_reservation(
+                c.customer_id, BikeType.STADSFIETS, datetime(2030, 8, 1, 10, 0), datetime(2030, 8, 2, 10, 0),
+                LocationType.OPHALEN,
+            )
+            audit.actor = "monteur"
+            repair = self.store.report_defect(r.reservation_id, "band", "lek")
+            self.store.fix_bike_from_repair(repair.repair_id)
+            audit.actor = "admin"
+            self.store.delete_reservation(r.reservation_id)
+            audit.flush()
+            with open(filename, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f]
+            self.assertEqual(
+                [(e["actor"], e["table"], e["op"]) for e in events],
+                [
+                    ("admin", "customers", "insert"), ("admin", "bikes", "insert"),
+                    ("admin", "reservations", "insert"), ("admin", "bikes", "update"),
+                    ("monteur", "repairs", "insert"), ("monteur", "bikes", "update"),
+                    ("monteur", "bikes", "update"),
+                    ("admin", "reservations", "delete"), ("admin", "bikes", "update"),
+                ],
+            )
+            self.assertEqual(events[7]["row"]["reservation_id"], str(r.reservation_id))
+            self.assertEqual(events[-1]["key"], bike.bike_id)
+
+            for i in range(300):
+                self.store.add_customer(f"Klant {i}", f"klant{i}@example.com")
+            audit.flush()
+        self.assertTrue(os.path.exists(filename + ".1"))
+        self.assertFalse(os.path.exists(filename + ".3"))
+        self.assertEqual(audit.dropped, 0)
+
+    # Extra: vraaggestuurde prijs volgt de bezetting bij boeken, wijzigen en annuleren
+    def test_dynamic_pricing_follows_occupancy(self):
+        c = self.store.add_customer("Prijs", "prijs@example.com")
+        for _ in range(2):
+            self.store.add_bike(BikeType.STADSFIETS)
+        start, end = datetime(2030, 9, 1, 10, 0), datetime(2030, 9, 3, 10, 0)
+        flat = self.store.quote_price(BikeType.STADSFIETS, start, end)
+        self.assertEqual(flat, 30.0)
+
+        pricing = DynamicPricing(self.store, threshold=0.5, surge=0.5, discount=0.1)
+        self.assertEqual(self.store.quote_price(BikeType.STADSFIETS, start, end), 27.0)    # lege vloot
+        r1 = self.store.create_reservation(c.customer_id, BikeType.STADSFIETS, start, end, LocationType.OPHALEN)
+        self.assertEqual(r1.total_price, 27.0)
+        self.assertEqual(pricing.occupancy(BikeType.STADSFIETS, start.date()), 1)
+        self.assertEqual(self.store.quote_price(BikeType.STADSFIETS, start, end), 30.0)    # half bezet
+        r2 = self.store.create_reservation(c.customer_id, BikeType.STADSFIETS, start, end, LocationType.OPHALEN)
+        self.assertEqual(r2.total_price, 30.0)
+        quote = pricing.quote(BikeType.STADSFIETS, start, end)
+        self.assertEqual((quote.total, quote.base_total, quote.peak_occupancy), (45.0, 30.0, 1.0))
+
+        # eigen boeking telt niet mee bij wijzigen; verschuiven naar een lege periode
+        self.assertEqual(self.store.quote_price(BikeType.STADSFIETS, start, end, r2.reservation_id), 30.0)
+        self.store.update_reservation(r2.reservation_id, start=datetime(2030, 10, 1, 10, 0), end=datetime(2030, 10, 3, 10, 0))
+        self.assertEqual(self.store.reservations[r2.reservation_id].total_price, 27.0)
+        self.assertEqual(pricing.occupancy(BikeType.STADSFIETS, start.date()), 1)
+        self.store.delete_reservation(r1.reservation_id)
+        self.assertEqual(pricing.occupancy(BikeType.STADSFIETS, start.date()), 0)
+
+        pricing.close()
+        self.assertEqual(self.store.quote_price(BikeType.STADSFIETS, start, end), flat)
+
+    # Extra: differentiële test tegen de referentie-implementatie, met verkleinen van een verschil
+    def test_differential_against_reference(self):
+        self.assertIsNone(difftest.run_random(seed=7, sequences=10, length=300))
+
+        class LeakyStore(DataStore):
+            """Geeft de fiets bij verwijderen niet vrij."""
+            def delete_reservation(self, reservation_id):
+                res = self.reservations.pop(reservation_id)
+                self._record_change("reservations", "delete", reservation_id, obj=res)
+
+        found = difftest.run_random(seed=7, sequences=10, length=300, store_class=LeakyStore)
+        self.assertIsNotNone(found)
+        self.assertLessEqual(len(found.reproducer), 4)
+        self.assertEqual(found.reproducer[-1][0], "delete_reservation")
+        self.assertIsNotNone(difftest.replay(found.reproducer, LeakyStore))
+        self.assertIsNone(difftest.replay(found.reproducer))
+
+    # Extra: UI-executor levert resultaten via after() af en gooit verouderde resultaten weg
+    def test_ui_executor_drops_stale_results(self):
+        import threading
+        import time
+
+        busy, results, errors = [], [], []
+        executor = UiExecutor(FakeWidget(), poll_ms=1, heartbeat_ms=5, on_busy=busy.append)
+        c = self.store.add_customer("Test")
+        self.store.add_bike(BikeType.STADSFIETS)
+        gate = threading.Event()
+
+        executor.submit("lijst", lambda: gate.wait(5) and "oud", on_done=results.append)
+        executor.submit("lijst", lambda: "overgeslagen", on_done=results.append)
+        executor.submit(
+            None, self.store.create_reservation, c.customer_id, BikeType.STADSFIETS,
+            datetime(2030, 1, 1, 10), datetime(2030, 1, 2, 10), LocationType.OPHALEN,
+            on_done=lambda r: results.append(r.reservation_id),
+        )
+        executor.submit(None, self.store.delete_reservation, 999, on_error=errors.append)
+        executor.submit("lijst", lambda: len(self.store.reservations), on_done=results.append)
+        gate.set()
+        self.assertTrue(executor.wait(timeout=5))
+
+        # alleen de laatste 'lijst' komt aan, en die ziet de reservering die ervóór is ingediend
+        self.assertEqual(results, [1, 1])
+        self.assertEqual(executor.stale, 2)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertEqual(busy, [True, False])
+        time.sleep(0.01)
+        executor.widget.update()
+        snapshot = executor.metrics.snapshot()["methods"]
+        self.assertEqual(snapshot["ui.lijst"]["calls"], 1)
+        self.assertIn("ui.event_loop_lag", snapshot)
+        executor.close()
+
+    # Extra: gefilterde iterators zonder lijstkopie en streaming export naar CSV/JSONL (ook gzip)
+    def test_iter_filters_and_streaming_export(self):
+        import csv
+        import gzip
+        import io
+        from model import ReservationStatus
+
+        c1 = self.store.add_customer("Een")
+        c2 = self.store.add_customer("Twee")
+        b1 = self.store.add_bike(BikeType.STADSFIETS)
+        self.store.add_bike(BikeType.E_BIKE)
+        day = datetime(2020, 5, 1, 10, 0)
+        made = []
+        for i in range(6):
+            customer = c1 if i % 2 == 0 else c2
+            bike_type = BikeType.STADSFIETS if i < 4 else BikeType.E_BIKE
+            start = day + timedelta(days=2 * i)
+            made.append(self.store.create_reservation(
+                customer.customer_id, bike_type, start, start + timedelta(days=1), LocationType.OPHALEN,
+            ))
+            self.store.mark_bike_ok(made[-1].bike_id)     # afgelopen: zelfde fiets weer vrij
+        self.store.update_reservation(made[2].reservation_id, status=ReservationStatus.GEANNULEERD)
+
+        def ids(**filters):
+            return [r.reservation_id for r in self.store.iter_reservations(**filters)]
+
+        self.assertEqual(ids(customer_id=c1.customer_id), [1, 3, 5])
+        self.assertEqual(ids(bike_id=b1.bike_id), [1, 2, 3, 4])
+        # via de boekingsindex van de fiets: geannuleerde vallen weg, begrensd op begintijd
+        active = [ReservationStatus.GEPLAND]
+        self.assertEqual(ids(bike_id=b1.bike_id, status=active), [1, 2, 4])
+        self.assertEqual(
+            ids(bike_id=b1.bike_id, status=active, start_from=day + timedelta(days=1),
+                start_before=day + timedelta(days=6)), [2],
+        )
+        self.assertEqual(ids(bike_type=BikeType.E_BIKE, where=lambda r: r.customer_id == c2.customer_id), [6])
+        self.assertEqual(ids(end_from=day + timedelta(days=9)), [5, 6])
+        rep = self.store.report_defect(made[0].reservation_id, "band", "lek")
+        self.assertEqual([r.repair_id for r in self.store.iter_repairs(bike_id=b1.bike_id)], [rep.repair_id])
+        self.assertEqual(list(self.store.iter_repairs(reservation_id=999)), [])
+
+        # CSV naar een tekststroom, in kleine blokken: zelfde kolommen als de datamap
+        text = io.StringIO()
+        n = export.export_table(self.store, "reservations", text, rows=self.store.iter_reservations(
+            customer_id=c1.customer_id), chunk_bytes=64)
+        rows = list(csv.DictReader(io.StringIO(text.getvalue())))
+        self.assertEqual(n, 3)
+        self.assertEqual([r["reservation_id"] for r in rows], ["1", "3", "5"])
+        self.assertEqual(rows[1]["status"], "GEANNULEERD")
+
+        # JSON-regels naar een binaire gzip-stroom; wachtwoorden blijven buiten de export
+        self.store.add_account("u", "geheim", Role.HUURDER, c1.customer_id)
+        raw = io.BytesIO()
+        with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+            self.assertEqual(export.export_table(self.store, "accounts", gz, fmt="jsonl"), 1)
+        lines = gzip.decompress(raw.getvalue()).decode("utf-8").splitlines()
+        self.assertEqual(json.loads(lines[0]), {"username": "u", "role": "HUURDER", "customer_id": str(c1.customer_id)})
+        with self.assertRaises(ValueError):
+            export.export_table(self.store, "reservations", io.StringIO(), fmt="xml")
+
+    # Extra: geheugen per tabel/index en archiveren van oude reserveringen boven het budget
+    def test_memory_report_and_budget_eviction(self):
+        import csv
+        from model import ReservationStatus
+
+        c = self.store.add_customer("Historie")
+        self.store.add_bike(BikeType.STADSFIETS)
+        base = datetime(2020, 1, 1, 10, 0)
+        for i in range(40):
+            r = self.store.create_reservation(
+                c.customer_id, BikeType.STADSFIETS, base + timedelta(days=i), base + timedelta(days=i, hours=5),
+                LocationType.OPHALEN,
+            )
+            self.store.update_reservation(r.reservation_id, status=ReservationStatus.AFGEROND)
+            self.store.mark_bike_ok(r.bike_id)
+        repair = self.store.report_defect(1, "band", "lek")
+        self.store.fix_bike_from_repair(repair.repair_id)
+        recent = self.store.create_reservation(
+            c.customer_id, BikeType.STADSFIETS, datetime(2030, 1, 1, 10), datetime(2030, 1, 2, 10), LocationType.OPHALEN,
+        )
+
+        report = {u.name: u for u in memory.memory_report(self.store)}
+        self.assertEqual(report["reservations"].items, 41)
+        self.assertGreater(report["reservations"].bytes, 41 * 100)
+        self.assertIn("index: boekingen per fiets", report)
+        self.assertIn("Totaal (schatting)", memory.format_report(list(report.values())))
+
+        archive = os.path.join(self.folder, memory.ARCHIVE_FILE)
+        now = datetime(2025, 1, 1)
+        roomy = memory.MemoryBudget(self.store, 10**9, archive)
+        self.assertEqual(roomy.check(now).archived, 0)
+
+        # budget dat ongeveer 10 reserveringen te krap is
+        self.store.save_to_csv(self.folder)
+        per_row = report["reservations"].bytes / 41
+        max_bytes = int(memory.total_bytes(list(report.values())) - 10 * per_row)
+        budget = memory.MemoryBudget(self.store, max_bytes, archive)
+        result = budget.check(now)
+        # per reservering telt ook haar aandeel in de indexen, dus hooguit 10
+        self.assertTrue(1 <= result.archived <= 10)
+        self.assertLess(result.after, result.before)
+        # oudste eerst, maar niet die met een reparatie en niet de toekomstige
+        self.assertIn(1, self.store.reservations)
+        self.assertNotIn(2, self.store.reservations)
+        self.assertIn(recent.reservation_id, self.store.reservations)
+        with open(archive, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), result.archived)
+        self.assertEqual(rows[0]["reservation_id"], "2")
+        self.assertEqual([i for i in self.store.check_consistency(fix=False)], [])
+        # één compacte bulk_delete in de feed; geen rijversies of samenvoegbasis meer voor die rijen
+        bulk = [c for c in self.store.changes_since(0, tables=["reservations"]) if c.op == "bulk_delete"]
+        self.assertEqual(len(bulk), 1)
+        self.assertEqual(sorted(bulk[0].key), sorted(int(r["reservation_id"]) for r in rows))
+        self.assertIsNone(bulk[0].row)
+        self.assertNotIn(2, self.store._base_rows["reservations"])
+        self.assertNotIn(("reservations", 2), self.store._row_versions)
+
+        # niet opgeslagen en opnieuw gestart: dezelfde rijen komen niet dubbel in het archief
+        restarted = DataStore()
+        restarted.load_from_csv(self.folder)
+        self.assertGreater(memory.MemoryBudget(restarted, 1, archive).check(now).archived, result.archived)
+        with open(archive, newline="", encoding="utf-8") as f:
+            ids = [r["reservation_id"] for r in csv.DictReader(f)]
+        self.assertEqual(len(ids), len(set(ids)))
+
+        # ook na opslaan en opnieuw laden weg
+        self.store.save_to_csv(self.folder)
+        reloaded = DataStore()
+        reloaded.load_from_csv(self.folder)
+        self.assertEqual(len(reloaded.reservations), 41 - result.archived)
+
+    # Extra: profileermodus: één profiel per actie, inclusief het werk op de worker-thread
+    def test_action_profiler_follows_executor_work(self):
+        import pstats
+
+        class App:
+            def __init__(self):
+                self.executor = UiExecutor(FakeWidget(), poll_ms=1, heartbeat_ms=0)
+                self.shown = None
+
+            def refresh(self):
+                self.executor.submit("lijst", sorted, range(20000, 0, -1), on_done=self.show)
+
+            def show(self, rows):
+                self.shown = len(rows)
+                self.quick()        # geneste actie hoort bij 'refresh'
+
+            def quick(self):
+                return 42
+
+        for mode in ("cprofile", "sample"):
+            folder = os.path.join(self.folder, mode)
+            app = App()
+            profiler = ActionProfiler(folder, mode=mode)
+            profiler.attach(app, ("refresh", "quick"))
+            app.refresh()
+            self.assertTrue(app.executor.wait(timeout=5))
+            self.assertEqual(app.quick(), 42)
+            summary = profiler.close()
+            app.executor.close()
+
+            self.assertEqual(app.shown, 20000)
+            self.assertEqual([r.name for r in profiler.records], ["refresh", "quick"])
+            self.assertTrue(os.path.exists(summary))
+            with open(summary, encoding="utf-8") as f:
+                self.assertIn("refresh", f.read())
+            if mode == "cprofile":
+                functions = {func for _, _, func in pstats.Stats(profiler.records[0].filename).stats}
+                # Tk-deel, worker-deel en callback in hetzelfde profiel
+                self.assertTrue({"refresh", "show", "quick", "<built-in method builtins.sorted>"} <= functions)
+            else:
+                self.assertTrue(profiler.records[0].filename.endswith(".collapsed"))
+
+        # zonder attach blijft alles de gewone methode
+        self.assertNotIn("refresh", vars(App()))
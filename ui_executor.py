@@ -0,0 +1,166 @@
+"""
+DataStore-aanroepen buiten de Tk-eventloop.
+
+UiExecutor voert opdrachten uit op een worker-thread en geeft het resultaat
+terug aan de Tk-thread via after()-polling (widgets mogen alleen vanuit de
+Tk-thread aangeraakt worden). DataStore is niet thread-safe: een opdracht
+houdt tijdens het uitvoeren `lock` vast, en code op de Tk-thread die de store
+direct leest of wijzigt neemt hetzelfde slot.
+
+- Opdrachten met een sleutel (bv. "admin_reservations") vervangen elkaar: een
+  nieuwe opdracht met dezelfde sleutel maakt de vorige ongeldig. Is die nog
+  niet begonnen, dan wordt ze overgeslagen; komt het resultaat later binnen,
+  dan wordt het weggegooid. `stale` telt beide.
+- Opdrachten zonder sleutel (wijzigingen) worden altijd uitgevoerd en afgeleverd.
+- Met één worker (standaard) lopen opdrachten in volgorde van indienen, dus
+  een verversing na een wijziging ziet die wijziging altijd.
+- on_busy(True/False) zodra er iets loopt / alles afgeleverd is.
+
+Metrics (zelfde Metrics-klasse als de DataStore):
+    ui.<sleutel>         indienen -> resultaat verwerkt op de Tk-thread
+    ui.event_loop_lag    hoeveel later een after()-hartslag binnenkomt dan gepland
+"""
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Metrics
+
+
+class UiExecutor:
+
+    def __init__(self, widget, workers: int = 1, poll_ms: int = 15, heartbeat_ms: int = 100,
+                 on_busy=None, lock=None):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.on_busy = on_busy
+        self.lock = lock if lock is not None else threading.RLock()
+        self.metrics = Metrics()
+        self.stale = 0
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-query")
+        self._results = queue.SimpleQueue()
+        self._generation: dict[str, int] = {}
+        self._pending = 0
+        self._busy = False
+        self._polling = False
+        self._closed = False
+        self._heartbeat_due = 0.0
+        if heartbeat_ms:
+            self._schedule_heartbeat()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    # --- Tk-thread ---
+
+    def submit(self, key: str | None, func, *args, on_done=None, on_error=None, **kwargs) -> int:
+        """
+        func(*args, **kwargs) op de worker uitvoeren; daarna on_done(resultaat) of
+        on_error(exceptie) op de Tk-thread. Geeft het generatienummer terug.
+        """
+        if self._closed:
+            raise RuntimeError("UiExecutor is gesloten.")
+        generation = 0
+        if key is not None:
+            generation = self._generation.get(key, 0) + 1
+            self._generation[key] = generation
+        self._pending += 1
+        if not self._busy:
+            self._busy = True
+            if self.on_busy is not None:
+                self.on_busy(True)
+        self._pool.submit(
+            self._run, key, generation, time.perf_counter(), func, args, kwargs, on_done, on_error,
+        )
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return generation
+
+    def is_current(self, key: str, generation: int) -> bool:
+        return self._generation.get(key) == generation
+
+    def _poll(self):
+        self._polling = False
+        if self._closed:
+            return
+        done = []
+        while True:
+            try:
+                done.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        self._pending -= len(done)
+        for item in done:
+            self._deliver(*item)
+        # callbacks kunnen nieuwe opdrachten indienen (verversen na een wijziging)
+        if self._pending:
+            if not self._polling:
+                self._polling = True
+                self.widget.after(self.poll_ms, self._poll)
+        elif self._busy:
+            self._busy = False
+            if self.on_busy is not None:
+                self.on_busy(False)
+
+    def _deliver(self, key, generation, submitted, ok, value, name, on_done, on_error):
+        if key is not None and not self.is_current(key, generation):
+            self.stale += 1
+            return
+        callback = on_done if ok else on_error
+        try:
+            if callback is not None:
+                callback(value)
+            elif not ok:
+                traceback.print_exception(value)
+        except Exception:
+            traceback.print_exc()
+        self.metrics.record(f"ui.{name}", time.perf_counter() - submitted, error=not ok)
+
+    def _heartbeat(self):
+        if self._closed:
+            return
+        self.metrics.record("ui.event_loop_lag", max(0.0, time.perf_counter() - self._heartbeat_due))
+        self._schedule_heartbeat()
+
+    def _schedule_heartbeat(self):
+        self._heartbeat_due = time.perf_counter() + self.heartbeat_ms / 1000
+        self.widget.after(self.heartbeat_ms, self._heartbeat)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Events verwerken tot alles afgeleverd is (benchmarks en tests); False bij timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self._pending:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            self.widget.update()
+            time.sleep(0.001)
+        return True
+
+    def close(self):
+        """Lopende opdracht afmaken, de rest vervalt; resultaten worden niet meer afgeleverd."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # --- worker-thread ---
+
+    def _run(self, key, generation, submitted, func, args, kwargs, on_done, on_error):
+        name = key if key is not None else getattr(func, "__name__", "call")
+        if key is not None and not self.is_current(key, generation):
+            # al vervangen voordat ze aan de beurt was: niet uitvoeren
+            self._results.put((key, generation, submitted, True, None, name, None, None))
+            return
+        try:
+            with self.lock:
+                value = func(*args, **kwargs)
+            ok = True
+        except Exception as e:
+            value, ok = e, False
+        self._results.put((key, generation, submitted, ok, value, name, on_done, on_error))